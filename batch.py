@@ -0,0 +1,282 @@
+"""
+Solve many puzzles at once: puzzle specs are read as JSON lines, solved
+across a pool of worker processes, and their results written as JSON lines
+in the order they finish.
+
+Each spec is a JSON object with a "type" and the parameters of that type:
+
+    {"type": "sudoku", "n": 4, "symbols": "12*4**...", "symbol_set": "1234"}
+    {"type": "mn", "from_grid": [["*", "2"], ["1", "3"]],
+     "to_grid": [["1", "2"], ["3", "*"]]}
+    {"type": "word_ladder", "from_word": "same", "to_word": "cost"}
+    {"type": "peg", "grid": ["*****", "**.**"]}
+
+and optionally an "id", copied into the result, a "solver" (a key of
+SOLVERS), and the limits in BUDGETS.  A word ladder without "words"
+uses the dictionary file given to the pool, which each worker loads once.
+
+Run it as python -m puzzle_tools batch; see main for its arguments.
+"""
+from puzzle_tools import (depth_first_solve, in_place_depth_first_solve,
+                          breadth_first_solve, best_first_solve,
+                          bidirectional_solve,
+                          iterative_deepening_solve, ida_star_solve,
+                          iter_path)
+from vector_bfs import vectorised_breadth_first_solve
+from search_stats import SearchStats
+from budget import Budget
+from sudoku_puzzle import SudokuPuzzle
+from mn_puzzle import MNPuzzle
+from word_ladder_puzzle import WordLadderPuzzle
+from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+from time import perf_counter
+import argparse
+import json
+import multiprocessing
+import sys
+
+# solvers a spec may ask for by name
+SOLVERS = {"depth_first": depth_first_solve,
+           "in_place_depth_first": in_place_depth_first_solve,
+           "breadth_first": breadth_first_solve,
+           "vectorised_breadth_first": vectorised_breadth_first_solve,
+           "best_first": best_first_solve,
+           "bidirectional": bidirectional_solve,
+           "iterative_deepening": iterative_deepening_solve,
+           "ida_star": ida_star_solve}
+
+# solver used for each type of puzzle when a spec does not name one
+DEFAULT_SOLVERS = {"sudoku": "depth_first", "mn": "best_first",
+                   "word_ladder": "breadth_first", "peg": "depth_first"}
+
+# limits a spec may set on its search
+BUDGETS = ("max_nodes", "max_seconds", "max_memory")
+
+# path of the dictionary for word ladders, and its words once loaded, in
+# this process
+_words_path = "words"
+_words = None
+
+
+def make_puzzle(spec):
+    """
+    Return the puzzle described by spec.
+
+    @type spec: dict[str, Any]
+    @rtype: Puzzle
+
+    >>> print(make_puzzle({"type": "peg", "grid": ["*.*"]}))
+    *.*
+    >>> make_puzzle({"type": "chess"})
+    Traceback (most recent call last):
+    ...
+    ValueError: unknown puzzle type 'chess'
+    """
+    kind = spec.get("type")
+    if kind == "sudoku":
+        symbols = list(spec["symbols"])
+        symbol_set = set(spec.get("symbol_set") or
+                         [str(i) for i in range(1, spec["n"] + 1)])
+        return SudokuPuzzle(spec["n"], symbols, symbol_set)
+    if kind == "mn":
+        return MNPuzzle(tuple([tuple(row) for row in spec["from_grid"]]),
+                        tuple([tuple(row) for row in spec["to_grid"]]))
+    if kind == "word_ladder":
+        words = spec.get("words")
+        return WordLadderPuzzle(spec["from_word"], spec["to_word"],
+                                _load_words() if words is None
+                                else set(words))
+    if kind == "peg":
+        return GridPegSolitairePuzzle(
+            [list(row) for row in spec["grid"]],
+            set(spec.get("marker_set", ["*", ".", "#"])))
+    raise ValueError("unknown puzzle type {!r}".format(kind))
+
+
+def _load_words():
+    """
+    Return the set of words in the dictionary of this process, reading it
+    on first use.
+
+    @rtype: set[str]
+    """
+    global _words
+    if _words is None:
+        with open(_words_path, "r") as words:
+            _words = set(words.read().split())
+    return _words
+
+
+def _init_worker(words_path):
+    """
+    Set up a worker process to read its dictionary from words_path.
+
+    @type words_path: str
+    @rtype: None
+    """
+    global _words_path, _words
+    _words_path, _words = words_path, None
+
+
+def solve_spec(spec, states=False, on_progress=None):
+    """
+    Solve the puzzle described by spec, and return a JSON-ready dict of the
+    result: whether it was solved, the number of moves, the search stats,
+    the seconds taken, which budget ran out if one did, and the error if
+    spec could not be solved.  With states True, the result also holds
+    the puzzles on the solution path, or the best puzzle reached if the
+    budget ran out, as strings.  on_progress is called with the search's
+    SearchStats as it runs, as in SearchStats.
+
+    @type spec: dict[str, Any]
+    @type states: bool
+    @type on_progress: (SearchStats) -> Any | None
+    @rtype: dict[str, Any]
+
+    >>> spec = {"id": 1, "type": "word_ladder", "from_word": "cost",
+    ...         "to_word": "cave", "words": ["cast", "case", "cave"]}
+    >>> result = solve_spec(spec, states=True)
+    >>> result["solved"], result["moves"], result["solution"][1]
+    (True, 3, 'cast -> cave')
+    >>> solve_spec(dict(spec, max_nodes=1))["exhausted"]
+    'max_nodes'
+    >>> solve_spec({"type": "peg"})["error"]
+    "KeyError: 'grid'"
+    """
+    result = {"id": spec.get("id"), "type": spec.get("type"),
+              "solved": False, "moves": None, "exhausted": None,
+              "error": None}
+    start = perf_counter()
+    stats = SearchStats(on_progress=on_progress)
+    budget = None
+    if any([spec.get(limit) is not None for limit in BUDGETS]):
+        # the best state is only reported with the states of a solution
+        budget = Budget(spec.get("max_nodes"), spec.get("max_seconds"),
+                        spec.get("max_memory"), track_best=states)
+    try:
+        puzzle = make_puzzle(spec)
+        name = spec.get("solver") or DEFAULT_SOLVERS[spec["type"]]
+        result["solver"] = name
+        if name not in SOLVERS:
+            raise ValueError("unknown solver {!r}".format(name))
+        solution = SOLVERS[name](puzzle, stats=stats, budget=budget)
+    except Exception as error:
+        result["error"] = "{}: {}".format(type(error).__name__, error)
+    else:
+        if solution:
+            path = list(iter_path(solution))
+            result["solved"], result["moves"] = True, len(path) - 1
+            if states:
+                result["solution"] = [str(state) for state in path]
+        elif solution is not None:
+            result["exhausted"] = solution.reason
+            if states and solution.best is not None:
+                result["best"] = str(solution.best)
+    result["seconds"] = perf_counter() - start
+    result["stats"] = stats.as_dict()
+    return result
+
+
+def _solve_line(task):
+    """
+    Return the result of solving the spec in the JSON line of task, a
+    (line, defaults, states) tuple, filling in any budget missing from the
+    spec from defaults.
+
+    @type task: (str, dict[str, Any], bool)
+    @rtype: dict[str, Any]
+    """
+    line, defaults, states = task
+    try:
+        spec = json.loads(line)
+        if not isinstance(spec, dict):
+            raise ValueError("a spec must be a JSON object")
+    except ValueError as error:
+        return {"id": None, "solved": False,
+                "error": "{}: {}".format(type(error).__name__, error)}
+    for budget, value in defaults.items():
+        if spec.get(budget) is None:
+            spec[budget] = value
+    return solve_spec(spec, states)
+
+
+def solve_lines(lines, workers=None, words="words", max_nodes=None,
+                max_seconds=None, max_memory=None, states=False):
+    """
+    Yield the result of solving the spec on each non-blank JSON line of
+    lines, in the order they finish, using workers processes, or this
+    process if workers is 0.
+
+    max_nodes, max_seconds and max_memory are the budgets for specs that
+    do not give their own, and words is the dictionary file for word
+    ladders.
+
+    @type lines: Iterable[str]
+    @type workers: int | None
+        defaults to the number of CPUs
+    @type words: str
+    @type max_nodes: int | None
+    @type max_seconds: float | None
+    @type max_memory: int | None
+    @type states: bool
+    @rtype: Iterator[dict[str, Any]]
+
+    >>> lines = ['{"id": "a", "type": "peg", "grid": ["**."]}', '',
+    ...          '{"id": "b", "type": "peg", "grid": ["*.*"]}']
+    >>> [(r["id"], r["solved"]) for r in solve_lines(lines, workers=0)]
+    [('a', True), ('b', False)]
+    """
+    defaults = {"max_nodes": max_nodes, "max_seconds": max_seconds,
+                "max_memory": max_memory}
+    tasks = ((line, defaults, states) for line in lines if line.strip())
+    if workers == 0:
+        _init_worker(words)
+        for task in tasks:
+            yield _solve_line(task)
+        return
+    with multiprocessing.Pool(workers, _init_worker, (words,)) as pool:
+        for result in pool.imap_unordered(_solve_line, tasks):
+            yield result
+
+
+def main(argv=None):
+    """
+    Read puzzle specs as JSON lines from a file or standard input, and
+    write their results as JSON lines, as given by the command-line
+    arguments argv.
+
+    @type argv: list[str] | None
+        defaults to sys.argv[1:]
+    @rtype: None
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m puzzle_tools batch",
+        description="Solve puzzle specs read as JSON lines.")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="file of specs, or - for standard input")
+    parser.add_argument("-o", "--output", default="-",
+                        help="file for results, or - for standard output")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="worker processes, 0 to solve in this one")
+    parser.add_argument("--words", default="words",
+                        help="dictionary file for word ladders")
+    parser.add_argument("--max-nodes", type=int, default=None)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    parser.add_argument("--max-memory", type=int, default=None,
+                        help="bytes of memory each worker may use")
+    parser.add_argument("--states", action="store_true",
+                        help="include the solution path in each result")
+    args = parser.parse_args(argv)
+    source = sys.stdin if args.input == "-" else open(args.input, "r")
+    target = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for result in solve_lines(source, args.workers, args.words,
+                                  args.max_nodes, args.max_seconds,
+                                  args.max_memory, args.states):
+            target.write(json.dumps(result) + "\n")
+            target.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
@@ -0,0 +1,6 @@
+"""
+A benchmark suite timing the solvers of puzzle_tools on a fixed corpus of
+puzzles, writing JSON results that can be compared between commits.
+
+Run it as python -m bench; see bench.__main__ for its arguments.
+"""
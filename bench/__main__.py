@@ -0,0 +1,76 @@
+"""
+Run the benchmark suite: python -m bench [-o results.json] [--compare
+baseline.json] ...; python -m bench --help lists the arguments.
+"""
+from bench.corpus import corpus, WORDS_PATH
+from bench.runner import run_case, environment, compare
+from datetime import datetime, timezone
+import argparse
+import json
+import sys
+
+
+def main(argv=None):
+    """
+    Run the benchmarks selected by the command-line arguments argv, write
+    their results as JSON, and return the exit status: 1 if a comparison
+    found a regression, otherwise 0.
+
+    @type argv: list[str] | None
+        defaults to sys.argv[1:]
+    @rtype: int
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m bench",
+        description="Time the solvers of puzzle_tools on a fixed corpus.")
+    parser.add_argument("-o", "--output", default="-",
+                        help="file for the JSON results, or - for standard "
+                             "output")
+    parser.add_argument("-k", "--filter", default="",
+                        help="only run cases or solvers containing this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--max-seconds", type=float, default=60.0,
+                        help="stop each search after this many seconds")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the extra run measuring peak memory")
+    parser.add_argument("--words", default=WORDS_PATH)
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="JSON results to compare median times with")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="slowdown reported as a regression, as a "
+                             "fraction")
+    args = parser.parse_args(argv)
+    results = []
+    for case in corpus(args.words):
+        for solver in case.solvers:
+            if args.filter not in case.name and args.filter not in solver:
+                continue
+            result = run_case(case, solver, args.repeat, args.warmup,
+                              args.max_seconds, not args.no_memory)
+            print("{case} {solver}: {median:.4f}s, {nodes} expanded".format(
+                case=case.name, solver=solver,
+                median=result["seconds"]["median"],
+                nodes=result["nodes_expanded"]), file=sys.stderr)
+            results.append(result)
+    report = {"environment": environment(),
+              "date": datetime.now(timezone.utc).isoformat(),
+              "results": results}
+    text = json.dumps(report, indent=2, sort_keys=True) + "\n"
+    if args.output == "-":
+        sys.stdout.write(text)
+    else:
+        with open(args.output, "w") as output:
+            output.write(text)
+    if args.compare:
+        with open(args.compare, "r") as baseline:
+            lines, regressed = compare(json.load(baseline), report,
+                                       args.threshold)
+        for line in lines:
+            print(line, file=sys.stderr)
+        return 1 if regressed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+The fixed corpus of puzzles the benchmarks are run on, and the solvers run
+on each of them.
+"""
+from sudoku_puzzle import SudokuPuzzle
+from mn_puzzle import MNPuzzle
+from word_ladder_puzzle import WordLadderPuzzle
+from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+from generators import mn_scrambles
+from random import Random
+import os
+
+# the dictionary of word ladders, next to the puzzle modules
+WORDS_PATH = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "words")
+
+# the three instances from sudoku_puzzle.py
+SUDOKUS = {
+    "sudoku-star-2015-07-09": ["***7*8*1*", "**7*9***6", "9*31*****",
+                               "35*8**6*1", "*********", "1*6**9*48",
+                               "*****12*7", "8***7*4**", "*6*3*2***"],
+    "sudoku-3star-2015-11-14": ["***9*2***", "*91***63*", "*3**7**8*",
+                                "3*******8", "**9***2**", "5*******7",
+                                "*7**8**4*", "*45***81*", "***3*6***"],
+    "sudoku-4star-2015-11-14": ["56***7**9", "*7**48*31", "*********",
+                                "43*******", "*8*****9*", "*******26",
+                                "*********", "19*36**7*", "7**1***42"]}
+
+# word ladders over WORDS_PATH, as (from_word, to_word)
+LADDERS = [("same", "cost"), ("cold", "warm"), ("head", "tail")]
+
+
+class Case:
+    """
+    A named puzzle of the corpus, and the solvers to benchmark on it.
+
+    === Attributes ===
+    @type name: str
+    @type kind: str
+        the type of puzzle, as in batch.make_puzzle
+    @type puzzle: Puzzle
+    @type solvers: list[str]
+        names of solvers in bench.runner.SOLVERS
+    """
+
+    def __init__(self, name, kind, puzzle, solvers):
+        """
+        Create a new Case self.
+
+        @type self: Case
+        @type name: str
+        @type kind: str
+        @type puzzle: Puzzle
+        @type solvers: list[str]
+        @rtype: None
+        """
+        self.name, self.kind = name, kind
+        self.puzzle, self.solvers = puzzle, solvers
+
+
+def scramble(puzzle, moves, seed):
+    """
+    Return the puzzle reached from puzzle by moves random extensions,
+    never undoing the last one, chosen by a Random seeded with seed.
+
+    @type puzzle: Puzzle
+    @type moves: int
+    @type seed: int
+    @rtype: Puzzle
+
+    >>> goal = (("1", "2", "3"), ("4", "5", "*"))
+    >>> x = scramble(MNPuzzle(goal, goal), 10, 0)
+    >>> x == scramble(MNPuzzle(goal, goal), 10, 0), x.is_solved()
+    (True, False)
+    """
+    rng, previous = Random(seed), None
+    for _ in range(moves):
+        extensions = [extension for extension in puzzle.extensions()
+                      if extension.state_key() != previous]
+        previous, puzzle = puzzle.state_key(), rng.choice(extensions)
+    return puzzle
+
+
+def corpus(words_path=WORDS_PATH):
+    """
+    Return the Cases of the benchmark corpus, reading the word ladders'
+    dictionary from words_path.
+
+    @type words_path: str
+    @rtype: list[Case]
+
+    >>> sorted(set([case.kind for case in corpus()]))
+    ['mn', 'peg', 'sudoku', 'word_ladder']
+    """
+    cases = []
+    for name, rows in SUDOKUS.items():
+        cases.append(Case(name, "sudoku",
+                          SudokuPuzzle(9, list("".join(rows)),
+                                       set("123456789")),
+                          ["depth_first", "in_place_depth_first",
+                           "best_first"]))
+    grid = [list(row) for row in
+            ["*****", "*****", "*****", "**.**", "*****"]]
+    cases.append(Case("peg-5x5", "peg",
+                      GridPegSolitairePuzzle(grid, {"*", ".", "#"}),
+                      ["depth_first", "in_place_depth_first"]))
+    with open(words_path, "r") as words:
+        word_set = set(words.read().split())
+    for from_word, to_word in LADDERS:
+        cases.append(Case("ladder-{}-{}".format(from_word, to_word),
+                          "word_ladder",
+                          WordLadderPuzzle(from_word, to_word, word_set),
+                          ["breadth_first", "bidirectional", "best_first",
+                           "parallel_breadth_first"]))
+    goal = (("1", "2", "3"), ("4", "5", "*"))
+    cases.append(Case("mn-2x3-scramble", "mn",
+                      scramble(MNPuzzle(goal, goal), 30, 2),
+                      ["depth_first", "breadth_first", "best_first",
+                       "bidirectional", "iterative_deepening", "ida_star"]))
+    goal = (("1", "2", "3"), ("4", "5", "6"), ("7", "8", "*"))
+    cases.append(Case("mn-3x3-scramble", "mn",
+                      scramble(MNPuzzle(goal, goal), 60, 3),
+                      ["breadth_first", "best_first", "bidirectional",
+                       "ida_star"]))
+    # one of the two hardest 8-puzzles, 31 moves from the goal
+    hardest = (("8", "6", "7"), ("2", "5", "4"), ("3", "*", "1"))
+    cases.append(Case("mn-3x3-hardest", "mn", MNPuzzle(hardest, goal),
+                      ["breadth_first", "vectorised_breadth_first",
+                       "best_first", "bidirectional"]))
+    cases.append(Case("mn-4x4-depth-14", "mn",
+                      next(mn_scrambles(4, 4, 14, seed=0)),
+                      ["breadth_first", "vectorised_breadth_first",
+                       "bidirectional", "ida_star"]))
+    return cases
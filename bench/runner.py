@@ -0,0 +1,187 @@
+"""
+Timing of solvers on the Cases of the corpus, and comparison of results
+between runs.
+"""
+from puzzle_tools import (depth_first_solve, in_place_depth_first_solve,
+                          breadth_first_solve, best_first_solve,
+                          bidirectional_solve,
+                          iterative_deepening_solve, ida_star_solve,
+                          parallel_breadth_first_solve, iter_path)
+from vector_bfs import vectorised_breadth_first_solve
+from search_stats import SearchStats
+from budget import Budget
+from time import perf_counter
+import platform
+import subprocess
+import sys
+import tracemalloc
+
+# solvers the corpus may name
+SOLVERS = {"depth_first": depth_first_solve,
+           "in_place_depth_first": in_place_depth_first_solve,
+           "breadth_first": breadth_first_solve,
+           "vectorised_breadth_first": vectorised_breadth_first_solve,
+           "best_first": best_first_solve,
+           "bidirectional": bidirectional_solve,
+           "iterative_deepening": iterative_deepening_solve,
+           "ida_star": ida_star_solve,
+           "parallel_breadth_first": parallel_breadth_first_solve}
+
+
+def run_case(case, solver, repeat=5, warmup=1, max_seconds=60.0,
+             memory=True):
+    """
+    Return a JSON-ready dict of the results of solving case with the solver
+    named solver repeat times, after warmup untimed runs, each stopped after
+    max_seconds.
+
+    The seconds taken are summarised by their median, percentiles, minimum
+    and maximum.  With memory True, one more run measures the peak memory
+    allocated by the search with tracemalloc.
+
+    @type case: Case
+    @type solver: str
+    @type repeat: int
+    @type warmup: int
+    @type max_seconds: float | None
+    @type memory: bool
+    @rtype: dict[str, Any]
+
+    >>> from bench.corpus import Case
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> case = Case("tiny", "word_ladder",
+    ...             WordLadderPuzzle("ab", "bb", {"bb"}), ["breadth_first"])
+    >>> result = run_case(case, "breadth_first", repeat=3, warmup=0)
+    >>> result["solved"], result["moves"], result["nodes_expanded"]
+    (True, 1, 1)
+    >>> sorted(result["seconds"])
+    ['max', 'mean', 'median', 'min', 'p10', 'p90']
+    """
+    solve = SOLVERS[solver]
+    for _ in range(warmup):
+        solve(case.puzzle, budget=_budget(max_seconds))
+    times = []
+    for _ in range(repeat):
+        stats = SearchStats(timing=False)
+        start = perf_counter()
+        solution = solve(case.puzzle, stats=stats,
+                         budget=_budget(max_seconds))
+        times.append(perf_counter() - start)
+    times.sort()
+    median = percentile(times, 50)
+    result = {"case": case.name, "kind": case.kind, "solver": solver,
+              "repeat": repeat, "warmup": warmup,
+              "seconds": {"median": median, "p10": percentile(times, 10),
+                          "p90": percentile(times, 90), "min": times[0],
+                          "max": times[-1],
+                          "mean": sum(times) / len(times)},
+              "solved": bool(solution), "moves": None, "exhausted": None,
+              "nodes_expanded": stats.nodes_expanded,
+              "nodes_generated": stats.nodes_generated,
+              "nodes_per_second": (stats.nodes_expanded / median
+                                   if median else None),
+              "peak_memory_bytes": None}
+    if solution:
+        result["moves"] = sum([1 for _ in iter_path(solution)]) - 1
+    elif solution is not None:
+        result["exhausted"] = solution.reason
+    if memory:
+        tracemalloc.start()
+        try:
+            solve(case.puzzle, budget=_budget(max_seconds))
+            result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def _budget(max_seconds):
+    """
+    Return a Budget stopping a benchmarked search after max_seconds, or
+    None if there is no limit.
+
+    @type max_seconds: float | None
+    @rtype: Budget | None
+    """
+    if max_seconds is None:
+        return None
+    return Budget(max_seconds=max_seconds)
+
+
+def percentile(values, q):
+    """
+    Return the q-th percentile of the sorted, non-empty list values,
+    interpolating between neighbouring values.
+
+    @type values: list[float]
+    @type q: float
+    @rtype: float
+
+    >>> percentile([1.0, 2.0, 3.0, 4.0], 50)
+    2.5
+    >>> percentile([1.0, 2.0, 3.0, 4.0], 90)
+    3.7
+    """
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return round(values[low] + (values[high] - values[low]) *
+                 (position - low), 12)
+
+
+def environment():
+    """
+    Return a JSON-ready dict describing where the benchmarks run: the
+    Python version, the platform and the current git commit, if any.
+
+    @rtype: dict[str, str | None]
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"],
+                                capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(), "commit": commit}
+
+
+def compare(old, new, threshold=0.1):
+    """
+    Return a list of lines comparing the median seconds of each case and
+    solver in the results old and new, and whether any got slower by more
+    than the fraction threshold.
+
+    @type old: dict[str, Any]
+    @type new: dict[str, Any]
+    @type threshold: float
+    @rtype: (list[str], bool)
+
+    >>> old = {"results": [{"case": "a", "solver": "s",
+    ...                     "seconds": {"median": 1.0}}]}
+    >>> new = {"results": [{"case": "a", "solver": "s",
+    ...                     "seconds": {"median": 1.5}}]}
+    >>> lines, regressed = compare(old, new)
+    >>> print(lines[0])
+    a s: 1.0000s -> 1.5000s (x1.50) REGRESSION
+    >>> regressed
+    True
+    """
+    before = {(result["case"], result["solver"]): result
+              for result in old["results"]}
+    lines, regressed = [], False
+    for result in new["results"]:
+        key = (result["case"], result["solver"])
+        now = result["seconds"]["median"]
+        if key not in before:
+            lines.append("{} {}: {:.4f}s (new)".format(key[0], key[1], now))
+            continue
+        then = before[key]["seconds"]["median"]
+        ratio = now / then if then else float("inf")
+        slower = ratio > 1 + threshold
+        regressed = regressed or slower
+        lines.append("{} {}: {:.4f}s -> {:.4f}s (x{:.2f}){}".format(
+            key[0], key[1], then, now, ratio,
+            " REGRESSION" if slower else ""))
+    return lines, regressed
@@ -0,0 +1,219 @@
+"""
+Limits on the work a search in puzzle_tools may do, and the result it
+returns when it runs out.
+"""
+from puzzle import Puzzle
+from time import perf_counter
+import os
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+class Budget:
+    """
+    Limits on the puzzles a search may expand, the seconds it may take and
+    the memory its process may use, together with a flag to cancel it.
+
+    Pass a Budget to a solver in puzzle_tools as its budget argument, and
+    call cancel from another thread to stop the search.  The number of
+    expansions is checked after every expansion, and everything else after
+    every check_interval expansions.
+
+    === Attributes ===
+    @type max_nodes: int | None
+        most puzzles to expand
+    @type max_seconds: float | None
+        most seconds to search for
+    @type max_memory: int | None
+        most bytes of memory the process may hold while searching, not
+        enforced where memory_used cannot measure it
+    @type check_interval: int
+        expansions between checks of the time, memory and cancel flag
+    @type cancelled: bool
+        whether cancel was called
+    @type best: Puzzle | None
+        the expanded puzzle with the lowest heuristic in the last search,
+        if its puzzles override Puzzle.heuristic and track_best is True
+    @type track_best: bool
+        whether to compute the heuristic of every expanded puzzle to find
+        best, which costs a heuristic call per expansion
+    """
+
+    def __init__(self, max_nodes=None, max_seconds=None, max_memory=None,
+                 check_interval=64, track_best=False):
+        """
+        Create a new Budget self.
+
+        @type self: Budget
+        @type max_nodes: int | None
+        @type max_seconds: float | None
+        @type max_memory: int | None
+        @type check_interval: int
+        @type track_best: bool
+        @rtype: None
+        """
+        self.max_nodes, self.max_seconds = max_nodes, max_seconds
+        self.max_memory, self.check_interval = max_memory, check_interval
+        self.track_best = track_best
+        self.cancelled = False
+        self.start()
+
+    def start(self):
+        """
+        Start the clock of Budget self for a new search, and forget the best
+        puzzle of the last one.
+
+        @type self: Budget
+        @rtype: None
+        """
+        self.best, self._best_score, self._scored = None, None, None
+        self._ticks = 0
+        self._started = perf_counter()
+
+    def cancel(self):
+        """
+        Ask the search using Budget self to stop as soon as it next checks.
+
+        @type self: Budget
+        @rtype: None
+        """
+        self.cancelled = True
+
+    def check(self, puzzle, stats, scored=True):
+        """
+        Record that puzzle is being expanded by the search recorded in
+        stats, and raise OverBudget if the search must stop.  A puzzle of
+        None checks everything at once.  With scored False, puzzle is not
+        considered as the best partial state.
+
+        @type self: Budget
+        @type puzzle: Puzzle | None
+        @type stats: SearchStats
+        @type scored: bool
+        @rtype: None
+
+        >>> from search_stats import SearchStats
+        >>> stats = SearchStats()
+        >>> budget = Budget(max_nodes=1)
+        >>> stats.nodes_expanded = 2
+        >>> budget.check(None, stats)
+        Traceback (most recent call last):
+        ...
+        budget.OverBudget: max_nodes
+        >>> budget = Budget()
+        >>> budget.cancel()
+        >>> budget.check(None, stats)
+        Traceback (most recent call last):
+        ...
+        budget.OverBudget: cancelled
+        """
+        if puzzle is not None and scored and self.track_best:
+            if self._scored is None:
+                self._scored = type(puzzle).heuristic is not Puzzle.heuristic
+            if self._scored:
+                score = puzzle.heuristic()
+                if self._best_score is None or score < self._best_score:
+                    # a search changing puzzle in place will move on from it
+                    if type(puzzle).copy is not Puzzle.copy:
+                        puzzle = puzzle.copy()
+                    self.best, self._best_score = puzzle, score
+        if (self.max_nodes is not None and
+                stats.nodes_expanded > self.max_nodes):
+            raise OverBudget("max_nodes")
+        if puzzle is not None:
+            self._ticks += 1
+            if self._ticks % self.check_interval:
+                return
+        if self.cancelled:
+            raise OverBudget("cancelled")
+        if (self.max_seconds is not None and
+                perf_counter() - self._started > self.max_seconds):
+            raise OverBudget("max_seconds")
+        if self.max_memory is not None:
+            used = memory_used()
+            if used is not None and used > self.max_memory:
+                raise OverBudget("max_memory")
+
+
+class OverBudget(Exception):
+    """
+    Raised by Budget.check to stop a search, with the name of the limit
+    that was reached, or "cancelled".
+    """
+
+
+class BudgetExhausted:
+    """
+    The result of a search that stopped because its Budget ran out.  It is
+    false, like the None returned by a search that finished unsolved.
+
+    === Attributes ===
+    @type reason: str
+        "max_nodes", "max_seconds", "max_memory" or "cancelled"
+    @type best: Puzzle | None
+        the expanded puzzle closest to a solution by its heuristic, if any
+    @type stats: SearchStats
+        the work done by the search
+    """
+
+    def __init__(self, reason, best, stats):
+        """
+        Create a new BudgetExhausted self.
+
+        @type self: BudgetExhausted
+        @type reason: str
+        @type best: Puzzle | None
+        @type stats: SearchStats
+        @rtype: None
+        """
+        self.reason, self.best, self.stats = reason, best, stats
+
+    def __bool__(self):
+        """
+        Return False, since BudgetExhausted self holds no solution.
+
+        @type self: BudgetExhausted
+        @rtype: bool
+        """
+        return False
+
+    def __str__(self):
+        """
+        Return a human-readable description of BudgetExhausted self.
+
+        @type self: BudgetExhausted
+        @rtype: str
+
+        >>> print(BudgetExhausted("max_nodes", None, None))
+        budget exhausted: max_nodes
+        """
+        if self.best is None:
+            return "budget exhausted: {}".format(self.reason)
+        return "budget exhausted: {}, best state:\n{}".format(self.reason,
+                                                              self.best)
+
+
+def memory_used():
+    """
+    Return the bytes of memory this process holds, or, where that cannot be
+    read, the most it has ever held, or None if neither can be measured on
+    this platform, so that max_memory is not enforced there.
+
+    @rtype: int | None
+
+    >>> memory_used() > 0
+    True
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes everywhere but macOS
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
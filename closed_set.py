@@ -0,0 +1,276 @@
+"""
+Closed sets: where the solvers in puzzle_tools remember the state keys
+they have already seen.
+
+ExactClosedSet remembers every key, like a set.  LRUClosedSet remembers
+only the most recently used keys, so a search may revisit states it has
+forgotten.  BloomClosedSet remembers keys approximately in a fixed number
+of bits, so a search may wrongly skip a state it has never seen, and miss
+a solution.  All of them report roughly how much memory they use.
+"""
+from collections import OrderedDict
+from math import ceil, log
+import sys
+
+
+class ExactClosedSet:
+    """
+    A closed set remembering every key added to it.
+    """
+
+    def __init__(self):
+        """
+        Create a new, empty ExactClosedSet self.
+
+        @type self: ExactClosedSet
+        @rtype: None
+        """
+        self._keys = set()
+        self._key_bytes = 0
+
+    def add(self, key):
+        """
+        Remember key in ExactClosedSet self.
+
+        @type self: ExactClosedSet
+        @type key: Hashable
+        @rtype: None
+        """
+        if not self._key_bytes:
+            self._key_bytes = _size_of(key)
+        self._keys.add(key)
+
+    def __contains__(self, key):
+        """
+        Return whether key was added to ExactClosedSet self.
+
+        @type self: ExactClosedSet
+        @type key: Hashable
+        @rtype: bool
+
+        >>> closed = ExactClosedSet()
+        >>> closed.add("cost")
+        >>> "cost" in closed, "cast" in closed
+        (True, False)
+        """
+        return key in self._keys
+
+    def __len__(self):
+        """
+        Return the number of keys remembered by ExactClosedSet self.
+
+        @type self: ExactClosedSet
+        @rtype: int
+        """
+        return len(self._keys)
+
+    def memory_bytes(self):
+        """
+        Return an estimate of the bytes used by ExactClosedSet self,
+        assuming all keys are the size of the first one added.
+
+        @type self: ExactClosedSet
+        @rtype: int
+
+        >>> ExactClosedSet().memory_bytes() > 0
+        True
+        """
+        return sys.getsizeof(self._keys) + len(self._keys) * self._key_bytes
+
+
+class LRUClosedSet:
+    """
+    A closed set remembering at most capacity keys, forgetting the least
+    recently added or found ones first.
+    """
+
+    def __init__(self, capacity):
+        """
+        Create a new, empty LRUClosedSet self holding up to capacity keys.
+
+        @type self: LRUClosedSet
+        @type capacity: int
+        @rtype: None
+        """
+        assert capacity > 0
+        self.capacity = capacity
+        self._keys = OrderedDict()
+        self._key_bytes = 0
+        self.evicted = 0
+
+    def add(self, key):
+        """
+        Remember key in LRUClosedSet self, forgetting the least recently
+        used key if self is full.
+
+        @type self: LRUClosedSet
+        @type key: Hashable
+        @rtype: None
+
+        >>> closed = LRUClosedSet(2)
+        >>> for key in ["a", "b", "c"]: closed.add(key)
+        >>> "a" in closed, "b" in closed, "c" in closed, len(closed)
+        (False, True, True, 2)
+        """
+        if not self._key_bytes:
+            self._key_bytes = _size_of(key)
+        keys = self._keys
+        keys[key] = None
+        keys.move_to_end(key)
+        if len(keys) > self.capacity:
+            keys.popitem(last=False)
+            self.evicted += 1
+
+    def __contains__(self, key):
+        """
+        Return whether key is remembered by LRUClosedSet self, marking it
+        as recently used if it is.
+
+        @type self: LRUClosedSet
+        @type key: Hashable
+        @rtype: bool
+
+        >>> closed = LRUClosedSet(2)
+        >>> closed.add("a")
+        >>> closed.add("b")
+        >>> "a" in closed
+        True
+        >>> closed.add("c")
+        >>> "a" in closed, "b" in closed
+        (True, False)
+        """
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            return True
+        return False
+
+    def __len__(self):
+        """
+        Return the number of keys remembered by LRUClosedSet self.
+
+        @type self: LRUClosedSet
+        @rtype: int
+        """
+        return len(self._keys)
+
+    def memory_bytes(self):
+        """
+        Return an estimate of the bytes used by LRUClosedSet self,
+        assuming all keys are the size of the first one added.
+
+        @type self: LRUClosedSet
+        @rtype: int
+        """
+        return sys.getsizeof(self._keys) + len(self._keys) * self._key_bytes
+
+
+class BloomClosedSet:
+    """
+    A closed set remembering keys in a Bloom filter sized for capacity keys
+    with a false-positive rate of error_rate.
+
+    A key never added is reported as present with probability about
+    error_rate while no more than capacity keys have been added, and more
+    often after that.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        """
+        Create a new, empty BloomClosedSet self.
+
+        @type self: BloomClosedSet
+        @type capacity: int
+        @type error_rate: float
+        @rtype: None
+
+        >>> BloomClosedSet(1000, 0.01).memory_bytes()
+        1199
+        """
+        assert capacity > 0 and 0 < error_rate < 1
+        self.capacity, self.error_rate = capacity, error_rate
+        self._size = ceil(-capacity * log(error_rate) / (log(2) ** 2))
+        self._hashes = max(1, round(self._size / capacity * log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+        self._count = 0
+
+    def _positions(self, key):
+        """
+        Yield the bit positions for key in BloomClosedSet self.
+
+        @type self: BloomClosedSet
+        @type key: Hashable
+        @rtype: Iterator[int]
+        """
+        # double hashing: two halves of one hash give every position
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        size = self._size
+        for i in range(self._hashes):
+            yield (h1 + i * h2) % size
+
+    def add(self, key):
+        """
+        Remember key in BloomClosedSet self.
+
+        @type self: BloomClosedSet
+        @type key: Hashable
+        @rtype: None
+
+        >>> closed = BloomClosedSet(100)
+        >>> closed.add(("a", "b"))
+        >>> ("a", "b") in closed, len(closed)
+        (True, 1)
+        """
+        bits = self._bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+    def __contains__(self, key):
+        """
+        Return whether key may have been added to BloomClosedSet self.
+
+        @type self: BloomClosedSet
+        @type key: Hashable
+        @rtype: bool
+        """
+        bits = self._bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __len__(self):
+        """
+        Return the number of keys added to BloomClosedSet self.
+
+        @type self: BloomClosedSet
+        @rtype: int
+        """
+        return self._count
+
+    def memory_bytes(self):
+        """
+        Return the bytes used by the bits of BloomClosedSet self.
+
+        @type self: BloomClosedSet
+        @rtype: int
+        """
+        return len(self._bits)
+
+
+def _size_of(key):
+    """
+    Return the bytes used by key, including the strings and tuples it
+    contains.
+
+    @type key: Hashable
+    @rtype: int
+
+    >>> _size_of(("ab", "cd")) > _size_of("ab")
+    True
+    """
+    size = sys.getsizeof(key)
+    if isinstance(key, tuple):
+        size += sum([_size_of(item) for item in key])
+    return size
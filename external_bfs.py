@@ -0,0 +1,336 @@
+"""
+Breadth-first search that keeps its layers in files on disk, for puzzles
+whose state spaces do not fit in memory.
+
+Each layer of the search is a file of the states at one depth, encoded by
+Puzzle.state_bytes and sorted.  New states are gathered into sorted runs of
+at most buffer_states encodings, which are merged into the next layer while
+dropping the states already in earlier layers.  Reversible puzzles only need
+to be checked against the previous two layers.  Layers are read back through
+mmap, and the path to a solution is rebuilt by going back through them one
+layer at a time.
+"""
+from puzzle_tools import (_start_stats, _phases, _pruner, _path_from_states,
+                          _budgeted)
+import heapq
+import mmap
+import os
+import tempfile
+
+
+@_budgeted
+def external_breadth_first_solve(puzzle, directory=None, buffer_states=1 << 20,
+                                 stats=None, prune=None, fail_fast=True,
+                                 budget=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing a
+    solution, as breadth_first_solve does, keeping the states of the search
+    in a temporary directory inside directory.  Return None if this is not
+    possible.
+
+    At most buffer_states new states are held in memory at once.  puzzle
+    must implement state_bytes and from_state_bytes.  stats, prune and
+    fail_fast and budget are as for breadth_first_solve, except that
+    stats.peak_visited counts the states stored on disk.
+
+    @type puzzle: Puzzle
+    @type directory: str | None
+        defaults to the system's temporary directory
+    @type buffer_states: int
+    @type stats: SearchStats | None
+    @type prune: list[(Puzzle) -> bool] | None
+    @type fail_fast: bool
+    @type budget: Budget | None
+    @rtype: PuzzleNode | BudgetExhausted | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> x = WordLadderPuzzle('cost','cave',{'cast'})
+    >>> print(external_breadth_first_solve(x))
+    None
+    >>> x = WordLadderPuzzle('cost','cave',{'cast','case','cave'})
+    >>> print(external_breadth_first_solve(x, buffer_states=2))
+    cost -> cave
+    <BLANKLINE>
+    cast -> cave
+    <BLANKLINE>
+    case -> cave
+    <BLANKLINE>
+    cave -> cave
+    <BLANKLINE>
+    <BLANKLINE>
+    """
+    stats = _start_stats(stats)
+    extensions, is_solved, _ = _phases(stats)
+    state_bytes = stats.timer("state_key", _state_bytes)
+    pruner = _pruner(puzzle, prune, fail_fast, stats)
+    if pruner is not None and pruner.rejects_root(puzzle):
+        return stats.finish(None)
+    root = state_bytes(puzzle)
+    width, reversible = len(root), puzzle.is_reversible()
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        layers = [os.path.join(tmp, "layer0")]
+        size = stored = _write(layers[0], [root])
+        while size:
+            runs, buffer = [], []
+            with _Layer(layers[-1], width) as layer:
+                for data in layer:
+                    current = puzzle.from_state_bytes(data)
+                    if is_solved(current):
+                        return stats.finish(_path_from_states(
+                            _trace_back(puzzle, current, layers[:-1], width,
+                                        reversible)))
+                    # pruned states stay in their layer, so they are
+                    # never generated again, only never extended
+                    if (pruner is not None and len(layers) > 1 and
+                            pruner.check(current)):
+                        continue
+                    for extension in extensions(current, None):
+                        stats.nodes_generated += 1
+                        buffer.append(state_bytes(extension))
+                        if len(buffer) >= buffer_states:
+                            runs.append(_write_run(tmp, len(runs), buffer))
+                            buffer = []
+                    stats.expanded(current, size, stored)
+            if buffer:
+                runs.append(_write_run(tmp, len(runs), buffer))
+            generated = stats.nodes_generated
+            layers.append(os.path.join(tmp, "layer{}".format(len(layers))))
+            earlier = layers[-3:-1] if reversible else layers[:-1]
+            size = _merge_layer(layers[-1], runs, earlier, width)
+            for run in runs:
+                os.remove(run)
+            stored += size
+            stats.duplicates_rejected = generated - (stored - 1)
+    return stats.finish(None)
+
+
+def _state_bytes(puzzle):
+    """
+    Return puzzle.state_bytes().
+
+    @type puzzle: Puzzle
+    @rtype: bytes
+    """
+    return puzzle.state_bytes()
+
+
+class _Layer:
+    """
+    A sorted file of fixed-width state encodings, read through mmap.
+    """
+
+    def __init__(self, path, width):
+        """
+        Open the layer at path, whose encodings are width bytes long, as
+        _Layer self.
+
+        @type self: _Layer
+        @type path: str
+        @type width: int
+        @rtype: None
+        """
+        self._file = open(path, "rb")
+        self._width = width
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap cannot map an empty file
+        self._map = (mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                     if size else b"")
+        self._len = size // width
+
+    def __enter__(self):
+        """
+        Return _Layer self.
+
+        @type self: _Layer
+        @rtype: _Layer
+        """
+        return self
+
+    def __exit__(self, *exc_info):
+        """
+        Close _Layer self.
+
+        @type self: _Layer
+        @rtype: None
+        """
+        self.close()
+
+    def close(self):
+        """
+        Close the file and mapping of _Layer self.
+
+        @type self: _Layer
+        @rtype: None
+        """
+        if self._map:
+            self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        """
+        Return the number of encodings in _Layer self.
+
+        @type self: _Layer
+        @rtype: int
+        """
+        return self._len
+
+    def __iter__(self):
+        """
+        Yield the encodings of _Layer self in sorted order.
+
+        @type self: _Layer
+        @rtype: Iterator[bytes]
+        """
+        data, width = self._map, self._width
+        for start in range(0, self._len * width, width):
+            yield data[start:start + width]
+
+    def __contains__(self, encoding):
+        """
+        Return whether encoding is in _Layer self, by binary search.
+
+        @type self: _Layer
+        @type encoding: bytes
+        @rtype: bool
+        """
+        data, width = self._map, self._width
+        low, high = 0, self._len
+        while low < high:
+            middle = (low + high) // 2
+            if data[middle * width:(middle + 1) * width] < encoding:
+                low = middle + 1
+            else:
+                high = middle
+        return (low < self._len and
+                data[low * width:(low + 1) * width] == encoding)
+
+
+def _write(path, encodings):
+    """
+    Write encodings to a new file at path, and return how many there were.
+
+    @type path: str
+    @type encodings: Iterable[bytes]
+    @rtype: int
+    """
+    count = 0
+    with open(path, "wb") as stream:
+        for encoding in encodings:
+            stream.write(encoding)
+            count += 1
+    return count
+
+
+def _write_run(directory, number, buffer):
+    """
+    Write the distinct encodings of buffer, sorted, to a new run file in
+    directory, and return its path.
+
+    @type directory: str
+    @type number: int
+    @type buffer: list[bytes]
+    @rtype: str
+    """
+    path = os.path.join(directory, "run{}".format(number))
+    _write(path, sorted(set(buffer)))
+    return path
+
+
+def _merge_layer(path, runs, earlier, width):
+    """
+    Merge the sorted runs into a new layer at path, leaving out duplicates
+    and the encodings in the earlier layers, and return the size of the new
+    layer.
+
+    @type path: str
+    @type runs: list[str]
+    @type earlier: list[str]
+    @type width: int
+    @rtype: int
+    """
+    readers = [_Layer(run, width) for run in runs + earlier]
+    try:
+        merged = _distinct(heapq.merge(*readers[:len(runs)]))
+        for layer in readers[len(runs):]:
+            merged = _difference(merged, layer)
+        return _write(path, merged)
+    finally:
+        for reader in readers:
+            reader.close()
+
+
+def _distinct(encodings):
+    """
+    Yield the sorted encodings, leaving out repeats.
+
+    @type encodings: Iterator[bytes]
+    @rtype: Iterator[bytes]
+
+    >>> list(_distinct(iter([b"a", b"a", b"b"])))
+    [b'a', b'b']
+    """
+    previous = None
+    for encoding in encodings:
+        if encoding != previous:
+            yield encoding
+            previous = encoding
+
+
+def _difference(encodings, layer):
+    """
+    Yield the sorted encodings that are not in the sorted layer.
+
+    @type encodings: Iterator[bytes]
+    @type layer: Iterable[bytes]
+    @rtype: Iterator[bytes]
+
+    >>> list(_difference(iter([b"a", b"b", b"d"]), [b"b", b"c"]))
+    [b'a', b'd']
+    """
+    others = iter(layer)
+    other = next(others, None)
+    for encoding in encodings:
+        while other is not None and other < encoding:
+            other = next(others, None)
+        if encoding != other:
+            yield encoding
+
+
+def _trace_back(puzzle, current, layers, width, reversible):
+    """
+    Return the puzzles on a path from puzzle to current, which is in the
+    layer after the last of layers, going back one layer at a time.
+
+    The predecessor of a reversible puzzle is usually one of its own
+    extensions, so those are looked up in the layer first; otherwise the
+    layer is scanned for a puzzle with current as an extension.
+
+    @type puzzle: Puzzle
+    @type current: Puzzle
+    @type layers: list[str]
+    @type width: int
+    @type reversible: bool
+    @rtype: list[Puzzle]
+    """
+    path = [current]
+    for layer_path in reversed(layers):
+        target = current.state_bytes()
+        with _Layer(layer_path, width) as layer:
+            previous = None
+            if reversible:
+                for extension in current.iter_extensions():
+                    if extension.state_bytes() in layer:
+                        previous = extension
+                        break
+            if previous is None:
+                for data in layer:
+                    candidate = puzzle.from_state_bytes(data)
+                    if any([extension.state_bytes() == target
+                            for extension in candidate.iter_extensions()]):
+                        previous = candidate
+                        break
+        current = previous
+        path.append(current)
+    path.reverse()
+    return path
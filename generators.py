@@ -0,0 +1,438 @@
+"""
+Seeded generators of puzzles of controlled difficulty, for benchmarks and
+scaling studies.
+
+Each generator is an endless iterator of puzzles that depends only on its
+arguments, so the same seed always gives the same instances; take as many
+as needed with itertools.islice.
+"""
+from sudoku_puzzle import SudokuPuzzle
+from mn_puzzle import MNPuzzle, _neighbours
+from word_ladder_puzzle import WordLadderPuzzle
+from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+from puzzle_tools import ida_star_solve, iter_path
+from functools import lru_cache
+from math import factorial
+from random import Random
+
+# symbols of generated sudokus, by size
+SUDOKU_SYMBOLS = {4: "1234", 9: "123456789", 16: "123456789ABCDEFG"}
+
+# most states an n x m sliding puzzle may have for mn_scrambles to draw
+# puzzles from the layer at depth of a breadth-first search from the goal;
+# larger puzzles are scrambled by random walks
+MAX_LAYER_STATES = 400000
+
+# most walks mn_scrambles tries of each kind before moving on
+MAX_SCRAMBLE_ROUNDS = 50
+
+
+def mn_scrambles(n, m, depth, seed=0):
+    """
+    Yield n x m MNPuzzles whose shortest solutions are exactly depth moves
+    long, working towards the grid "1", "2", ... with "*" last.
+
+    Puzzles with at most MAX_LAYER_STATES states are drawn evenly from the
+    layer at depth of a breadth-first search from the goal.  Larger ones
+    are random walks from the goal whose every move raises
+    MNPuzzle.heuristic by one, so that the heuristic, a lower bound, meets
+    the length of the walk, an upper bound, and the depth is exact without
+    a search.  These favour boards the heuristic measures well, and a walk
+    that finds no such move starts again.
+
+    After MAX_SCRAMBLE_ROUNDS such walks fail, as they do for depths near
+    or beyond what the heuristic can see, the walk is free instead, and
+    the board reached is measured with ida_star_solve and walked on by as
+    many moves as it falls short of depth; a move changes the distance by
+    one, so the walk never overshoots.  This is exact but slow: on a 4 x 4
+    board, heuristic walks give over a thousand puzzles a second at depth
+    20 and over a hundred at depth 35, while measured walks give about one
+    a second at depth 35.
+
+    @type n: int
+    @type m: int
+    @type depth: int
+    @type seed: int
+    @rtype: Iterator[MNPuzzle]
+
+    >>> from itertools import islice
+    >>> from puzzle_tools import breadth_first_solve, iter_path
+    >>> for x in islice(mn_scrambles(2, 3, 7, seed=1), 3):
+    ...     print(len(list(iter_path(breadth_first_solve(x)))) - 1)
+    7
+    7
+    7
+    >>> x = next(mn_scrambles(3, 4, 10, seed=1))
+    >>> len(list(iter_path(ida_star_solve(x)))) - 1
+    10
+    >>> next(mn_scrambles(2, 2, 7))
+    Traceback (most recent call last):
+    ...
+    ValueError: no 2x2 puzzle is 7 moves from the goal
+    """
+    rng = Random(seed)
+    goal = tuple([str(i) for i in range(1, n * m)]) + ("*",)
+    to_grid = _rows(goal, m)
+    if factorial(n * m) // 2 <= MAX_LAYER_STATES:
+        layer = _mn_layer(n, m, depth)
+        if not layer:
+            raise ValueError("no {}x{} puzzle is {} moves from the "
+                             "goal".format(n, m, depth))
+        while True:
+            yield MNPuzzle(_rows(rng.choice(layer), m), to_grid)
+    neighbours = _neighbours(n, m)
+    while True:
+        yield _scramble(goal, to_grid, depth, neighbours, rng)
+
+
+def _scramble(goal, to_grid, depth, neighbours, rng):
+    """
+    Return an MNPuzzle working towards to_grid whose shortest solution is
+    depth moves long, made by a random walk from the cells of goal, as
+    described in mn_scrambles.  Raise ValueError if MAX_SCRAMBLE_ROUNDS
+    walks of each kind do not get there.
+
+    @type goal: tuple[str]
+    @type to_grid: tuple[tuple[str]]
+    @type depth: int
+    @type neighbours: tuple[tuple[int]]
+    @type rng: Random
+    @rtype: MNPuzzle
+    """
+    for _ in range(MAX_SCRAMBLE_ROUNDS):
+        puzzle = MNPuzzle(to_grid, to_grid)
+        for step in range(1, depth + 1):
+            options = [extension for extension in puzzle.extensions()
+                       if extension.heuristic() == step]
+            if not options:
+                break
+            puzzle = rng.choice(options)
+        else:
+            return puzzle
+    cells, blank, previous, steps = list(goal), len(goal) - 1, -1, depth
+    for _ in range(MAX_SCRAMBLE_ROUNDS):
+        for _ in range(steps):
+            options = [i for i in neighbours[blank] if i != previous]
+            i = rng.choice(options or neighbours[blank])
+            cells[blank], cells[i] = cells[i], "*"
+            previous, blank = blank, i
+        puzzle = MNPuzzle(_rows(cells, len(to_grid[0])), to_grid)
+        distance = len(list(iter_path(ida_star_solve(puzzle)))) - 1
+        if distance == depth:
+            return puzzle
+        steps = depth - distance
+    raise ValueError("could not generate a {}x{} puzzle {} moves from the "
+                     "goal in {} rounds".format(len(to_grid), len(to_grid[0]),
+                                                depth, MAX_SCRAMBLE_ROUNDS))
+
+
+@lru_cache(maxsize=None)
+def _mn_layer(n, m, depth):
+    """
+    Return the cells of every n x m board exactly depth moves from the
+    goal, found by breadth-first search, or an empty list if there are
+    none.
+
+    @type n: int
+    @type m: int
+    @type depth: int
+    @rtype: list[tuple[str]]
+    """
+    goal = tuple([str(i) for i in range(1, n * m)]) + ("*",)
+    neighbours = _neighbours(n, m)
+    seen, layer = {goal}, [goal]
+    for _ in range(depth):
+        next_layer = []
+        for cells in layer:
+            blank = cells.index("*")
+            for i in neighbours[blank]:
+                moved = list(cells)
+                moved[blank], moved[i] = cells[i], "*"
+                moved = tuple(moved)
+                if moved not in seen:
+                    seen.add(moved)
+                    next_layer.append(moved)
+        layer = next_layer
+    return sorted(layer)
+
+
+def _rows(cells, m):
+    """
+    Return cells as a tuple of rows of length m.
+
+    @type cells: Sequence[str]
+    @type m: int
+    @rtype: tuple[tuple[str]]
+
+    >>> _rows(("1", "2", "3", "*"), 2)
+    (('1', '2'), ('3', '*'))
+    """
+    return tuple([tuple(cells[i:i + m]) for i in range(0, len(cells), m)])
+
+
+def sudokus(n, clues, seed=0):
+    """
+    Yield n x n SudokuPuzzles, for n in SUDOKU_SYMBOLS, with exactly clues
+    symbols filled in and a unique solution.
+
+    Each is a random relabelling and reordering of a full grid, from which
+    symbols are removed in random order as long as the solution stays
+    unique.  Grids that get stuck with too many clues are discarded, so
+    very few clues make this slow.
+
+    @type n: int
+    @type clues: int
+    @type seed: int
+    @rtype: Iterator[SudokuPuzzle]
+
+    >>> from itertools import islice
+    >>> from puzzle_tools import count_solutions
+    >>> for x in islice(sudokus(4, 5, seed=2), 3):
+    ...     print(count_solutions(x), 16 - x.heuristic())
+    1 5
+    1 5
+    1 5
+    """
+    if n not in SUDOKU_SYMBOLS:
+        raise ValueError("sudokus are generated for n in {}".format(
+            sorted(SUDOKU_SYMBOLS)))
+    rng = Random(seed)
+    symbols = SUDOKU_SYMBOLS[n]
+    while True:
+        grid = _full_grid(n, rng)
+        order = list(range(n * n))
+        rng.shuffle(order)
+        filled = n * n
+        for i in order:
+            if filled == clues:
+                break
+            value, grid[i] = grid[i], 0
+            if _count_sudoku(grid, n, 2) == 1:
+                filled -= 1
+            else:
+                grid[i] = value
+        if filled == clues:
+            yield SudokuPuzzle(n, [symbols[v - 1] if v else "*"
+                                   for v in grid], set(symbols))
+
+
+def _full_grid(n, rng):
+    """
+    Return a random full n x n sudoku grid, as a list of values from 1 to n
+    row by row.
+
+    @type n: int
+    @type rng: Random
+    @rtype: list[int]
+
+    >>> grid = _full_grid(4, Random(0))
+    >>> _count_sudoku(grid, 4, 2), sorted(grid[:4])
+    (1, [1, 2, 3, 4])
+    """
+    side = round(n ** 0.5)
+    bands = rng.sample(range(side), side)
+    rows = [band * side + row for band in bands
+            for row in rng.sample(range(side), side)]
+    stacks = rng.sample(range(side), side)
+    columns = [stack * side + column for stack in stacks
+               for column in rng.sample(range(side), side)]
+    labels = rng.sample(range(1, n + 1), n)
+    transpose = rng.random() < 0.5
+    grid = []
+    for r in rows:
+        for c in columns:
+            if transpose:
+                r, c = c, r
+            # a valid base pattern: shift each row by its band and row
+            grid.append(labels[(side * (r % side) + r // side + c) % n])
+            if transpose:
+                r, c = c, r
+    return grid
+
+
+def _count_sudoku(grid, n, limit):
+    """
+    Return the number of ways to complete the n x n sudoku grid, a list of
+    values from 1 to n with 0 for empty cells, counting no further than
+    limit.
+
+    @type grid: list[int]
+    @type n: int
+    @type limit: int
+    @rtype: int
+
+    >>> _count_sudoku([1, 2, 3, 4, 3, 4, 1, 2, 2, 1, 4, 3, 0, 0, 0, 0], 4, 2)
+    1
+    >>> _count_sudoku([0] * 16, 4, 10)
+    10
+    """
+    side = round(n ** 0.5)
+    rows, columns, boxes = [0] * n, [0] * n, [0] * n
+    empty = []
+    for i, value in enumerate(grid):
+        r, c = divmod(i, n)
+        b = (r // side) * side + c // side
+        if value:
+            bit = 1 << value
+            if (rows[r] | columns[c] | boxes[b]) & bit:
+                return 0
+            rows[r] |= bit
+            columns[c] |= bit
+            boxes[b] |= bit
+        else:
+            empty.append((r, c, b))
+    full = (1 << (n + 1)) - 2
+    return _count_from(empty, rows, columns, boxes, full, limit)
+
+
+def _count_from(empty, rows, columns, boxes, full, limit):
+    """
+    Return the number of ways, up to limit, to fill the cells in empty,
+    given the values already used in each row, column and box as bit sets,
+    filling the most constrained cell first.
+
+    @type empty: list[(int, int, int)]
+    @type rows: list[int]
+    @type columns: list[int]
+    @type boxes: list[int]
+    @type full: int
+    @type limit: int
+    @rtype: int
+    """
+    if not empty:
+        return 1
+    best, best_free, best_count = 0, 0, None
+    for k, (r, c, b) in enumerate(empty):
+        free = full & ~(rows[r] | columns[c] | boxes[b])
+        count = bin(free).count("1")
+        if best_count is None or count < best_count:
+            best, best_free, best_count = k, free, count
+            if count <= 1:
+                break
+    if not best_free:
+        return 0
+    r, c, b = empty[best]
+    rest = empty[:best] + empty[best + 1:]
+    total = 0
+    while best_free and total < limit:
+        bit = best_free & -best_free
+        best_free ^= bit
+        rows[r] |= bit
+        columns[c] |= bit
+        boxes[b] |= bit
+        total += _count_from(rest, rows, columns, boxes, full, limit - total)
+        rows[r] ^= bit
+        columns[c] ^= bit
+        boxes[b] ^= bit
+    return total
+
+
+def peg_boards(n, m, density, seed=0):
+    """
+    Yield n x m GridPegSolitairePuzzles with round(density * n * m) pegs,
+    placed at random, and at least one empty hole.
+
+    @type n: int
+    @type m: int
+    @type density: float
+    @type seed: int
+    @rtype: Iterator[GridPegSolitairePuzzle]
+
+    >>> print(next(peg_boards(2, 3, 0.5, seed=4)))
+    ***
+    ...
+    """
+    rng = Random(seed)
+    cells = n * m
+    pegs = min(max(round(density * cells), 0), cells - 1)
+    while True:
+        board = ["."] * cells
+        for i in rng.sample(range(cells), pegs):
+            board[i] = "*"
+        yield GridPegSolitairePuzzle(
+            [board[i:i + m] for i in range(0, cells, m)], {"*", ".", "#"})
+
+
+def word_ladders(words, distance, seed=0, length=None):
+    """
+    Yield WordLadderPuzzles over words whose shortest ladders are exactly
+    distance steps long, between words of the given length, or of any
+    length if it is None.
+
+    Only words of lowercase letters are used, since those are the letters
+    WordLadderPuzzle changes.  The graph of words one letter apart is
+    built once, when the first puzzle is made.
+
+    @type words: set[str]
+    @type distance: int
+    @type seed: int
+    @type length: int | None
+    @rtype: Iterator[WordLadderPuzzle]
+
+    >>> words = {"cost", "cast", "case", "cave", "save"}
+    >>> print(next(word_ladders(words, 3)))
+    cost -> cave
+    """
+    rng = Random(seed)
+    usable = sorted([word for word in words
+                     if word.isalpha() and word.islower() and
+                     (length is None or len(word) == length)])
+    graph = _word_graph(usable)
+    # starts with no word at distance, never tried again
+    barren = set()
+    while len(barren) < len(usable):
+        start = rng.choice(usable)
+        if start in barren:
+            continue
+        layer = _word_layer(graph, start, distance)
+        if not layer:
+            barren.add(start)
+            continue
+        yield WordLadderPuzzle(start, rng.choice(layer), words)
+    raise ValueError("no words are {} steps apart".format(distance))
+
+
+def _word_graph(words):
+    """
+    Return a dict mapping each of words to the words one letter different
+    from it.
+
+    @type words: list[str]
+    @rtype: dict[str, list[str]]
+
+    >>> _word_graph(["cost", "cast", "case"])["cast"]
+    ['cost', 'case']
+    """
+    buckets = {}
+    for word in words:
+        for i in range(len(word)):
+            buckets.setdefault(word[:i] + "_" + word[i + 1:], []).append(word)
+    graph = {word: [] for word in words}
+    for bucket in buckets.values():
+        for word in bucket:
+            graph[word].extend([other for other in bucket if other != word])
+    return graph
+
+
+def _word_layer(graph, start, distance):
+    """
+    Return the words exactly distance steps from start in graph, in sorted
+    order.
+
+    @type graph: dict[str, list[str]]
+    @type start: str
+    @type distance: int
+    @rtype: list[str]
+    """
+    seen, layer = {start}, [start]
+    for _ in range(distance):
+        next_layer = []
+        for word in layer:
+            for other in graph[word]:
+                if other not in seen:
+                    seen.add(other)
+                    next_layer.append(other)
+        layer = next_layer
+        if not layer:
+            break
+    return sorted(layer)
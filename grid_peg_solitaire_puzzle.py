@@ -1,5 +1,5 @@
 from puzzle import Puzzle
-from copy import deepcopy
+from functools import lru_cache
 
 
 class GridPegSolitairePuzzle(Puzzle):
@@ -24,6 +24,9 @@ class GridPegSolitairePuzzle(Puzzle):
         assert all([all(x in marker_set for x in row) for row in marker])
         assert all([x == "*" or x == "." or x == "#" for x in marker_set])
         self._marker, self._marker_set = marker, marker_set
+        # whether no other puzzle or caller shares the rows of _marker, so
+        # that apply and undo may change them in place
+        self._owned = False
 
     # implement __eq__, __str__ methods
     # __repr__ is up to you
@@ -52,6 +55,77 @@ class GridPegSolitairePuzzle(Puzzle):
                 (self._marker_set == other._marker_set) and
                 (type(self) == type(other)))
 
+    def state_key(self):
+        """
+        Return a compact, hashable key for the board of
+        GridPegSolitairePuzzle self.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: tuple[str]
+
+        >>> grid = [["*", "*", "*"], ["*", ".", "*"]]
+        >>> GridPegSolitairePuzzle(grid, {"*", ".", "#"}).state_key()
+        ('***', '*.*')
+        """
+        return tuple(["".join(row) for row in self._marker])
+
+    def from_state_key(self, key):
+        """
+        Return a GridPegSolitairePuzzle with the markers of
+        GridPegSolitairePuzzle self, on the board key.
+
+        @type self: GridPegSolitairePuzzle
+        @type key: tuple[str]
+        @rtype: GridPegSolitairePuzzle
+
+        >>> grid = [["*", "*", "*"], ["*", ".", "*"]]
+        >>> g = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+        >>> g.from_state_key(g.state_key()) == g
+        True
+        """
+        return GridPegSolitairePuzzle([list(row) for row in key],
+                                      self._marker_set)
+
+    def state_bytes(self):
+        """
+        Return the board of GridPegSolitairePuzzle self as one byte per
+        cell, row after row.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: bytes
+
+        >>> grid = [["*", "*", "*"], ["*", ".", "*"]]
+        >>> g = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+        >>> g.state_bytes()
+        b'****.*'
+        >>> g.from_state_bytes(g.state_bytes()) == g
+        True
+        """
+        return "".join(self.state_key()).encode("ascii")
+
+    def from_state_bytes(self, data):
+        """
+        Return a GridPegSolitairePuzzle with the markers of
+        GridPegSolitairePuzzle self, on the board encoded by data.
+
+        @type self: GridPegSolitairePuzzle
+        @type data: bytes
+        @rtype: GridPegSolitairePuzzle
+        """
+        width, text = len(self._marker[0]), data.decode("ascii")
+        return GridPegSolitairePuzzle(
+            [list(text[i:i + width]) for i in range(0, len(text), width)],
+            self._marker_set)
+
+    def __hash__(self):
+        """
+        Return a hash of GridPegSolitairePuzzle self.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: int
+        """
+        return hash(self.state_key())
+
     def __str__(self):
         """
         Return a human-readable string representation of GridPegSolitairePuzzle
@@ -95,85 +169,232 @@ class GridPegSolitairePuzzle(Puzzle):
         ["*", "*", "*", "*", "*"]]
         >>> x = GridPegSolitairePuzzle(grid,{'*','#','.'})
         >>> a = x.extensions()
-        >>> y = []
-        *.***
+        >>> len(a)
+        5
+        >>> print(a[0])
+        **..*
         *****
         *****
-        ***..
+        **.**
         *****
 
         """
-        dct = {}
-        for i in range(len(self._marker[0])):
-            for j in range(len(self._marker)):
-                dct[(i, j)] = self._marker[j][i]
-        if str(self).count("*") == 1 or str(self).count(".") == 0:
-            # checking for '*' and if the next character is '.'
-            return [_ for _ in []]
-        else:
-            extensions = []
-            index_i = 0
-            index_j = 0
-            for character in self._marker:
-                index_j += 1
-                if "." in character:
-                    index_j -= 1
-                    index_i += character.index(".")
-                    break
-            row = deepcopy(self._marker[index_j])
-            col = deepcopy(self._marker[index_i])
-            size1 = len([x for x in row if x != "#"])
-            size2 = len([x for x in col if x != "#"])
-
-            for item in dct:
-                if (item[0] < (size1 - 2) and
-                    dct[item] == "." and
-                    dct[item[0] + 1, item[1]] == "*" and
-                        dct[item[0] + 2, item[1]] == "*"):
-                    lst_copy = deepcopy(self._marker)
-                    lst_copy[item[1]][item[0]] = "*"
-                    lst_copy[item[1]][item[0] + 1] = "."
-                    lst_copy[item[1]][item[0] + 2] = "."
-                    solution = GridPegSolitairePuzzle(lst_copy, {"*", ".", "#"})
-                    if not (solution in extensions):
-                        extensions.append(solution)
-
-                if (item[0] > 1 and
-                    dct[item] == "." and
-                    dct[item[0] - 1, item[1]] == "*" and
-                        dct[item[0] - 2, item[1]] == "*"):
-                    lst_copy = deepcopy(self._marker)
-                    lst_copy[item[1]][item[0]] = "*"
-                    lst_copy[item[1]][item[0] - 1] = "."
-                    lst_copy[item[1]][item[0] - 2] = "."
-                    solution = GridPegSolitairePuzzle(lst_copy, {"*", ".", "#"})
-                    if not (solution in extensions):
-                        extensions.append(solution)
-
-                if (item[1] < (size2 - 2) and
-                    dct[item] == "." and
-                    dct[item[0], item[1] + 1] == "*" and
-                        dct[item[0], item[1] + 2] == "*"):
-                    lst_copy = deepcopy(self._marker)
-                    lst_copy[item[1]][item[0]] = "*"
-                    lst_copy[item[1] + 1][item[0]] = "."
-                    lst_copy[item[1] + 2][item[0]] = "."
-                    solution = GridPegSolitairePuzzle(lst_copy, {"*", ".", "#"})
-                    if not (solution in extensions):
-                        extensions.append(solution)
-
-                if (item[1] > 1 and
-                    dct[item] == "." and
-                    dct[item[0], item[1] - 1] == "*" and
-                        dct[item[0], item[1] - 2] == "*"):
-                    lst_copy = deepcopy(self._marker)
-                    lst_copy[item[1]][item[0]] = "*"
-                    lst_copy[item[1] - 1][item[0]] = "."
-                    lst_copy[item[1] - 2][item[0]] = "."
-                    solution = GridPegSolitairePuzzle(lst_copy, {"*", ".", "#"})
-                    if not (solution in extensions):
-                        extensions.append(solution)
-            return extensions
+        return list(self.iter_extensions())
+
+    def iter_extensions(self, seen=None):
+        """
+        Yield the extensions of GridPegSolitairePuzzle self, skipping those
+        whose state_key is in seen.
+
+        Empty positions are visited row by row, and each is filled by a
+        jump from the right, left, below and above, in that order.
+        Extensions share the rows that a jump leaves unchanged with self.
+
+        @type self: GridPegSolitairePuzzle
+        @type seen: Container | None
+        @rtype: Iterator[GridPegSolitairePuzzle]
+
+        >>> grid = [["*", "*", "."], ["#", "#", "*"], ["#", "#", "*"]]
+        >>> x = GridPegSolitairePuzzle(grid, {'*','#','.'})
+        >>> for a in x.iter_extensions({("..*", "##*", "##*")}): print(a)
+        ***
+        ##.
+        ##.
+        """
+        marker = self._marker
+        # extensions share rows with self, which apply must now copy
+        self._owned = False
+        rows, columns = len(marker), len(marker[0])
+        for r in range(rows):
+            for c in range(columns):
+                if marker[r][c] != ".":
+                    continue
+                for dr, dc in ((0, 1), (0, -1), (1, 0), (-1, 0)):
+                    # the peg at (r2, c2) jumps over (r1, c1) into (r, c)
+                    r1, c1, r2, c2 = r + dr, c + dc, r + 2 * dr, c + 2 * dc
+                    if (0 <= r2 < rows and 0 <= c2 < columns and
+                            marker[r1][c1] == "*" and marker[r2][c2] == "*"):
+                        board = marker[:]
+                        for changed in {r, r1, r2}:
+                            board[changed] = marker[changed][:]
+                        board[r][c] = "*"
+                        board[r1][c1] = board[r2][c2] = "."
+                        if (seen is None or
+                                tuple(["".join(row) for row in board])
+                                not in seen):
+                            yield GridPegSolitairePuzzle(board,
+                                                         self._marker_set)
+
+    def moves(self):
+        """
+        Return the jumps of GridPegSolitairePuzzle self, in the order of
+        iter_extensions, as (r, c, r1, c1, r2, c2): the peg at (r2, c2)
+        jumps over (r1, c1) into (r, c).
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: list[(int, int, int, int, int, int)]
+
+        >>> grid = [["*", "*", "."], ["#", "#", "*"], ["#", "#", "*"]]
+        >>> x = GridPegSolitairePuzzle(grid, {'*','#','.'})
+        >>> x.moves()
+        [(0, 2, 0, 1, 0, 0), (0, 2, 1, 2, 2, 2)]
+        >>> x.apply((0, 2, 0, 1, 0, 0))
+        >>> print(x)
+        ..*
+        ##*
+        ##*
+        >>> x.undo((0, 2, 0, 1, 0, 0))
+        >>> print(x)
+        **.
+        ##*
+        ##*
+        """
+        marker = self._marker
+        return [move for move in _jumps(len(marker), len(marker[0]))
+                if marker[move[0]][move[1]] == "." and
+                marker[move[2]][move[3]] == "*" and
+                marker[move[4]][move[5]] == "*"]
+
+    def apply(self, move):
+        """
+        Make the jump move on GridPegSolitairePuzzle self, in place once
+        self has rows of its own: the first apply or undo after self was
+        made or extended copies its rows, which copy does up front.
+
+        @type self: GridPegSolitairePuzzle
+        @type move: (int, int, int, int, int, int)
+        @rtype: None
+
+        >>> grid = [["*", "*", "."], [".", "*", "*"]]
+        >>> x = GridPegSolitairePuzzle(grid, {'*','#','.'})
+        >>> a, b = x.extensions()
+        >>> a.apply(a.moves()[0])
+        >>> print(a)
+        ..*
+        *..
+        >>> print(x)
+        **.
+        .**
+        >>> print(b)
+        **.
+        *..
+        """
+        r, c, r1, c1, r2, c2 = move
+        if not self._owned:
+            self._own()
+        marker = self._marker
+        marker[r][c] = "*"
+        marker[r1][c1] = marker[r2][c2] = "."
+
+    def undo(self, move):
+        """
+        Take back the jump move on GridPegSolitairePuzzle self, in place
+        once self has rows of its own, as apply does.
+
+        @type self: GridPegSolitairePuzzle
+        @type move: (int, int, int, int, int, int)
+        @rtype: None
+        """
+        r, c, r1, c1, r2, c2 = move
+        if not self._owned:
+            self._own()
+        marker = self._marker
+        marker[r][c] = "."
+        marker[r1][c1] = marker[r2][c2] = "*"
+
+    def _own(self):
+        """
+        Give GridPegSolitairePuzzle self a copy of every row, shared with
+        no other puzzle.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: None
+        """
+        self._marker = [row[:] for row in self._marker]
+        self._owned = True
+
+    def copy(self):
+        """
+        Return a GridPegSolitairePuzzle with a copy of every row of
+        GridPegSolitairePuzzle self, since extensions share rows.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: GridPegSolitairePuzzle
+        """
+        puzzle = GridPegSolitairePuzzle([row[:] for row in self._marker],
+                                        self._marker_set)
+        puzzle._owned = True
+        return puzzle
+
+    def is_acyclic(self):
+        """
+        Return True, since every extension removes a peg.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: bool
+        """
+        return True
+
+    def heuristic(self):
+        """
+        Return the number of jumps still needed to leave a single peg on
+        GridPegSolitairePuzzle self.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: int
+
+        >>> grid = [["*", "*", "*"], ["*", ".", "*"]]
+        >>> GridPegSolitairePuzzle(grid, {"*", ".", "#"}).heuristic()
+        4
+        """
+        return max(sum([row.count("*") for row in self._marker]) - 1, 0)
+
+    # override fail_fast
+    # Colour position (r, c) by (r + c) % 3, and separately by (r - c) % 3.
+    # The three positions involved in a jump have different colours, and
+    # the jump takes one peg off two colours and adds one to the third, so
+    # it flips whether each colour has an odd number of pegs.  A single peg
+    # has exactly one odd colour, so the remaining jumps must lead there.
+
+    def fail_fast(self):
+        """
+        Return True iff GridPegSolitairePuzzle self can never be reduced to
+        a single peg.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: bool
+
+        >>> grid = [["*", "*", "*", "*", "*"], ["*", "*", "*", "*", "*"],\
+        ["*", "*", "*", "*", "*"], ["*", "*", ".", "*", "*"],\
+        ["*", "*", "*", "*", "*"]]
+        >>> GridPegSolitairePuzzle(grid, {"*", ".", "#"}).fail_fast()
+        False
+        >>> grid = [["*", "*", ".", "*", "*"]]
+        >>> GridPegSolitairePuzzle(grid, {"*", ".", "#"}).fail_fast()
+        True
+        """
+        pegs = [(r, c) for r, row in enumerate(self._marker)
+                for c, x in enumerate(row) if x == "*"]
+        if not pegs:
+            return True
+        flip = (len(pegs) - 1) % 2
+        for sign in (1, -1):
+            counts = [flip, flip, flip]
+            for r, c in pegs:
+                counts[(r + sign * c) % 3] += 1
+            if sum([count % 2 for count in counts]) != 1:
+                return True
+        return False
+
+    def is_fail_fast_invariant(self):
+        """
+        Return True, since a jump flips the parity of every colour and of
+        the number of pegs left at once, so fail_fast never changes.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: bool
+        """
+        return True
 
     # override is_solved
     # A configuration is solved when there is exactly one "*" left
@@ -202,6 +423,29 @@ class GridPegSolitairePuzzle(Puzzle):
         return False
 
 
+@lru_cache(maxsize=None)
+def _jumps(rows, columns):
+    """
+    Return every jump that fits on a board of rows by columns, as in
+    GridPegSolitairePuzzle.moves, in the order of iter_extensions.
+
+    @type rows: int
+    @type columns: int
+    @rtype: tuple[(int, int, int, int, int, int)]
+
+    >>> _jumps(1, 3)
+    ((0, 0, 0, 1, 0, 2), (0, 2, 0, 1, 0, 0))
+    """
+    result = []
+    for r in range(rows):
+        for c in range(columns):
+            for dr, dc in ((0, 1), (0, -1), (1, 0), (-1, 0)):
+                r1, c1, r2, c2 = r + dr, c + dc, r + 2 * dr, c + 2 * dc
+                if 0 <= r2 < rows and 0 <= c2 < columns:
+                    result.append((r, c, r1, c1, r2, c2))
+    return tuple(result)
+
+
 if __name__ == "__main__":
     import doctest
 
@@ -1,11 +1,244 @@
 from puzzle import Puzzle
+from bisect import bisect_left
+from functools import lru_cache
+import pattern_db
+
+
+@lru_cache(maxsize=None)
+def _goal_positions(to_grid):
+    """
+    Return a dict mapping each symbol of to_grid to its (row, column).
+
+    @type to_grid: tuple[tuple[str]]
+    @rtype: dict[str, (int, int)]
+
+    >>> _goal_positions((("1", "2"), ("3", "*")))["3"]
+    (1, 0)
+    """
+    return {symbol: (r, c) for r, row in enumerate(to_grid)
+            for c, symbol in enumerate(row)}
+
+
+@lru_cache(maxsize=None)
+def _symbol_codes(to_grid, extra=()):
+    """
+    Return the symbols of to_grid in sorted order followed by those in
+    extra, and a dict mapping each of them to its position in that order.
+
+    @type to_grid: tuple[tuple[str]]
+    @type extra: tuple[str]
+    @rtype: (tuple[str], dict[str, int])
+
+    >>> _symbol_codes((("2", "1"), ("3", "*")))[0]
+    ('*', '1', '2', '3')
+    """
+    symbols = tuple(sorted({symbol for row in to_grid for symbol in row}))
+    symbols += extra
+    if len(symbols) > 256:
+        raise ValueError("an MNPuzzle has at most 256 distinct symbols")
+    return symbols, {symbol: i for i, symbol in enumerate(symbols)}
+
+
+@lru_cache(maxsize=None)
+def _neighbours(n, m):
+    """
+    Return, for each position of an n x m grid numbered row by row, the
+    positions next to it: left, right, below and above, in that order.
+
+    @type n: int
+    @type m: int
+    @rtype: tuple[tuple[int]]
+
+    >>> _neighbours(2, 2)
+    ((1, 2), (0, 3), (3, 0), (2, 1))
+    """
+    result = []
+    for i in range(n * m):
+        row, column = divmod(i, m)
+        result.append(tuple([r * m + c for r, c in
+                             ((row, column - 1), (row, column + 1),
+                              (row + 1, column), (row - 1, column))
+                             if 0 <= r < n and 0 <= c < m]))
+    return tuple(result)
+
+
+@lru_cache(maxsize=None)
+def _distances(to_grid, symbols):
+    """
+    Return, for the code of each of symbols, a tuple of the Manhattan
+    distances from each position of to_grid to the symbol's position in
+    to_grid, all 0 for "*" and for symbols not in to_grid.
+
+    @type to_grid: tuple[tuple[str]]
+    @type symbols: tuple[str]
+    @rtype: tuple[tuple[int]]
+
+    >>> _distances((("1", "*"),), ("*", "1"))
+    ((0, 0), (0, 1))
+    """
+    goal = _goal_positions(to_grid)
+    n, m = len(to_grid), len(to_grid[0])
+    table = []
+    for symbol in symbols:
+        if symbol == "*" or symbol not in goal:
+            table.append((0,) * (n * m))
+        else:
+            gr, gc = goal[symbol]
+            table.append(tuple([abs(gr - i // m) + abs(gc - i % m)
+                                for i in range(n * m)]))
+    return tuple(table)
+
+
+@lru_cache(maxsize=None)
+def _goal_lines(to_grid, symbols):
+    """
+    Return, for the code of each of symbols, the row and the column of the
+    symbol's position in to_grid, as two tuples, with -1 for "*", for
+    symbols not in to_grid, and for every symbol if to_grid repeats a tile.
+
+    @type to_grid: tuple[tuple[str]]
+    @type symbols: tuple[str]
+    @rtype: (tuple[int], tuple[int])
+
+    >>> _goal_lines((("1", "2"), ("3", "*")), ("*", "1", "2", "3"))
+    ((-1, 0, 0, 1), (-1, 0, 1, 0))
+    """
+    goal = _goal_positions(to_grid)
+    tiles = [symbol for row in to_grid for symbol in row if symbol != "*"]
+    if len(set(tiles)) < len(tiles):
+        return (-1,) * len(symbols), (-1,) * len(symbols)
+    positions = [goal[symbol] if symbol != "*" and symbol in goal
+                 else (-1, -1) for symbol in symbols]
+    return (tuple([r for r, _ in positions]),
+            tuple([c for _, c in positions]))
+
+
+@lru_cache(maxsize=None)
+def _tables(to_grid, symbols, complete, builds):
+    """
+    Return the tables MNPuzzles working towards to_grid share: those of
+    _distances and _goal_lines, and the pattern database for to_grid if
+    complete, that is if the puzzles fill to_grid, and one has been found.
+    The database is looked for once per goal and per count builds of the
+    databases built by this process, so one built since by another
+    process is only seen by new processes.
+
+    @type to_grid: tuple[tuple[str]]
+    @type symbols: tuple[str]
+    @type complete: bool
+    @type builds: int
+    @rtype: (tuple[tuple[int]], tuple[int], tuple[int],
+             pattern_db.PatternDatabase | None)
+    """
+    return ((_distances(to_grid, symbols),) +
+            _goal_lines(to_grid, symbols) +
+            (pattern_db.find(to_grid) if complete else None,))
+
+
+@lru_cache(maxsize=None)
+def _line_conflicts(order):
+    """
+    Return the extra moves needed by the tiles of a row or column that all
+    belong in it, at the positions in order along it: two for each tile
+    that must leave the line to let the others pass, that is for each tile
+    not in a longest increasing subsequence of order.
+
+    @type order: tuple[int]
+    @rtype: int
+
+    >>> _line_conflicts((0, 1, 2)), _line_conflicts((2, 1, 0))
+    (0, 4)
+    """
+    longest = []
+    for position in order:
+        j = bisect_left(longest, position)
+        if j == len(longest):
+            longest.append(position)
+        else:
+            longest[j] = position
+    return 2 * (len(order) - len(longest))
+
+
+@lru_cache(maxsize=None)
+def _goal_index(goal):
+    """
+    Return a dict mapping each code in goal, bytes of distinct codes, to
+    its position.
+
+    @type goal: bytes
+    @rtype: dict[int, int]
+    """
+    return {code: i for i, code in enumerate(goal)}
+
+
+def _is_solvable(cells, goal, blank_code, n, m):
+    """
+    Return False iff the n x m grid encoded by cells can certainly never be
+    turned into goal by sliding tiles into the blank, whose code is
+    blank_code.
+
+    The grids must hold the same tiles.  On a single row or column the
+    tiles can never pass each other.  Otherwise every move swaps the blank
+    with a tile, changing both the parity of the permutation taking cells
+    to goal and that of the blank's Manhattan distance from its place in
+    goal, so the two must be equal; on grids of at least 2 x 2 that is
+    also enough.  With repeated tiles the parity is not fixed, so only the
+    tiles are compared.
+
+    @type cells: bytes
+    @type goal: bytes | None
+    @type blank_code: int | None
+    @type n: int
+    @type m: int
+    @rtype: bool
+
+    >>> _is_solvable(bytes([1, 2, 3, 0]), bytes([1, 2, 3, 0]), 0, 2, 2)
+    True
+    >>> _is_solvable(bytes([2, 1, 3, 0]), bytes([1, 2, 3, 0]), 0, 2, 2)
+    False
+    >>> _is_solvable(bytes([1, 2, 4, 0]), bytes([1, 2, 3, 0]), 0, 2, 2)
+    False
+    """
+    if goal is None or sorted(cells) != sorted(goal):
+        return False
+    if blank_code is None:
+        return cells == goal
+    if cells.count(blank_code) != 1:
+        return True
+    blank = bytes([blank_code])
+    if n == 1 or m == 1:
+        return cells.replace(blank, b"") == goal.replace(blank, b"")
+    if len(set(goal)) < len(goal):
+        return True
+    index = _goal_index(goal)
+    target = [index[code] for code in cells]
+    # the permutation is even iff len(cells) - (number of cycles) is even
+    parity, visited = len(cells), bytearray(len(cells))
+    for i in range(len(cells)):
+        if not visited[i]:
+            parity -= 1
+            while not visited[i]:
+                visited[i] = 1
+                i = target[i]
+    start, end = cells.index(blank_code), goal.index(blank_code)
+    distance = abs(start // m - end // m) + abs(start % m - end % m)
+    return (parity + distance) % 2 == 0
 
 
 class MNPuzzle(Puzzle):
     """
     An nxm puzzle, like the 15-puzzle, which may be solved, unsolved,
     or even unsolvable.
+
+    The grid is kept as bytes, one per cell row by row, each the code of
+    its symbol, with the position of "*" alongside, so an extension is a
+    single swap of two bytes.  The tables of codes and of the positions
+    next to each position are shared by every puzzle of the same shape and
+    goal.
     """
+    __slots__ = ("n", "m", "to_grid", "_symbols", "_cells", "_blank",
+                 "_blank_code", "_goal", "_neighbours", "_solvable",
+                 "_tables", "_estimate", "_parent_estimate", "_moved_to")
 
     def __init__(self, from_grid, to_grid):
         """
@@ -23,7 +256,81 @@ class MNPuzzle(Puzzle):
         assert all([len(r) == len(from_grid[0]) for r in from_grid])
         assert all([len(r) == len(to_grid[0]) for r in to_grid])
         self.n, self.m = len(from_grid), len(from_grid[0])
-        self.from_grid, self.to_grid = from_grid, to_grid
+        self.to_grid = tuple([tuple(row) for row in to_grid])
+        # symbols of from_grid missing from to_grid get codes of their own
+        goal_symbols = _goal_positions(self.to_grid)
+        extra = tuple(sorted({symbol for row in from_grid for symbol in row
+                              if symbol not in goal_symbols}))
+        self._symbols, codes = _symbol_codes(self.to_grid, extra)
+        self._cells = bytes([codes[symbol] for row in from_grid
+                             for symbol in row])
+        self._blank_code = codes.get("*")
+        self._blank = (-1 if self._blank_code is None else
+                       self._cells.find(self._blank_code))
+        self._goal = (bytes([codes[symbol] for row in self.to_grid
+                             for symbol in row])
+                      if len(self.to_grid) * len(self.to_grid[0]) ==
+                      len(self._cells) else None)
+        self._neighbours = _neighbours(self.n, self.m)
+        self._solvable = _is_solvable(self._cells, self._goal,
+                                      self._blank_code, self.n, self.m)
+        self._tables = _tables(self.to_grid, self._symbols,
+                               self._goal is not None, pattern_db._builds)
+        self._estimate = self._parent_estimate = None
+        self._moved_to = -1
+
+    def _with_cells(self, cells, blank, solvable=None):
+        """
+        Return an MNPuzzle like MNPuzzle self but with the grid encoded by
+        cells, whose "*" is at position blank, and which is solvable
+        exactly when self is, unless solvable says otherwise.
+
+        @type self: MNPuzzle
+        @type cells: bytes
+        @type blank: int
+        @type solvable: bool | None
+        @rtype: MNPuzzle
+        """
+        puzzle = object.__new__(type(self))
+        puzzle.n, puzzle.m, puzzle.to_grid = self.n, self.m, self.to_grid
+        puzzle._symbols, puzzle._goal = self._symbols, self._goal
+        puzzle._blank_code = self._blank_code
+        puzzle._neighbours, puzzle._tables = self._neighbours, self._tables
+        puzzle._cells, puzzle._blank = cells, blank
+        puzzle._solvable = self._solvable if solvable is None else solvable
+        puzzle._estimate = puzzle._parent_estimate = None
+        puzzle._moved_to = -1
+        return puzzle
+
+    def _find_blank(self, cells):
+        """
+        Return the position of "*" in cells, encoded like the grid of
+        MNPuzzle self, or -1 if there is none.
+
+        @type self: MNPuzzle
+        @type cells: bytes
+        @rtype: int
+        """
+        if self._blank_code is None:
+            return -1
+        return cells.find(self._blank_code)
+
+    @property
+    def from_grid(self):
+        """
+        Return the current configuration of MNPuzzle self.
+
+        @type self: MNPuzzle
+        @rtype: tuple[tuple[str]]
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> MNPuzzle(start_grid, target_grid).from_grid == start_grid
+        True
+        """
+        symbols, cells, m = self._symbols, self._cells, self.m
+        return tuple([tuple([symbols[code] for code in cells[i:i + m]])
+                      for i in range(0, len(cells), m)])
 
     # implement __eq__ and __str__
     # __repr__ is up to you
@@ -50,9 +357,101 @@ class MNPuzzle(Puzzle):
         >>> x.__eq__(y)
         False
         """
-        return ((self.to_grid == other.to_grid) and
-                (self.from_grid == other.from_grid) and
-                type(self) == type(other))
+        if type(self) != type(other) or self.to_grid != other.to_grid:
+            return False
+        if self._symbols is other._symbols:
+            return self._cells == other._cells
+        return self.from_grid == other.from_grid
+
+    def state_key(self):
+        """
+        Return a compact, hashable key for the configuration of MNPuzzle
+        self: its grid as bytes, as in state_bytes.
+
+        @type self: MNPuzzle
+        @rtype: bytes
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> list(MNPuzzle(start_grid, target_grid).state_key())
+        [0, 2, 3, 1, 4, 5]
+        """
+        return self._cells
+
+    def from_state_key(self, key):
+        """
+        Return an MNPuzzle with the grid of key, working towards the same
+        to_grid as MNPuzzle self.
+
+        @type self: MNPuzzle
+        @type key: bytes
+        @rtype: MNPuzzle
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> x = MNPuzzle(start_grid, target_grid)
+        >>> x.from_state_key(x.state_key()) == x
+        True
+        """
+        key = bytes(key)
+        return self._with_cells(key, self._find_blank(key), _is_solvable(
+            key, self._goal, self._blank_code, self.n, self.m))
+
+    def state_bytes(self):
+        """
+        Return from_grid of MNPuzzle self as one byte per cell, giving the
+        position of its symbol among the sorted symbols of to_grid.
+
+        @type self: MNPuzzle
+        @rtype: bytes
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> x = MNPuzzle(start_grid, target_grid)
+        >>> list(x.state_bytes())
+        [0, 2, 3, 1, 4, 5]
+        >>> x.from_state_bytes(x.state_bytes()) == x
+        True
+        """
+        return self._cells
+
+    def from_state_bytes(self, data):
+        """
+        Return an MNPuzzle with the from_grid encoded by data, working
+        towards the same to_grid as MNPuzzle self.
+
+        @type self: MNPuzzle
+        @type data: bytes
+        @rtype: MNPuzzle
+        """
+        return self.from_state_key(data)
+
+    def swap_neighbours(self):
+        """
+        Return the code of "*" in state_bytes of MNPuzzle self and the
+        positions next to each position, or None unless self has exactly one
+        "*" and its grid is the size of to_grid.
+
+        @type self: MNPuzzle
+        @rtype: (int, tuple[tuple[int]]) | None
+
+        >>> target_grid = (("1", "2"), ("3", "*"))
+        >>> MNPuzzle((("1", "*"), ("3", "2")), target_grid).swap_neighbours()
+        (0, ((1, 2), (0, 3), (3, 0), (2, 1)))
+        """
+        if (self._goal is None or self._blank_code is None or
+                self._cells.count(self._blank_code) != 1):
+            return None
+        return self._blank_code, self._neighbours
+
+    def __hash__(self):
+        """
+        Return a hash of MNPuzzle self.
+
+        @type self: MNPuzzle
+        @rtype: int
+        """
+        return hash(self._cells)
 
     def __str__(self):
         """
@@ -69,15 +468,7 @@ class MNPuzzle(Puzzle):
         1 * 5
         6 7 8
         """
-        x = ''
-        for i in self.from_grid:
-            for j in range(len(i)):
-                if j == len(i) - 1:
-                    x += i[j]
-                else:
-                    x += i[j] + ' '  # Solve the problem in this.
-            x += '\n'
-        return x[0:len(x)-1]  # for removing the last blankline.
+        return "\n".join([" ".join(row) for row in self.from_grid])
 
     # override extensions
     # legal extensions are configurations that can be reached by swapping one
@@ -104,145 +495,294 @@ class MNPuzzle(Puzzle):
         6 7 8
 
         """
-        extensions = []
-        for tple in range(len(self.from_grid)): # interating over outer tuple
-            for symbol in range(len(self.from_grid[tple])):  # over inner tuple
-                if self.from_grid[tple][symbol] == '*':
-                    if symbol == 0:
-                        position1 = self.from_grid[tple][symbol+1]
-                        position2 = self.from_grid[tple][symbol]
-                        a = (position1, position2)
-                        for i in self.from_grid[tple][2:]:
-                            a += (i,)
-                        lst = []
-                        for item in self.from_grid:
-                            if item != self.from_grid[tple]:
-                                lst.append(item)
-                            else :
-                                lst.append(a)
-                        x = tuple(lst)
-                        extensions.append(MNPuzzle(x, self.to_grid))
-                    elif symbol == len(self.from_grid[tple]) - 1:
-                        position1 = self.from_grid[tple][symbol-1]
-                        position2 = self.from_grid[tple][symbol]
-                        a = (position2, position1)
-                        tple1 = self.from_grid[tple][:symbol-1]
-                        tple1 += a
-                        lst = []
-                        for item in self.from_grid:
-                            if item != self.from_grid[tple]:
-                                lst.append(item)
-                            else:
-                                lst.append(tple1)
-                        x = tuple(lst)
-                        extensions.append(MNPuzzle(x, self.to_grid))
-                    else:
-                        position1 = self.from_grid[tple][symbol+1]
-                        position2 = self.from_grid[tple][symbol]
-                        position3 = self.from_grid[tple][symbol-1]
-                        tple1 = self.from_grid[tple][:symbol-1]
-                        tple1 += (position2, position3)
-                        tplea = self.from_grid[tple][symbol+1:]
-                        tple1 += tplea
-                        lst = []
-                        for item in self.from_grid:
-                            if item != self.from_grid[tple]:
-                                lst.append(item)
-                            else:
-                                lst.append(tple1)
-                        x = tuple(lst)
-                        extensions.append(MNPuzzle(x, self.to_grid))
-                        tple2 = self.from_grid[tple][:symbol]
-                        tple2 += (position1, position2)
-                        for i in self.from_grid[tple][symbol+2:]:
-                            tple2 += (i,)
-                        lst1 = []
-                        for item in self.from_grid:
-                            if item != self.from_grid[tple]:
-                                lst1.append(item)
-                            else:
-                                lst1.append(tple2)
-                        x = tuple(lst1)
-                        extensions.append(MNPuzzle(x, self.to_grid))
-
-        for tple in range(len(self.from_grid)):
-            for symbol in range(len(self.from_grid[tple])):
-                if self.from_grid[tple][symbol] == '*':
-                    if tple == 0:
-                        position1 = self.from_grid[tple][symbol]
-                        position2 = self.from_grid[tple+1][symbol]
-                        tple1 = self.from_grid[tple][:symbol]
-                        tple1 += (position2,)
-                        tple1 += self.from_grid[tple][symbol+1:]
-                        tple2 = self.from_grid[tple+1][:symbol]
-                        tple2 += (position1,)
-                        tple2 += self.from_grid[tple+1][symbol+1:]
-                        lst = []
-                        lst.append(tple1)
-                        lst.append(tple2)
-                        for item in self.from_grid:
-                            if item != self.from_grid[tple] and item !=  \
-                                    self.from_grid[tple+1]:
-                                lst.append(item)
-                        x = tuple(lst)
-                        extensions.append(MNPuzzle(x, self.to_grid))
-                    elif tple == len(self.from_grid) - 1:
-                        position1 = self.from_grid[tple][symbol]
-                        position2 = self.from_grid[tple-1][symbol]
-                        tple1 = self.from_grid[tple][:symbol]
-                        tple1 += (position2,)
-                        tple1 += self.from_grid[tple][symbol+1:]
-                        tple2 = self.from_grid[tple-1][:symbol]
-                        tple2 += (position1,)
-                        tple2 += self.from_grid[tple-1][symbol+1:]
-                        lst = []
-                        for item in self.from_grid:
-                            if item != self.from_grid[tple] and \
-                                    (item != self.from_grid[tple-1]):
-                                lst.append(item)
-                        lst.append(tple2)
-                        lst.append(tple1)
-                        x = tuple(lst)
-                        extensions.append(MNPuzzle(x, self.to_grid))
-                    else:
-                        position1 = self.from_grid[tple][symbol]
-                        position2 = self.from_grid[tple+1][symbol]
-                        position3 = self.from_grid[tple-1][symbol]
-                        tple1 = self.from_grid[tple][:symbol]
-                        tple1 += (position2,)
-                        tple1 += self.from_grid[tple][symbol+1:]
-                        tple2 = self.from_grid[tple+1][:symbol]
-                        tple2 += (position1,)
-                        tple2 += self.from_grid[tple+1][symbol+1:]
-                        lst = []
-                        for item in range(len(self.from_grid)):
-                            if item != tple and item != tple + 1:
-                                lst.append(self.from_grid[item])
-                            elif item == tple:
-                                lst.append(tple1)
-                            else:
-                                lst.append(tple2)
-                        x = tuple(lst)
-                        extensions.append(MNPuzzle(x, self.to_grid))
-                        tple3 = self.from_grid[tple-1][:symbol]
-                        tple3 += (position1,)
-                        tple3 += self.from_grid[tple-1][symbol+1:]
-                        tple4 = self.from_grid[tple][:symbol]
-                        tple4 += (position3,)
-                        tple4 += self.from_grid[tple][symbol+1:]
-                        lst1 = []
-                        for item in range(len(self.from_grid)):
-                            if item != tple and item != tple - 1:
-                                lst1.append(self.from_grid[item])
-                            elif item == tple:
-                                lst1.append(tple4)
-                            else:
-                                lst1.append(tple3)
-                        x = tuple(lst1)
-                        extensions.append(MNPuzzle(x, self.to_grid))
-
-        return extensions
-    # sorry for the long code.
+        return list(self.iter_extensions())
+
+    def iter_extensions(self, seen=None):
+        """
+        Yield the legal extensions of MNPuzzle self, skipping those whose
+        state_key is in seen.
+
+        The blank moves left, right, down and up, in that order.
+
+        @type self: MNPuzzle
+        @type seen: Container | None
+        @rtype: Iterator[MNPuzzle]
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> start_grid = (("2", "4", "3"), ("1", "*", "5"),("6", "7", "8"))
+        >>> x = MNPuzzle(start_grid, target_grid)
+        >>> seen = {x.extensions()[0].state_key()}
+        >>> for a in x.iter_extensions(seen): print(a)
+        2 4 3
+        1 5 *
+        6 7 8
+        2 4 3
+        1 7 5
+        6 * 8
+        2 * 3
+        1 4 5
+        6 7 8
+        """
+        cells, blank, estimate = self._cells, self._blank, self._estimate
+        if blank < 0:
+            return
+        code = cells[blank]
+        for i in self._neighbours[blank]:
+            grid = bytearray(cells)
+            grid[blank], grid[i] = cells[i], code
+            key = bytes(grid)
+            if seen is None or key not in seen:
+                puzzle = self._with_cells(key, i)
+                if estimate is not None:
+                    # heuristic updates the estimate for the one tile moved
+                    puzzle._parent_estimate, puzzle._moved_to = estimate, blank
+                yield puzzle
+
+    def moves(self):
+        """
+        Return the moves of MNPuzzle self, in the order of iter_extensions,
+        as (blank, i): the tile at position i slides into the blank at
+        position blank, numbering positions row by row.
+
+        @type self: MNPuzzle
+        @rtype: list[(int, int)]
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> x = MNPuzzle((("*", "2", "3"), ("1", "4", "5")), target_grid)
+        >>> x.moves()
+        [(0, 1), (0, 3)]
+        >>> x.apply((0, 3))
+        >>> print(x)
+        1 2 3
+        * 4 5
+        >>> x.undo((0, 3))
+        >>> print(x)
+        * 2 3
+        1 4 5
+        """
+        blank = self._blank
+        if blank < 0:
+            return []
+        return [(blank, i) for i in self._neighbours[blank]]
+
+    def apply(self, move):
+        """
+        Slide the tile of move into the blank of MNPuzzle self.
+
+        @type self: MNPuzzle
+        @type move: (int, int)
+        @rtype: None
+        """
+        self._swap(move[0], move[1])
+
+    def undo(self, move):
+        """
+        Slide the tile moved by move back, in MNPuzzle self.
+
+        @type self: MNPuzzle
+        @type move: (int, int)
+        @rtype: None
+        """
+        self._swap(move[1], move[0])
+
+    def _swap(self, blank, i):
+        """
+        Move the "*" of MNPuzzle self from position blank to position i,
+        sliding the tile there the other way.
+
+        @type self: MNPuzzle
+        @type blank: int
+        @type i: int
+        @rtype: None
+        """
+        cells = self._cells
+        grid = bytearray(cells)
+        grid[blank], grid[i] = cells[i], cells[blank]
+        self._cells, self._blank = bytes(grid), i
+        self._estimate = self._parent_estimate = None
+
+    def copy(self):
+        """
+        Return an MNPuzzle in the same state as MNPuzzle self.
+
+        @type self: MNPuzzle
+        @rtype: MNPuzzle
+        """
+        puzzle = self._with_cells(self._cells, self._blank)
+        puzzle._estimate = self._estimate
+        return puzzle
+
+    # override fail_fast
+    # Whether a grid can be solved is found once, by _is_solvable, when
+    # the puzzle is made, and passed on to its extensions, which can be
+    # solved exactly when it can.
+
+    def fail_fast(self):
+        """
+        Return True iff MNPuzzle self can never reach to_grid: its tiles
+        differ from those of to_grid, or are an odd permutation away from
+        them.
+
+        @type self: MNPuzzle
+        @rtype: bool
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> MNPuzzle((("*", "2", "3"), ("1", "4", "5")),
+        ...          target_grid).fail_fast()
+        False
+        >>> MNPuzzle((("2", "1", "3"), ("4", "5", "*")),
+        ...          target_grid).fail_fast()
+        True
+        >>> MNPuzzle((("1", "2", "3"), ("4", "6", "*")),
+        ...          target_grid).fail_fast()
+        True
+        """
+        return not self._solvable
+
+    def is_fail_fast_invariant(self):
+        """
+        Return True, since sliding tiles never changes whether a grid can be
+        solved.
+
+        @type self: MNPuzzle
+        @rtype: bool
+        """
+        return True
+
+    def is_reversible(self):
+        """
+        Return True, since sliding a tile back undoes any move.
+
+        @type self: MNPuzzle
+        @rtype: bool
+        """
+        return True
+
+    def goal_state(self):
+        """
+        Return the solved MNPuzzle that MNPuzzle self is working towards.
+
+        @type self: MNPuzzle
+        @rtype: MNPuzzle
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> print(MNPuzzle(start_grid, target_grid).goal_state())
+        1 2 3
+        4 5 *
+        """
+        if self._goal is None:
+            return MNPuzzle(self.to_grid, self.to_grid)
+        return self._with_cells(self._goal, self._find_blank(self._goal),
+                                True)
+
+    def heuristic(self):
+        """
+        Return the sum of the Manhattan distances of every tile of MNPuzzle
+        self from its position in to_grid, plus two moves for each tile that
+        must leave its goal row or column to let others in it pass, or the
+        estimate of the pattern database built for to_grid, if there is one
+        and it is larger.
+
+        @type self: MNPuzzle
+        @rtype: int
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> MNPuzzle(start_grid, target_grid).heuristic()
+        3
+        >>> x = MNPuzzle((("3", "2", "1"), ("4", "5", "*")), target_grid)
+        >>> x.heuristic()
+        8
+        >>> [a.heuristic() for a in x.extensions()]
+        [9, 7]
+        """
+        if self._goal is None:
+            return 0
+        estimate = self._estimate
+        if estimate is None:
+            if self._parent_estimate is None:
+                estimate = self._full_estimate()
+            else:
+                estimate = self._parent_estimate + self._estimate_change()
+            self._estimate = estimate
+        database = self._tables[3] if self._solvable else None
+        if database is not None:
+            return max(estimate, database.lookup(self._cells))
+        return estimate
+
+    def _full_estimate(self):
+        """
+        Return the Manhattan distances and linear conflicts of MNPuzzle
+        self, as in heuristic, adding up every tile, row and column.
+
+        @type self: MNPuzzle
+        @rtype: int
+        """
+        cells, n, m = self._cells, self.n, self.m
+        table = self._tables[0]
+        total = sum([table[code][i] for i, code in enumerate(cells)])
+        total += sum([self._conflicts(cells[r * m:(r + 1) * m], r, True)
+                      for r in range(n)])
+        return total + sum([self._conflicts(cells[c::m], c, False)
+                            for c in range(m)])
+
+    def _estimate_change(self):
+        """
+        Return how much the estimate of MNPuzzle self differs from that of
+        the puzzle it was extended from, whose tile at the blank of self
+        slid to _moved_to: the change in that tile's Manhattan distance and
+        in the conflicts of its goal row or column, if the move took it into
+        or out of that line.  Lines along the move keep their tiles in the
+        same order, and no other line changes its tiles.
+
+        @type self: MNPuzzle
+        @rtype: int
+        """
+        cells, start, end, m = self._cells, self._blank, self._moved_to, self.m
+        code = cells[end]
+        distances, rows, columns = self._tables[:3]
+        change = distances[code][end] - distances[code][start]
+        if start // m == end // m:
+            # across columns: the tile is in one and was in the other
+            c, across, inside, outside = columns[code], False, end, start
+            if c == start % m:
+                inside, outside = start, end
+            elif c != end % m:
+                return change
+            line, offset = bytearray(cells[c::m]), inside // m
+        else:
+            c, across, inside, outside = rows[code], True, end, start
+            if c == start // m:
+                inside, outside = start, end
+            elif c != end // m:
+                return change
+            line, offset = bytearray(cells[c * m:(c + 1) * m]), inside % m
+        # line as it is with the tile in its goal line, and with the blank
+        present, absent = line[:], line
+        present[offset], absent[offset] = code, cells[start]
+        conflicts = (self._conflicts(present, c, across) -
+                     self._conflicts(absent, c, across))
+        return change + (conflicts if inside == end else -conflicts)
+
+    def _conflicts(self, line, index, along_row):
+        """
+        Return the linear conflicts of line, the codes of row index of a
+        grid like that of MNPuzzle self if along_row, or else of column
+        index.
+
+        @type self: MNPuzzle
+        @type line: bytes | bytearray
+        @type index: int
+        @type along_row: bool
+        @rtype: int
+        """
+        rows, columns = self._tables[1], self._tables[2]
+        if along_row:
+            return _line_conflicts(tuple([columns[code] for code in line
+                                          if rows[code] == index]))
+        return _line_conflicts(tuple([rows[code] for code in line
+                                      if columns[code] == index]))
 
     def is_solved(self):
         """
@@ -258,7 +798,7 @@ class MNPuzzle(Puzzle):
         False
 
         """
-        return self.from_grid == self.to_grid
+        return self._cells == self._goal
 
 
 if __name__ == "__main__":
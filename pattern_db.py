@@ -0,0 +1,322 @@
+"""
+Additive pattern databases for MNPuzzle: for each group of tiles, the
+fewest moves of those tiles needed to bring them home from every placement,
+counting moves of other tiles as free.  Since no move is counted by two
+groups, the sum over a partition of the tiles never overestimates.
+
+Databases are built once by breadth-first search back from the goal and
+written to DIRECTORY, one file of bytes per group and a JSON manifest,
+then read through mmap so every process solving puzzles shares one copy.
+MNPuzzle.heuristic uses the database for its shape and goal, if one has
+been built.
+"""
+from collections import deque
+import hashlib
+import json
+import mmap
+import os
+
+# where databases are written and found; set MN_PATTERN_DB to change it
+DIRECTORY = os.environ.get("MN_PATTERN_DB", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "pattern_dbs"))
+
+# largest search of a group, in bytes: one per placement and blank position
+MAX_SEARCH_BYTES = 1 << 25
+
+# distance of placements not yet reached
+_UNSEEN = 255
+
+# databases found so far, by to_grid and directory; misses are not kept,
+# so a database built later, by another process, is still found
+_found = {}
+
+# databases built by this process, so callers caching what find returned
+# know when to look again
+_builds = 0
+
+
+def group_size(n, m):
+    """
+    Return the most tiles in a group of a database for n x m puzzles, so
+    that building it takes no more than MAX_SEARCH_BYTES.
+
+    @type n: int
+    @type m: int
+    @rtype: int
+
+    >>> group_size(3, 3), group_size(4, 4), group_size(5, 5)
+    (6, 5, 4)
+    """
+    cells, k = n * m, 1
+    while cells ** (k + 2) <= MAX_SEARCH_BYTES:
+        k += 1
+    return k
+
+
+def default_groups(to_grid, size=None):
+    """
+    Return the tiles of to_grid, row by row, in consecutive groups of size
+    tiles, or of group_size if size is None, with the last group smallest.
+
+    @type to_grid: tuple[tuple[str]]
+    @type size: int | None
+    @rtype: list[list[str]]
+
+    >>> default_groups((("1", "2", "3"), ("4", "5", "6"), ("7", "8", "*")), 4)
+    [['1', '2', '3', '4'], ['5', '6', '7', '8']]
+    """
+    if size is None:
+        size = group_size(len(to_grid), len(to_grid[0]))
+    tiles = [symbol for row in to_grid for symbol in row if symbol != "*"]
+    return [tiles[i:i + size] for i in range(0, len(tiles), size)]
+
+
+def _name(to_grid):
+    """
+    Return the name of the files of the database for to_grid.
+
+    @type to_grid: tuple[tuple[str]]
+    @rtype: str
+
+    >>> _name((("1", "2"), ("3", "*")))
+    '2x2-49bd7faa1fca'
+    """
+    digest = hashlib.sha1(json.dumps(to_grid).encode()).hexdigest()
+    return "{}x{}-{}".format(len(to_grid), len(to_grid[0]), digest[:12])
+
+
+def build(to_grid, groups=None, directory=None):
+    """
+    Build and write the database for MNPuzzles working towards to_grid,
+    with a table for each group of tiles in groups, which defaults to
+    default_groups(to_grid), in directory, which defaults to DIRECTORY.
+    Return the PatternDatabase.
+
+    Each table takes (n * m) ** len(group) bytes, and its search n * m
+    times as many while it is built.
+
+    @type to_grid: tuple[tuple[str]]
+    @type groups: list[list[str]] | None
+    @type directory: str | None
+    @rtype: PatternDatabase
+
+    >>> import tempfile
+    >>> from mn_puzzle import MNPuzzle
+    >>> goal = (("1", "2", "3"), ("4", "5", "*"))
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     database = build(goal, [["1", "2", "3"], ["4", "5"]], directory)
+    ...     x = MNPuzzle((("*", "5", "4"), ("3", "2", "1")), goal)
+    ...     print(database.lookup(x.state_key()), x.heuristic())
+    ...     database.close()
+    15 13
+    """
+    from mn_puzzle import _symbol_codes, _neighbours
+    to_grid = tuple([tuple(row) for row in to_grid])
+    directory = DIRECTORY if directory is None else directory
+    n, m = len(to_grid), len(to_grid[0])
+    codes = _symbol_codes(to_grid)[1]
+    cells = [symbol for row in to_grid for symbol in row]
+    if len(set(cells)) < len(cells) or "*" not in codes:
+        raise ValueError("to_grid must have distinct tiles and one blank")
+    if groups is None:
+        groups = default_groups(to_grid)
+    tiles = [tile for group in groups for tile in group]
+    if "*" in tiles or len(set(tiles)) < len(tiles) or not set(
+            tiles) <= set(cells):
+        raise ValueError("groups must hold distinct tiles of to_grid")
+    os.makedirs(directory, exist_ok=True)
+    name = _name(to_grid)
+    files = []
+    for i, group in enumerate(groups):
+        table = _search([cells.index(tile) for tile in group],
+                        cells.index("*"), _neighbours(n, m))
+        files.append("{}-{}.pdb".format(name, i))
+        with open(os.path.join(directory, files[-1]), "wb") as output:
+            output.write(table)
+    manifest = {"n": n, "m": m, "to_grid": to_grid, "groups": groups,
+                "codes": [[codes[tile] for tile in group]
+                          for group in groups],
+                "files": files}
+    with open(os.path.join(directory, name + ".json"), "w") as output:
+        json.dump(manifest, output)
+    global _builds
+    _found.clear()
+    _builds += 1
+    return PatternDatabase(os.path.join(directory, name + ".json"))
+
+
+def _search(homes, blank, neighbours):
+    """
+    Return the table of a group of tiles whose goal positions are homes,
+    with the blank at goal position blank, on a grid with the given
+    neighbours: for each placement of the tiles, the fewest moves of them
+    needed to bring them all home.
+
+    A placement with the tile of homes[j] at position p[j] has index
+    sum(p[j] * cells ** j).  The search is a breadth-first search over
+    placements and blank positions, in which moving the blank past a tile
+    outside the group costs nothing, so those moves go to the front of the
+    queue.
+
+    @type homes: list[int]
+    @type blank: int
+    @type neighbours: tuple[tuple[int]]
+    @rtype: bytearray
+
+    >>> list(_search([1], 0, ((1,), (0,))))
+    [1, 0]
+    """
+    cells, k = len(neighbours), len(homes)
+    weights = [cells ** j for j in range(k)]
+    table = bytearray([_UNSEEN]) * (cells ** k)
+    start = sum([home * weight for home, weight in zip(homes, weights)])
+    distance = bytearray([_UNSEEN]) * (cells ** k * cells)
+    distance[start * cells + blank] = table[start] = 0
+    queue = deque([start * cells + blank])
+    while queue:
+        state = queue.popleft()
+        placement, blank = divmod(state, cells)
+        d = distance[state]
+        positions, rest = [], placement
+        for _ in range(k):
+            rest, position = divmod(rest, cells)
+            positions.append(position)
+        for neighbour in neighbours[blank]:
+            if neighbour in positions:
+                # tile j slides into the blank, at the cost of one move
+                j = positions.index(neighbour)
+                moved = placement + (blank - neighbour) * weights[j]
+                after = moved * cells + neighbour
+                if distance[after] > d + 1:
+                    distance[after] = d + 1
+                    if table[moved] > d + 1:
+                        table[moved] = d + 1
+                    queue.append(after)
+            else:
+                after = placement * cells + neighbour
+                if distance[after] > d:
+                    distance[after] = d
+                    queue.appendleft(after)
+    return table
+
+
+class PatternDatabase:
+    """
+    The tables of an additive pattern database, read through mmap.
+
+    === Attributes ===
+    @type n: int
+    @type m: int
+    @type to_grid: tuple[tuple[str]]
+    @type groups: list[list[str]]
+        the tiles of each table
+    """
+
+    def __init__(self, path):
+        """
+        Create a new PatternDatabase self from the manifest at path, as
+        written by build.
+
+        @type self: PatternDatabase
+        @type path: str
+        @rtype: None
+        """
+        with open(path, "r") as manifest:
+            data = json.load(manifest)
+        self.n, self.m = data["n"], data["m"]
+        self.to_grid = tuple([tuple(row) for row in data["to_grid"]])
+        self.groups = data["groups"]
+        directory = os.path.dirname(path)
+        self._tables = []
+        for codes, name in zip(data["codes"], data["files"]):
+            with open(os.path.join(directory, name), "rb") as table:
+                self._tables.append((tuple(codes), mmap.mmap(
+                    table.fileno(), 0, access=mmap.ACCESS_READ)))
+        longest = max([len(codes) for codes, _ in self._tables] + [0])
+        self._weights = [(self.n * self.m) ** j for j in range(longest)]
+
+    def lookup(self, cells):
+        """
+        Return the sum over the tables of PatternDatabase self of the moves
+        needed by each group of tiles in the grid cells, encoded as by
+        MNPuzzle.state_key.
+
+        @type self: PatternDatabase
+        @type cells: bytes
+        @rtype: int
+        """
+        weights, total = self._weights, 0
+        for codes, table in self._tables:
+            placement = 0
+            for code, weight in zip(codes, weights):
+                placement += cells.index(code) * weight
+            total += table[placement]
+        return total
+
+    def close(self):
+        """
+        Unmap the tables of PatternDatabase self.
+
+        @type self: PatternDatabase
+        @rtype: None
+        """
+        for _, table in self._tables:
+            table.close()
+        self._tables = []
+
+
+def find(to_grid, directory=None):
+    """
+    Return the PatternDatabase for to_grid in directory, which defaults to
+    DIRECTORY, or None if none has been built yet.  A database is opened
+    once and then shared; until one is found, each call looks again.
+
+    @type to_grid: tuple[tuple[str]]
+    @type directory: str | None
+    @rtype: PatternDatabase | None
+
+    >>> import tempfile
+    >>> goal = (("1", "2"), ("3", "*"))
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     before = find(goal, directory)
+    ...     database = build(goal, [["1", "2", "3"]], directory)
+    ...     print(before, find(goal, directory) is find(goal, directory))
+    ...     database.close()
+    None True
+    """
+    database = _found.get((to_grid, directory))
+    if database is None:
+        path = os.path.join(DIRECTORY if directory is None else directory,
+                            _name(to_grid) + ".json")
+        if not os.path.exists(path):
+            return None
+        database = _found[(to_grid, directory)] = PatternDatabase(path)
+    return database
+
+
+def main(argv=None):
+    """
+    Build the database for the n x m puzzle with tiles "1", "2", ... and
+    "*" last, as given by the command-line arguments argv.
+
+    @type argv: list[str] | None
+        defaults to sys.argv[1:]
+    @rtype: None
+    """
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog="python -m pattern_db",
+        description="Build an additive pattern database for MNPuzzle.")
+    parser.add_argument("n", type=int)
+    parser.add_argument("m", type=int)
+    parser.add_argument("--group-size", type=int, default=None)
+    parser.add_argument("--directory", default=DIRECTORY)
+    args = parser.parse_args(argv)
+    cells = [str(i) for i in range(1, args.n * args.m)] + ["*"]
+    to_grid = tuple([tuple(cells[i:i + args.m])
+                     for i in range(0, len(cells), args.m)])
+    build(to_grid, default_groups(to_grid, args.group_size), args.directory)
+
+
+if __name__ == "__main__":
+    main()
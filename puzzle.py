@@ -3,6 +3,8 @@ class Puzzle:
     Snapshot of a full-information puzzle, which may be solved, unsolved,
     or even unsolvable.
     """
+    # subclasses may declare __slots__ to keep their states small
+    __slots__ = ()
 
     def fail_fast(self):
         """
@@ -16,6 +18,203 @@ class Puzzle:
         """
         return False
 
+    def is_fail_fast_invariant(self):
+        """
+        Return True iff fail_fast returns the same for every puzzle
+        reachable from Puzzle self as for self.
+
+        Override this in a subclass whose fail_fast tests a property that
+        extensions never change, so that searches need only call it on the
+        puzzle they start from.
+
+        @type self: Puzzle
+        @rtype: bool
+        """
+        return False
+
+    def is_reversible(self):
+        """
+        Return True iff every extension of Puzzle self, and of the puzzles
+        reachable from it, can be undone by a single extension, and
+        goal_state is implemented.
+
+        Override this in a subclass whose moves can always be undone, so
+        that puzzle_tools.bidirectional_solve can search backwards from
+        the goal.
+
+        @type self: Puzzle
+        @rtype: bool
+        """
+        return False
+
+    def is_acyclic(self):
+        """
+        Return True iff no sequence of extensions starting from Puzzle self
+        ever leads back to a state it has passed through.
+
+        Override this in a subclass whose moves always make progress, e.g.
+        by filling a cell or removing a piece, so that
+        puzzle_tools.count_solutions can share counts between paths.
+
+        @type self: Puzzle
+        @rtype: bool
+        """
+        return False
+
+    def goal_state(self):
+        """
+        Return the solved Puzzle that Puzzle self is working towards.
+
+        Override this in a subclass that has a single known solution.
+
+        @type self: Puzzle
+        @rtype: Puzzle
+        """
+        raise NotImplementedError
+
+    def heuristic(self):
+        """
+        Return an estimate of the number of extensions needed to get from
+        Puzzle self to a solution.
+
+        Override this in a subclass to guide informed searches such as
+        puzzle_tools.best_first_solve.  The estimate should never exceed the
+        true distance if the search is expected to find shortest solutions.
+
+        @type self: Puzzle
+        @rtype: int
+        """
+        return 0
+
+    def state_key(self):
+        """
+        Return a compact, hashable key identifying the state of Puzzle self.
+
+        Two puzzles of the same search that represent the same configuration
+        must have equal keys.  Search engines use this key for duplicate
+        detection, so override it in a subclass with something cheaper than
+        the default rendering, e.g. a tuple or a string of the board.
+
+        @type self: Puzzle
+        @rtype: Hashable
+        """
+        return str(self)
+
+    def from_state_key(self, key):
+        """
+        Return a Puzzle of the same kind and with the same goal as Puzzle
+        self, in the state identified by key.
+
+        Override this in a subclass so that searches can pass compact keys
+        between processes instead of whole puzzles.
+
+        @type self: Puzzle
+        @type key: Hashable
+        @rtype: Puzzle
+        """
+        raise NotImplementedError
+
+    def moves(self):
+        """
+        Return a list of the legal moves of Puzzle self, each a small value
+        that apply and undo understand.
+
+        Override this, with apply, undo and copy, in a subclass whose state
+        can be changed in place, so that
+        puzzle_tools.in_place_depth_first_solve can search without building
+        a new puzzle for every extension.
+
+        @type self: Puzzle
+        @rtype: list
+        """
+        raise NotImplementedError
+
+    def apply(self, move):
+        """
+        Change Puzzle self in place by move, one of the moves it returned,
+        so that it becomes the corresponding extension.
+
+        @type self: Puzzle
+        @type move: Any
+        @rtype: None
+        """
+        raise NotImplementedError
+
+    def undo(self, move):
+        """
+        Change Puzzle self back to the state it was in before move was
+        applied to it.
+
+        @type self: Puzzle
+        @type move: Any
+        @rtype: None
+        """
+        raise NotImplementedError
+
+    def copy(self):
+        """
+        Return a Puzzle in the same state as Puzzle self, that apply and undo
+        on either one leave the other unchanged.
+
+        @type self: Puzzle
+        @rtype: Puzzle
+        """
+        raise NotImplementedError
+
+    def state_bytes(self):
+        """
+        Return the state of Puzzle self encoded as bytes, of the same
+        length for every puzzle reachable from self.
+
+        Override this in a subclass, together with from_state_bytes, so that
+        external_bfs can keep the states of a search in files on disk.
+
+        @type self: Puzzle
+        @rtype: bytes
+        """
+        raise NotImplementedError
+
+    def from_state_bytes(self, data):
+        """
+        Return a Puzzle of the same kind and with the same goal as Puzzle
+        self, in the state encoded by data, as returned by state_bytes.
+
+        @type self: Puzzle
+        @type data: bytes
+        @rtype: Puzzle
+        """
+        raise NotImplementedError
+
+    def swap_neighbours(self):
+        """
+        Return the byte that marks the blank in state_bytes of Puzzle self,
+        and for each position of state_bytes the positions the blank can
+        swap with from there, if every extension of self and of the puzzles
+        reachable from it swaps the blank with one of those; otherwise
+        return None.
+
+        Override this in a subclass, together with state_bytes,
+        from_state_bytes and goal_state, so that vector_bfs can extend a
+        whole layer of a breadth-first search at once.
+
+        @type self: Puzzle
+        @rtype: (int, tuple[tuple[int]]) | None
+        """
+        return None
+
+    def __hash__(self):
+        """
+        Return a hash of Puzzle self, consistent with state_key.
+
+        A subclass that overrides __eq__ must also define __hash__, since
+        Python discards the inherited one; delegating to state_key keeps it
+        cheap.
+
+        @type self: Puzzle
+        @rtype: int
+        """
+        return hash(self.state_key())
+
     def is_solved(self):
         """
         Return True iff Puzzle self is solved.
@@ -39,3 +238,20 @@ class Puzzle:
         @rtype: list[Puzzle]
         """
         raise NotImplementedError
+
+    def iter_extensions(self, seen=None):
+        """
+        Yield the legal extensions of Puzzle self, one at a time, skipping
+        any whose state_key is in seen.
+
+        Override this in a subclass that can find the state key of an
+        extension before building it, so that searches do not pay for
+        building extensions they have already seen.
+
+        @type self: Puzzle
+        @type seen: Container | None
+        @rtype: Iterator[Puzzle]
+        """
+        for extension in self.extensions():
+            if seen is None or extension.state_key() not in seen:
+                yield extension
@@ -2,54 +2,308 @@
 Some functions for working with puzzles
 """
 from puzzle import Puzzle
+from search_stats import SearchStats
+from budget import OverBudget, BudgetExhausted
 from collections import deque
-# set higher recursion limit
-# which is needed in PuzzleNode.__str__
-# uncomment the next two lines on a unix platform, say CDF
-# import resource
-# resource.setrlimit(resource.RLIMIT_STACK, (2**29, -1))
-import sys
+from heapq import heappush, heappop
+import functools
+import inspect
+import multiprocessing
+import os
+import threading
+import zlib
 
-sys.setrecursionlimit(10 ** 6)
+# seconds parallel_breadth_first_solve waits on a worker between checks
+_POLL_SECONDS = 0.1
 
 # *** HELPER FUNCTIONS FOR BREADTH_FIRST_SOLVE AND DEPTH_FIRST_SOLVE ***
 
 
-def helper_sol(puzzle, lst):
+def helper_sol(puzzle, lst, stats=None, prune=None, fail_fast=True,
+               closed=None):
     """
     Return a path from PuzzleNode(puzzle) to a PuzzleNode containing a
     solution, with each child containing an extension of the puzzle in its
     parent. Return None if this is not possible.
 
+    Duplicates are detected by Puzzle.state_key and rejected when they are
+    generated, so a configuration enters lst at most once.  The search
+    itself only keeps compact _SearchNodes, and builds PuzzleNodes for the
+    path it returns.
+
+    Extensions for which puzzle.fail_fast (unless fail_fast is False) or
+    any predicate in prune returns True are dropped before they are
+    added to lst.
+
+    The state keys seen are remembered in closed, an empty set or one of
+    the closed sets from closed_set, which defaults to a new set.
+
     @type puzzle : puzzle.py
     @type lst: list | deque
+    @type stats: SearchStats | None
+    @type prune: list[(Puzzle) -> bool] | None
+    @type fail_fast: bool
+    @type closed: set | ExactClosedSet | LRUClosedSet | BloomClosedSet | None
     @rtype: PuzzleNode
 
     """
-    visit = set()
-    lst.append(PuzzleNode(puzzle))
-    flag = False
-    sol = None
-    while lst and not flag:
-        if isinstance(lst, deque):
-            croot = lst.popleft()
-        else:
-            croot = lst.pop()
+    stats = _start_stats(stats)
+    extensions, is_solved, state_key = _phases(stats)
+    pruner = _pruner(puzzle, prune, fail_fast, stats)
+    visit = set() if closed is None else closed
+    visit.add(state_key(puzzle))
+    if pruner is not None and pruner.rejects_root(puzzle):
+        return stats.finish(None)
+    seen = stats.counting(visit)
+    lst.append(_SearchNode(puzzle))
+    if isinstance(lst, deque):
+        pop = lst.popleft
+    else:
+        pop = lst.pop
+    push = lst.append
+    while lst:
+        croot = pop()  # croot is basically the current root.
         current = croot.puzzle
-        if str(current) not in visit:
-            if current.is_solved():  # if already solved.
-                # turn current_root into a leaf
-                croot.children = []
-                sol = path_ret(croot) # croot is basically the current root.
-                flag = True
+        if is_solved(current):
+            return stats.finish(_path_to(croot))
+        for extension in extensions(current, seen):
+            stats.nodes_generated += 1
+            key = state_key(extension)
+            if key in visit:
+                stats.duplicates_rejected += 1
             else:
-                visit.add(str(current))
-                extensions = current.extensions()
-                ex_nodes = [PuzzleNode(extension, parent=croot) for
-                            extension in extensions]
-                croot.children = ex_nodes
-                lst.extend(ex_nodes)
-    return sol
+                # pruned states stay in visit, so they are never rechecked
+                # and need no cache of their own
+                visit.add(key)
+                if pruner is None or not pruner.check(extension):
+                    push(_SearchNode(extension, croot))
+        stats.expanded(current, len(lst), len(visit))
+    return stats.finish(None)
+
+
+class _SearchNode:
+    """
+    A puzzle reached by a search, and the _SearchNode it was reached from.
+
+    Unlike PuzzleNode, a _SearchNode has no children and no __dict__, so
+    the states a search remembers cost as little memory as possible.
+    """
+    __slots__ = ("puzzle", "parent")
+
+    def __init__(self, puzzle, parent=None):
+        """
+        Create a new _SearchNode self for puzzle, reached from parent.
+
+        @type self: _SearchNode
+        @type puzzle: Puzzle
+        @type parent: _SearchNode | None
+        @rtype: None
+        """
+        self.puzzle, self.parent = puzzle, parent
+
+
+def _states_to(node):
+    """
+    Return the list of puzzles from the root of node's search to node.
+
+    @type node: _SearchNode
+    @rtype: list[Puzzle]
+
+    >>> _states_to(_SearchNode(2, _SearchNode(1)))
+    [1, 2]
+    """
+    states = []
+    while node is not None:
+        states.append(node.puzzle)
+        node = node.parent
+    states.reverse()
+    return states
+
+
+def _path_to(node):
+    """
+    Return the root of a path of PuzzleNodes from the root of node's
+    search to node.
+
+    @type node: _SearchNode
+    @rtype: PuzzleNode
+    """
+    return _path_from_states(_states_to(node))
+
+
+class _Pruner:
+    """
+    A chain of predicates that each return True for puzzles that can never
+    be extended to a solution, with a cache of the keys of states found to
+    be dead, for searches that do not remember every state they reach.
+
+    The predicates must only reject puzzles that cannot be solved: a
+    puzzle's own fail_fast is sound by its contract, and is skipped when
+    Puzzle.is_fail_fast_invariant says it cannot change (see _pruner).
+    """
+    __slots__ = ("_checks", "_dead", "_pruned")
+
+    def __init__(self, checks, stats):
+        """
+        Create a new _Pruner self running checks in order, counting the
+        puzzles each one prunes into stats.
+
+        @type self: _Pruner
+        @type checks: list[(Puzzle) -> bool]
+        @type stats: SearchStats
+        @rtype: None
+        """
+        self._checks = [(getattr(check, "__name__", repr(check)), check)
+                        for check in checks]
+        self._dead = set()
+        self._pruned = stats.pruned
+
+    def __call__(self, puzzle, key):
+        """
+        Return True iff puzzle, with state key, is known or found to be
+        dead.
+
+        @type self: _Pruner
+        @type puzzle: Puzzle
+        @type key: Hashable
+        @rtype: bool
+
+        >>> from search_stats import SearchStats
+        >>> stats = SearchStats()
+        >>> pruner = _Pruner([bool], stats)
+        >>> pruner(0, 0), pruner(1, 1), pruner(2, 1)
+        (False, True, True)
+        >>> sorted(stats.pruned.items())
+        [('bool', 1), ('dead', 1)]
+        """
+        if key in self._dead:
+            self._pruned["dead"] = self._pruned.get("dead", 0) + 1
+            return True
+        if self.check(puzzle):
+            self._dead.add(key)
+            return True
+        return False
+
+    def check(self, puzzle):
+        """
+        Return True iff one of the predicates of _Pruner self finds puzzle
+        dead, without consulting or adding to the cache.
+
+        @type self: _Pruner
+        @type puzzle: Puzzle
+        @rtype: bool
+        """
+        pruned = self._pruned
+        for name, check in self._checks:
+            if check(puzzle):
+                pruned[name] = pruned.get(name, 0) + 1
+                return True
+        return False
+
+    def rejects_root(self, puzzle):
+        """
+        Return True iff puzzle, the start of a search, is unsolved and
+        dead.
+
+        @type self: _Pruner
+        @type puzzle: Puzzle
+        @rtype: bool
+        """
+        return not puzzle.is_solved() and self(puzzle, puzzle.state_key())
+
+
+def _pruner(puzzle, prune, fail_fast, stats):
+    """
+    Return a _Pruner running puzzle's own fail_fast, if fail_fast is True
+    and puzzle's class overrides it, then the predicates in prune.  Return
+    None if there is nothing to run.
+
+    If puzzle.is_fail_fast_invariant(), fail_fast is run only if it already
+    rejects puzzle, the start of the search.
+
+    @type puzzle: Puzzle
+    @type prune: list[(Puzzle) -> bool] | None
+    @type fail_fast: bool
+    @type stats: SearchStats
+    @rtype: _Pruner | None
+    """
+    checks = []
+    if (fail_fast and type(puzzle).fail_fast is not Puzzle.fail_fast and
+            not (puzzle.is_fail_fast_invariant() and not puzzle.fail_fast())):
+        checks.append(_fail_fast)
+    if prune:
+        checks.extend(prune)
+    if not checks:
+        return None
+    return _Pruner(checks, stats)
+
+
+def _fail_fast(puzzle):
+    """
+    Return puzzle.fail_fast().
+
+    @type puzzle: Puzzle
+    @rtype: bool
+    """
+    return puzzle.fail_fast()
+
+
+def _start_stats(stats):
+    """
+    Return stats, started, or an untimed SearchStats if stats is None.
+
+    @type stats: SearchStats | None
+    @rtype: SearchStats
+    """
+    if stats is None:
+        return SearchStats(timing=False)
+    stats.start()
+    return stats
+
+
+def _phases(stats):
+    """
+    Return functions calling iter_extensions, is_solved and state_key on a
+    puzzle, timed by stats.
+
+    @type stats: SearchStats
+    @rtype: ((Puzzle, Container | None) -> Iterator[Puzzle],
+             (Puzzle) -> bool, (Puzzle) -> Hashable)
+    """
+    return (stats.iter_timer("extensions", _iter_extensions),
+            stats.timer("is_solved", _is_solved),
+            stats.timer("state_key", _state_key))
+
+
+def _iter_extensions(puzzle, seen):
+    """
+    Return puzzle.iter_extensions(seen).
+
+    @type puzzle: Puzzle
+    @type seen: Container | None
+    @rtype: Iterator[Puzzle]
+    """
+    return puzzle.iter_extensions(seen)
+
+
+def _is_solved(puzzle):
+    """
+    Return puzzle.is_solved().
+
+    @type puzzle: Puzzle
+    @rtype: bool
+    """
+    return puzzle.is_solved()
+
+
+def _state_key(puzzle):
+    """
+    Return puzzle.state_key().
+
+    @type puzzle: Puzzle
+    @rtype: Hashable
+    """
+    return puzzle.state_key()
 
 
 def path_ret(leaf):
@@ -68,24 +322,146 @@ def path_ret(leaf):
     >>> node == path_ret(node2)
     True
     """
-    if leaf.parent is None:
-        return leaf
-    else:
+    while leaf.parent is not None:
         parent = leaf.parent  # iteration starts in the tree.
         parent.children = [leaf]
-        return path_ret(parent)
+        leaf = parent
+    return leaf
+
+
+def iter_path(root):
+    """
+    Yield the puzzles on the path that starts at root and follows the
+    first child of each PuzzleNode, as the solvers return.
+
+    @type root: PuzzleNode | None
+    @rtype: Iterator[Puzzle]
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> x = WordLadderPuzzle('cost','cave',{'cast','case','cave'})
+    >>> [str(p) for p in iter_path(breadth_first_solve(x))][-2:]
+    ['case -> cave', 'cave -> cave']
+    >>> list(iter_path(None))
+    []
+    """
+    while root is not None:
+        yield root.puzzle
+        root = root.children[0] if root.children else None
+
+
+def _budgeted(solve):
+    """
+    Return solve, a solver taking stats and budget arguments, wrapped so
+    that when it is given a budget, its stats check the budget at every
+    expansion, and running out returns a BudgetExhausted.  If solve yields
+    its results, running out yields a BudgetExhausted after the results
+    found so far instead.
+
+    @type solve: (Puzzle, ...) -> PuzzleNode | None
+    @rtype: (Puzzle, ...) -> PuzzleNode | BudgetExhausted | None
+    """
+    signature = inspect.signature(solve)
+
+    def start(args, kwargs):
+        """
+        Return the arguments of a call of solve with args and kwargs, with
+        stats made to check the budget, which is started, or None if there
+        is no budget.
+
+        @type args: tuple
+        @type kwargs: dict
+        @rtype: dict | None
+        """
+        arguments = signature.bind(*args, **kwargs).arguments
+        budget = arguments.get("budget")
+        if budget is None:
+            return None
+        if arguments.get("stats") is None:
+            arguments["stats"] = SearchStats(timing=False)
+        arguments["stats"].budget = budget
+        budget.start()
+        return arguments
+
+    if inspect.isgeneratorfunction(solve):
+        @functools.wraps(solve)
+        def budgeted_iter(*args, **kwargs):
+            """
+            Yield the items of solve(*args, **kwargs), then a
+            BudgetExhausted if its budget runs out.
+
+            @rtype: Iterator
+            """
+            arguments = start(args, kwargs)
+            if arguments is None:
+                yield from solve(*args, **kwargs)
+                return
+            stats, budget = arguments["stats"], arguments["budget"]
+            try:
+                yield from solve(**arguments)
+            except OverBudget as over:
+                stats.finish(None)
+                yield BudgetExhausted(over.args[0], budget.best, stats)
+            finally:
+                stats.budget = None
+        return budgeted_iter
+
+    @functools.wraps(solve)
+    def budgeted(*args, **kwargs):
+        """
+        Return solve(*args, **kwargs), or a BudgetExhausted if its budget
+        runs out.
+
+        @rtype: PuzzleNode | BudgetExhausted | None
+        """
+        arguments = start(args, kwargs)
+        if arguments is None:
+            return solve(*args, **kwargs)
+        stats, budget = arguments["stats"], arguments["budget"]
+        try:
+            return solve(**arguments)
+        except OverBudget as over:
+            stats.finish(None)
+            return BudgetExhausted(over.args[0], budget.best, stats)
+        finally:
+            stats.budget = None
+    return budgeted
+
 
 # *** HELPER FUNCTIONS OVER ***
 
 
-def depth_first_solve(puzzle):
+@_budgeted
+def depth_first_solve(puzzle, stats=None, prune=None, fail_fast=True,
+                      closed=None, in_place=False, budget=None):
     """
     Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
     a solution, with each child containing an extension of the puzzle
     in its parent.  Return None if this is not possible.
 
+    If stats is given, it records the work done by the search.  Puzzles
+    for which puzzle.fail_fast (unless fail_fast is False) or any
+    predicate in prune returns True are not extended.
+
+    The states seen are remembered in closed, which defaults to a new set.
+    Pass an LRUClosedSet or BloomClosedSet from closed_set to bound the
+    memory this takes: the first may expand a state more than once, and
+    the second may skip a state it has never seen and miss a solution.
+
+    If in_place is True, the search changes a single copy of puzzle by
+    its moves instead of building extensions; see
+    in_place_depth_first_solve.
+
+    If budget is given, the search stops once it runs out or is cancelled,
+    and returns a BudgetExhausted holding the best puzzle it expanded.
+
     @type puzzle: Puzzle
-    @rtype: PuzzleNode | None
+    @type stats: SearchStats | None
+    @type prune: list[(Puzzle) -> bool] | None
+    @type fail_fast: bool
+    @type closed: set | ExactClosedSet | LRUClosedSet | BloomClosedSet | None
+    @type in_place: bool
+    @type budget: Budget | None
+    @rtype: PuzzleNode | BudgetExhausted | None
 
     >>> from word_ladder_puzzle import WordLadderPuzzle
     >>> x = WordLadderPuzzle('cost','cave',{'cast'})
@@ -104,19 +480,159 @@ def depth_first_solve(puzzle):
     cave -> cave
     <BLANKLINE>
     <BLANKLINE>
+    >>> from budget import Budget
+    >>> print(depth_first_solve(x, budget=Budget(max_nodes=1,
+    ...                                          track_best=True)))
+    budget exhausted: max_nodes, best state:
+    cast -> cave
+
+    """
+    if in_place:
+        return in_place_depth_first_solve(puzzle, stats, prune, fail_fast,
+                                          closed)
+    return helper_sol(puzzle, [], stats, prune, fail_fast, closed)
+
+
+@_budgeted
+def in_place_depth_first_solve(puzzle, stats=None, prune=None,
+                               fail_fast=True, closed=None, budget=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing a
+    solution, found by depth-first search, or None if there is none.
+
+    The search makes the moves of puzzle (see Puzzle.moves) on a single
+    copy of it and takes them back to backtrack, so it builds no puzzles
+    except those on the path it returns.  Each move is tried as soon as it
+    is found, so the search keeps only the moves still to try at each
+    depth.  The puzzles passed to prune, and to the callbacks of stats,
+    are that copy, and change as the search goes on.
+
+    stats, prune, fail_fast, closed and budget are as for
+    depth_first_solve.
 
+    @type puzzle: Puzzle
+    @type stats: SearchStats | None
+    @type prune: list[(Puzzle) -> bool] | None
+    @type fail_fast: bool
+    @type closed: set | ExactClosedSet | LRUClosedSet | BloomClosedSet | None
+    @type budget: Budget | None
+    @rtype: PuzzleNode | BudgetExhausted | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> x = WordLadderPuzzle('cost','cave',{'cast','case','cave'})
+    >>> [str(state)[:4] for state in iter_path(in_place_depth_first_solve(x))]
+    ['cost', 'cast', 'case', 'cave']
+    >>> print(in_place_depth_first_solve(WordLadderPuzzle('cost','cave',{})))
+    None
+    >>> print(x)
+    cost -> cave
+    """
+    stats = _start_stats(stats)
+    _, is_solved, state_key = _phases(stats)
+    moves = stats.timer("extensions", _moves)
+    pruner = _pruner(puzzle, prune, fail_fast, stats)
+    if is_solved(puzzle):
+        return stats.finish(_path_from_states([puzzle]))
+    state = puzzle.copy()
+    visit = set() if closed is None else closed
+    visit.add(state_key(state))
+    if pruner is not None and pruner.rejects_root(state):
+        return stats.finish(None)
+    # the moves made from puzzle to state, and those left to try after each,
+    # last first like depth_first_solve
+    path, stack = [], [reversed(moves(state))]
+    stats.expanded(state, 1, len(visit))
+    while stack:
+        move = next(stack[-1], None)
+        if move is None:
+            # every move from here has been tried, backtrack
+            stack.pop()
+            if path:
+                state.undo(path.pop())
+            continue
+        stats.nodes_generated += 1
+        state.apply(move)
+        key = state_key(state)
+        if key in visit:
+            stats.duplicates_rejected += 1
+            state.undo(move)
+            continue
+        # pruned states stay in visit, so they are never rechecked and
+        # need no cache of their own
+        visit.add(key)
+        if is_solved(state):
+            path.append(move)
+            return stats.finish(_path_from_states(_replay(puzzle, path)))
+        if pruner is not None and pruner.check(state):
+            state.undo(move)
+            continue
+        path.append(move)
+        stack.append(reversed(moves(state)))
+        stats.expanded(state, len(stack), len(visit))
+    return stats.finish(None)
+
+
+def _moves(puzzle):
+    """
+    Return puzzle.moves().
+
+    @type puzzle: Puzzle
+    @rtype: list
     """
-    return helper_sol(puzzle, [])
+    return puzzle.moves()
 
 
-def breadth_first_solve(puzzle):
+def _replay(puzzle, moves):
+    """
+    Return the list of puzzles reached from puzzle by making each of moves
+    in turn, starting with puzzle itself, which is left unchanged.
+
+    @type puzzle: Puzzle
+    @type moves: list
+    @rtype: list[Puzzle]
+    """
+    states, state = [puzzle], puzzle.copy()
+    for move in moves:
+        state.apply(move)
+        states.append(state.copy())
+    return states
+
+
+@_budgeted
+def breadth_first_solve(puzzle, stats=None, prune=None, fail_fast=True,
+                        closed=None, external=False, vectorised=False,
+                        budget=None):
     """
     Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
     a solution, with each child PuzzleNode containing an extension
     of the puzzle in its parent.  Return None if this is not possible.
 
+    If stats is given, it records the work done by the search.  Puzzles
+    for which puzzle.fail_fast (unless fail_fast is False) or any
+    predicate in prune returns True are not extended.
+
+    The states seen are remembered in closed, which defaults to a new set.
+    Pass an LRUClosedSet or BloomClosedSet from closed_set to bound the
+    memory this takes: the first may expand a state more than once, and
+    the second may skip a state it has never seen and miss a solution.
+
+    If external is true, the layers of the search are kept in files on
+    disk instead, in a temporary directory inside external if it is a
+    directory name; see external_bfs.  closed is then not used.
+
+    If vectorised is true, puzzles that implement swap_neighbours, like
+    MNPuzzle, are searched a whole layer at a time with NumPy, if it is
+    installed; see vector_bfs.  closed is then not used.
+
     @type puzzle: Puzzle
-    @rtype: PuzzleNode | None
+    @type stats: SearchStats | None
+    @type prune: list[(Puzzle) -> bool] | None
+    @type fail_fast: bool
+    @type closed: set | ExactClosedSet | LRUClosedSet | BloomClosedSet | None
+    @type external: bool | str
+    @type vectorised: bool
+    @type budget: Budget | None
+    @rtype: PuzzleNode | BudgetExhausted | None
 
     >>> from word_ladder_puzzle import WordLadderPuzzle
     >>> x = WordLadderPuzzle('cost','cave',{'cast'})
@@ -135,10 +651,984 @@ def breadth_first_solve(puzzle):
     cave -> cave
     <BLANKLINE>
     <BLANKLINE>
+    >>> from closed_set import LRUClosedSet
+    >>> breadth_first_solve(x, closed=LRUClosedSet(2)) == sol
+    True
 
     """
     # The blank line above is due to the return.
-    return helper_sol(puzzle, deque())
+    if external:
+        from external_bfs import external_breadth_first_solve
+        return external_breadth_first_solve(
+            puzzle, None if external is True else external, stats=stats,
+            prune=prune, fail_fast=fail_fast)
+    if vectorised and puzzle.swap_neighbours() is not None:
+        from vector_bfs import vectorised_breadth_first_solve
+        return vectorised_breadth_first_solve(puzzle, stats=stats,
+                                              prune=prune, fail_fast=fail_fast)
+    return helper_sol(puzzle, deque(), stats, prune, fail_fast, closed)
+
+
+@_budgeted
+def best_first_solve(puzzle, heuristic=None, weight=1, stats=None,
+                     prune=None, fail_fast=True, budget=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+    a solution, expanding puzzles in order of
+    (path length + weight * heuristic).  Return None if this is not
+    possible.
+
+    With the default weight of 1 this is A*, which returns a shortest path
+    whenever heuristic never overestimates.  A weight of 0 gives
+    uniform-cost search, and a larger weight trades optimality for speed.
+    stats, prune, fail_fast and budget are as for
+    depth_first_solve.
+
+    @type puzzle: Puzzle
+    @type heuristic: (Puzzle) -> int | float | None
+        defaults to Puzzle.heuristic
+    @type weight: int | float
+    @type stats: SearchStats | None
+    @type prune: list[(Puzzle) -> bool] | None
+    @type fail_fast: bool
+    @type budget: Budget | None
+    @rtype: PuzzleNode | BudgetExhausted | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> x = WordLadderPuzzle('cost','cave',{'cast'})
+    >>> print(best_first_solve(x))
+    None
+    >>> x = WordLadderPuzzle('cost','cave',{'cast','case','cave'})
+    >>> print(best_first_solve(x))
+    cost -> cave
+    <BLANKLINE>
+    cast -> cave
+    <BLANKLINE>
+    case -> cave
+    <BLANKLINE>
+    cave -> cave
+    <BLANKLINE>
+    <BLANKLINE>
+    """
+    if heuristic is None:
+        heuristic = _default_heuristic
+    stats = _start_stats(stats)
+    extensions, is_solved, state_key = _phases(stats)
+    pruner = _pruner(puzzle, prune, fail_fast, stats)
+    if pruner is not None and pruner.rejects_root(puzzle):
+        return stats.finish(None)
+    root_key = state_key(puzzle)
+    # best path length found so far to each state key
+    best = {root_key: 0}
+    # the counter breaks ties in insertion order, so nodes never compare
+    counter = 0
+    heap = [(weight * heuristic(puzzle), counter, 0, root_key,
+             _SearchNode(puzzle))]
+    while heap:
+        _, _, g, key, croot = heappop(heap)
+        if best[key] < g:
+            continue  # stale entry, a shorter path was pushed later
+        current = croot.puzzle
+        if is_solved(current):
+            return stats.finish(_path_to(croot))
+        g += 1
+        # a state in best may still be reached by a shorter path, so
+        # duplicates are not skipped inside iter_extensions
+        for extension in extensions(current, None):
+            stats.nodes_generated += 1
+            key = state_key(extension)
+            if pruner is not None and pruner(extension, key):
+                continue
+            if key not in best or g < best[key]:
+                best[key] = g
+                counter += 1
+                heappush(heap, (g + weight * heuristic(extension), counter,
+                                g, key, _SearchNode(extension, croot)))
+            else:
+                stats.duplicates_rejected += 1
+        stats.expanded(current, len(heap), len(best))
+    return stats.finish(None)
+
+
+@_budgeted
+def bidirectional_solve(puzzle, stats=None, prune=None, fail_fast=True,
+                        budget=None):
+    """
+    Return a shortest path from PuzzleNode(puzzle) to a PuzzleNode
+    containing a solution, searching breadth-first from both puzzle and
+    puzzle.goal_state() until the two searches meet.  Return None if this
+    is not possible.
+
+    Puzzles that are not reversible are solved by breadth_first_solve.
+    stats, prune, fail_fast and budget are as for
+    depth_first_solve; only the
+    search from puzzle is pruned, since every state the search from the
+    goal reaches can be extended to it.
+
+    @type puzzle: Puzzle
+    @type stats: SearchStats | None
+    @type prune: list[(Puzzle) -> bool] | None
+    @type fail_fast: bool
+    @type budget: Budget | None
+    @rtype: PuzzleNode | BudgetExhausted | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> x = WordLadderPuzzle('cost','cave',{'cast','cave'})
+    >>> print(bidirectional_solve(x))
+    None
+    >>> x = WordLadderPuzzle('cost','cave',{'cast','case','cave'})
+    >>> print(bidirectional_solve(x))
+    cost -> cave
+    <BLANKLINE>
+    cast -> cave
+    <BLANKLINE>
+    case -> cave
+    <BLANKLINE>
+    cave -> cave
+    <BLANKLINE>
+    <BLANKLINE>
+    """
+    if not puzzle.is_reversible():
+        return breadth_first_solve(puzzle, stats, prune, fail_fast)
+    stats = _start_stats(stats)
+    phases = _phases(stats)
+    state_key = phases[2]
+    pruner = _pruner(puzzle, prune, fail_fast, stats)
+    if pruner is not None and pruner.rejects_root(puzzle):
+        return stats.finish(None)
+    goal = puzzle.goal_state()
+    # each side maps state keys to (node, depth), where following the
+    # node's parents leads back to puzzle (forward) or goal (backward)
+    forward = {state_key(puzzle): (_SearchNode(puzzle), 0)}
+    backward = {state_key(goal): (_SearchNode(goal), 0)}
+    forward_layer, backward_layer = list(forward), list(backward)
+    meeting = _best_meeting(forward_layer, forward, backward)
+    while meeting is None and forward_layer and backward_layer:
+        # expand a whole layer of the smaller side
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer = _expand_layer(forward_layer, forward, backward,
+                                          stats, phases, pruner, True)
+            meeting = _best_meeting(forward_layer, forward, backward)
+        else:
+            backward_layer = _expand_layer(backward_layer, backward, forward,
+                                           stats, phases, None, False)
+            meeting = _best_meeting(backward_layer, backward, forward)
+    if meeting is None:
+        return stats.finish(None)
+    return stats.finish(_join_paths(forward[meeting][0],
+                                    backward[meeting][0]))
+
+
+def _expand_layer(layer, seen, other, stats, phases, pruner, forward):
+    """
+    Return the keys of the states first reached by extending the states
+    whose keys are in layer, recording them in seen.  other holds the
+    states seen by the search from the opposite end.  States rejected by
+    pruner are left out.  Only states of the forward search can be the
+    best partial state of a budget.
+
+    @type layer: list[Hashable]
+    @type seen: dict[Hashable, (_SearchNode, int)]
+    @type other: dict[Hashable, (_SearchNode, int)]
+    @type stats: SearchStats
+    @type phases: tuple
+        as returned by _phases(stats)
+    @type pruner: _Pruner | None
+    @type forward: bool
+    @rtype: list[Hashable]
+    """
+    extensions, _, state_key = phases
+    counted = stats.counting(seen)
+    next_layer = []
+    for key in layer:
+        croot, depth = seen[key]
+        for extension in extensions(croot.puzzle, counted):
+            stats.nodes_generated += 1
+            ex_key = state_key(extension)
+            if ex_key in seen:
+                stats.duplicates_rejected += 1
+            elif pruner is None or not pruner(extension, ex_key):
+                seen[ex_key] = (_SearchNode(extension, croot), depth + 1)
+                next_layer.append(ex_key)
+        stats.expanded(croot.puzzle, len(layer) + len(next_layer),
+                       len(seen) + len(other), forward)
+    return next_layer
+
+
+def _best_meeting(layer, seen, other):
+    """
+    Return the key in layer that is also in other with the shortest total
+    depth, or None if there is no such key.
+
+    @type layer: list[Hashable]
+    @type seen: dict[Hashable, (_SearchNode, int)]
+    @type other: dict[Hashable, (_SearchNode, int)]
+    @rtype: Hashable | None
+    """
+    meetings = [(seen[key][1] + other[key][1], i)
+                for i, key in enumerate(layer) if key in other]
+    if not meetings:
+        return None
+    return layer[min(meetings)[1]]
+
+
+def _join_paths(forward_node, backward_node):
+    """
+    Return the root of a path of PuzzleNodes following forward_node back to
+    its root, then backward_node forward to its root.
+
+    @type forward_node: _SearchNode
+    @type backward_node: _SearchNode
+    @rtype: PuzzleNode
+    """
+    states = _states_to(forward_node)
+    backward_node = backward_node.parent
+    while backward_node is not None:
+        states.append(backward_node.puzzle)
+        backward_node = backward_node.parent
+    return _path_from_states(states)
+
+
+@_budgeted
+def iterative_deepening_solve(puzzle, max_depth=None, cycle_check=None,
+                              stats=None, prune=None, fail_fast=True,
+                              budget=None):
+    """
+    Return a shortest path from PuzzleNode(puzzle) to a PuzzleNode
+    containing a solution, by depth-first searches with increasing depth
+    limits.  Return None if this is not possible within max_depth
+    extensions.
+
+    Only the current path is kept in memory.  A state is not extended to
+    any of its cycle_check closest ancestors, or to any ancestor at all if
+    cycle_check is None.  Without a full cycle check and a max_depth the
+    search never ends on an unsolvable puzzle.  stats, prune and fail_fast
+    are as for depth_first_solve; states found to be dead are remembered
+    across iterations.
+
+    @type puzzle: Puzzle
+    @type max_depth: int | None
+    @type cycle_check: int | None
+    @type stats: SearchStats | None
+    @type prune: list[(Puzzle) -> bool] | None
+    @type fail_fast: bool
+    @type budget: Budget | None
+    @rtype: PuzzleNode | BudgetExhausted | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> x = WordLadderPuzzle('cost','cave',{'cast'})
+    >>> print(iterative_deepening_solve(x))
+    None
+    >>> x = WordLadderPuzzle('cost','cave',{'cast','case','cave', 'cost'})
+    >>> print(iterative_deepening_solve(x, cycle_check=2))
+    cost -> cave
+    <BLANKLINE>
+    cast -> cave
+    <BLANKLINE>
+    case -> cave
+    <BLANKLINE>
+    cave -> cave
+    <BLANKLINE>
+    <BLANKLINE>
+    """
+    return _iterative_bounds(puzzle, _zero_heuristic, max_depth, cycle_check,
+                             stats, prune, fail_fast)
+
+
+@_budgeted
+def ida_star_solve(puzzle, heuristic=None, max_bound=None, cycle_check=None,
+                   stats=None, prune=None, fail_fast=True, budget=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing a
+    solution, by depth-first searches that cut off states whose
+    (path length + heuristic) exceeds an increasing bound.  Return None if
+    this is not possible within max_bound.
+
+    Like iterative_deepening_solve, only the current path is kept in memory
+    and cycle_check limits how many ancestors each state is compared with;
+    stats, prune, fail_fast and budget are as for
+    depth_first_solve.
+    The path is a shortest one whenever heuristic never overestimates.
+
+    @type puzzle: Puzzle
+    @type heuristic: (Puzzle) -> int | float | None
+        defaults to Puzzle.heuristic
+    @type max_bound: int | float | None
+    @type cycle_check: int | None
+    @type stats: SearchStats | None
+    @type prune: list[(Puzzle) -> bool] | None
+    @type fail_fast: bool
+    @type budget: Budget | None
+    @rtype: PuzzleNode | BudgetExhausted | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> x = WordLadderPuzzle('cost','cave',{'cast','case','cave'})
+    >>> print(ida_star_solve(x))
+    cost -> cave
+    <BLANKLINE>
+    cast -> cave
+    <BLANKLINE>
+    case -> cave
+    <BLANKLINE>
+    cave -> cave
+    <BLANKLINE>
+    <BLANKLINE>
+    """
+    if heuristic is None:
+        heuristic = _default_heuristic
+    return _iterative_bounds(puzzle, heuristic, max_bound, cycle_check, stats,
+                             prune, fail_fast)
+
+
+def _iterative_bounds(puzzle, heuristic, max_bound, cycle_check, stats,
+                      prune, fail_fast):
+    """
+    Return a path of PuzzleNodes from puzzle to a solution found by
+    bounded depth-first searches, raising the bound to the smallest cut-off
+    value after each failed search.  Return None once no state was cut off
+    or the bound exceeds max_bound.
+
+    @type puzzle: Puzzle
+    @type heuristic: (Puzzle) -> int | float
+    @type max_bound: int | float | None
+    @type cycle_check: int | None
+    @type stats: SearchStats | None
+    @type prune: list[(Puzzle) -> bool] | None
+    @type fail_fast: bool
+    @rtype: PuzzleNode | None
+    """
+    stats = _start_stats(stats)
+    phases = _phases(stats)
+    pruner = _pruner(puzzle, prune, fail_fast, stats)
+    if pruner is not None and pruner.rejects_root(puzzle):
+        return stats.finish(None)
+    bound = heuristic(puzzle)
+    while max_bound is None or bound <= max_bound:
+        path, bound = _bounded_dfs(puzzle, bound, heuristic, cycle_check,
+                                   stats, phases, pruner)
+        if path is not None:
+            return stats.finish(_path_from_states(path))
+        if bound is None:
+            break
+    return stats.finish(None)
+
+
+def _bounded_dfs(puzzle, bound, heuristic, cycle_check, stats, phases,
+                 pruner):
+    """
+    Return (path, bound) where path is the list of puzzles from puzzle to a
+    solution reached without (path length + heuristic) exceeding bound, or
+    (None, next_bound) where next_bound is the smallest value that exceeded
+    bound, or None if nothing did.
+
+    @type puzzle: Puzzle
+    @type bound: int | float
+    @type heuristic: (Puzzle) -> int | float
+    @type cycle_check: int | None
+    @type stats: SearchStats
+    @type phases: tuple
+        as returned by _phases(stats)
+    @type pruner: _Pruner | None
+    @rtype: (list[Puzzle] | None, int | float | None)
+    """
+    extensions, is_solved, state_key = phases
+    if is_solved(puzzle):
+        return [puzzle], bound
+    next_bound = None
+    path, keys = [puzzle], [state_key(puzzle)]
+    on_path = set(keys)
+    # with a full cycle check, extensions equal to an ancestor are skipped
+    # before they are built; on_path always holds the ancestors of the
+    # extensions an iterator yields, since deeper states are popped first
+    seen = stats.counting(on_path) if cycle_check is None else None
+    stack = [iter(extensions(puzzle, seen))]
+    stats.expanded(puzzle, 1, 1)
+    while stack:
+        extension = next(stack[-1], None)
+        if extension is None:
+            # every extension of path[-1] has been tried, backtrack
+            stack.pop()
+            path.pop()
+            on_path.discard(keys.pop())
+            continue
+        stats.nodes_generated += 1
+        key = state_key(extension)
+        if cycle_check is None:
+            if key in on_path:
+                stats.duplicates_rejected += 1
+                continue
+        elif cycle_check and key in keys[-cycle_check:]:
+            stats.duplicates_rejected += 1
+            continue
+        if pruner is not None and pruner(extension, key):
+            continue
+        f = len(path) + heuristic(extension)
+        if f > bound:
+            if next_bound is None or f < next_bound:
+                next_bound = f
+            continue
+        path.append(extension)
+        if is_solved(extension):
+            return path, bound
+        keys.append(key)
+        on_path.add(key)
+        stack.append(iter(extensions(extension, seen)))
+        stats.expanded(extension, len(stack), len(keys))
+    return None, next_bound
+
+
+@_budgeted
+def iter_solutions(puzzle, limit=None, paths=True, stats=None, prune=None,
+                   fail_fast=True, budget=None):
+    """
+    Yield every path of PuzzleNodes from PuzzleNode(puzzle) to a solution,
+    one at a time as they are found by depth-first search, or just the
+    solved puzzles if paths is False.  Stop after limit solutions, if limit
+    is given.
+
+    A path ends at the first solved puzzle on it, and never passes through
+    the same state twice.  Only the current path is kept, so the memory
+    used does not grow with the number of solutions.  stats, prune and
+    fail_fast are as for depth_first_solve.
+
+    If budget is given, the search stops once it runs out or is cancelled,
+    and the last item yielded is a BudgetExhausted.  Time spent by the
+    caller between items counts against its max_seconds.
+
+    @type puzzle: Puzzle
+    @type limit: int | None
+    @type paths: bool
+    @type stats: SearchStats | None
+    @type prune: list[(Puzzle) -> bool] | None
+    @type fail_fast: bool
+    @type budget: Budget | None
+    @rtype: Iterator[PuzzleNode | BudgetExhausted] |
+            Iterator[Puzzle | BudgetExhausted]
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> words = {'cast', 'case', 'cave', 'cose', 'cove'}
+    >>> x = WordLadderPuzzle('cost', 'cave', words)
+    >>> for path in iter_solutions(x):
+    ...     print([str(state)[:4] for state in iter_path(path)])
+    ['cost', 'cast', 'case', 'cose', 'cove', 'cave']
+    ['cost', 'cast', 'case', 'cave']
+    ['cost', 'cose', 'case', 'cave']
+    ['cost', 'cose', 'cove', 'cave']
+    >>> [str(state) for state in iter_solutions(x, limit=1, paths=False)]
+    ['cave -> cave']
+    >>> from budget import Budget
+    >>> [str(state) for state in iter_solutions(x, paths=False,
+    ...                                         budget=Budget(max_nodes=5))]
+    ['cave -> cave', 'cave -> cave', 'budget exhausted: max_nodes']
+    """
+    stats = _start_stats(stats)
+    extensions, is_solved, state_key = _phases(stats)
+    pruner = _pruner(puzzle, prune, fail_fast, stats)
+    found = 0
+    if limit is not None and limit <= 0:
+        stats.finish(None)
+        return
+    if is_solved(puzzle):
+        stats.finish(None)
+        stats.solved = True
+        yield _path_from_states([puzzle]) if paths else puzzle
+        return
+    if pruner is not None and pruner.rejects_root(puzzle):
+        stats.finish(None)
+        return
+    # an acyclic puzzle cannot reach its ancestors, so only cyclic ones pay
+    # for remembering the keys on the path
+    acyclic = puzzle.is_acyclic()
+    path, keys = [puzzle], [state_key(puzzle)]
+    on_path = set(keys)
+    seen = None if acyclic else stats.counting(on_path)
+    stack = [iter(extensions(puzzle, seen))]
+    stats.expanded(puzzle, 1, 1)
+    while stack:
+        extension = next(stack[-1], None)
+        if extension is None:
+            # every extension of path[-1] has been tried, backtrack
+            stack.pop()
+            path.pop()
+            on_path.discard(keys.pop())
+            continue
+        stats.nodes_generated += 1
+        key = state_key(extension)
+        if not acyclic and key in on_path:
+            stats.duplicates_rejected += 1
+            continue
+        if is_solved(extension):
+            found += 1
+            stats.solved = True
+            yield _path_from_states(path + [extension]) if paths else extension
+            if found == limit:
+                break
+            continue
+        if pruner is not None and pruner(extension, key):
+            continue
+        path.append(extension)
+        keys.append(key)
+        on_path.add(key)
+        stack.append(iter(extensions(extension, seen)))
+        stats.expanded(extension, len(stack), len(keys))
+    stats.finish(None)
+    stats.solved = found > 0
+
+
+@_budgeted
+def count_solutions(puzzle, limit=None, stats=None, prune=None,
+                    fail_fast=True, budget=None):
+    """
+    Return the number of paths iter_solutions(puzzle) would yield, or limit
+    if there are at least that many.
+
+    For an acyclic puzzle, the number of solutions from each state is
+    remembered by its state key and shared by every path reaching it, so
+    no path is built and each state is extended at most once.  Otherwise,
+    and with a limit, the solutions are enumerated.
+
+    If budget is given, the count stops once it runs out or is cancelled,
+    and a BudgetExhausted is returned instead.
+
+    @type puzzle: Puzzle
+    @type limit: int | None
+    @type stats: SearchStats | None
+    @type prune: list[(Puzzle) -> bool] | None
+    @type fail_fast: bool
+    @type budget: Budget | None
+    @rtype: int | BudgetExhausted
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> words = {'cast', 'case', 'cave', 'cose', 'cove'}
+    >>> count_solutions(WordLadderPuzzle('cost', 'cave', words))
+    4
+    >>> from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+    >>> grid = [list(row) for row in ["***", "*.*", "***"]]
+    >>> count_solutions(GridPegSolitairePuzzle(grid, {"*", ".", "#"}))
+    0
+    >>> grid = [list(row) for row in [".***", "****", "****"]]
+    >>> count_solutions(GridPegSolitairePuzzle(grid, {"*", ".", "#"}))
+    852
+    >>> from budget import Budget
+    >>> print(count_solutions(GridPegSolitairePuzzle(grid, {"*", ".", "#"}),
+    ...                       budget=Budget(max_nodes=10)))
+    budget exhausted: max_nodes
+    """
+    if limit is not None or not puzzle.is_acyclic():
+        count = 0
+        for _ in iter_solutions(puzzle, limit, False, stats, prune,
+                                fail_fast):
+            count += 1
+        return count
+    stats = _start_stats(stats)
+    extensions, is_solved, state_key = _phases(stats)
+    pruner = _pruner(puzzle, prune, fail_fast, stats)
+    if is_solved(puzzle):
+        stats.solved = True
+        stats.finish(None)
+        return 1
+    if pruner is not None and pruner.rejects_root(puzzle):
+        stats.finish(None)
+        return 0
+    # number of solutions from each state whose extensions are all counted
+    counts = {}
+    # each frame is [state key, iterator of extensions, solutions so far]
+    stack = [[state_key(puzzle), iter(extensions(puzzle, None)), 0]]
+    stats.expanded(puzzle, 1, 0)
+    while True:
+        frame = stack[-1]
+        extension = next(frame[1], None)
+        if extension is None:
+            stack.pop()
+            counts[frame[0]] = frame[2]
+            if not stack:
+                break
+            stack[-1][2] += frame[2]
+            continue
+        stats.nodes_generated += 1
+        key = state_key(extension)
+        if key in counts:
+            stats.duplicates_rejected += 1
+            frame[2] += counts[key]
+        elif is_solved(extension):
+            counts[key] = 1
+            frame[2] += 1
+        elif pruner is not None and pruner(extension, key):
+            counts[key] = 0
+        else:
+            stack.append([key, iter(extensions(extension, None)), 0])
+            stats.expanded(extension, len(stack), len(counts))
+    total = frame[2]
+    stats.finish(None)
+    stats.solved = total > 0
+    return total
+
+
+def _path_from_states(states):
+    """
+    Return the root of a path of PuzzleNodes containing the puzzles in
+    states, in order.
+
+    @type states: list[Puzzle]
+    @rtype: PuzzleNode
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> states = [WordLadderPuzzle('ab','bb',{'bb'}),
+    ...           WordLadderPuzzle('bb','bb',{'bb'})]
+    >>> print(_path_from_states(states))
+    ab -> bb
+    <BLANKLINE>
+    bb -> bb
+    <BLANKLINE>
+    <BLANKLINE>
+    """
+    root = leaf = PuzzleNode(states[0])
+    for state in states[1:]:
+        node = PuzzleNode(state, parent=leaf)
+        leaf.children = [node]
+        leaf = node
+    return root
+
+
+@_budgeted
+def parallel_breadth_first_solve(puzzle, workers=None, stats=None,
+                                  prune=None, fail_fast=True, budget=None):
+    """
+    Return a shortest path from PuzzleNode(puzzle) to a PuzzleNode
+    containing a solution, expanding each breadth-first layer across
+    worker processes.  Return None if this is not possible.
+
+    States are assigned to workers by a hash of their state key, and each
+    worker keeps the visited states of its own shard, together with the
+    key of the state they were reached from.  Only state keys travel
+    between processes, over a pipe from each worker to each other worker,
+    straight from the worker that generates them to the one that owns
+    them; the calling process only exchanges counts with the workers once
+    a layer.  With fewer than two workers, or for puzzles that do not
+    implement Puzzle.from_state_key, this is breadth_first_solve.
+
+    Work done in the workers is added to stats once per layer, which is
+    also when its on_progress is called and max_nodes is checked; on_expand
+    is not called and the phases are not timed.  The rest of budget is
+    checked every _POLL_SECONDS while waiting for the workers, so a long
+    layer can still run out of time or be cancelled.  prune and fail_fast
+    are as for depth_first_solve, and each worker keeps its own cache of
+    dead states.  Raise RuntimeError if a worker exits before the search
+    is done.
+
+    @type puzzle: Puzzle
+    @type workers: int | None
+        defaults to the number of CPUs
+    @type stats: SearchStats | None
+    @type prune: list[(Puzzle) -> bool] | None
+    @type fail_fast: bool
+    @type budget: Budget | None
+    @rtype: PuzzleNode | BudgetExhausted | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> x = WordLadderPuzzle('cost','cave',{'cast','case','cave'})
+    >>> print(parallel_breadth_first_solve(x, workers=2))
+    cost -> cave
+    <BLANKLINE>
+    cast -> cave
+    <BLANKLINE>
+    case -> cave
+    <BLANKLINE>
+    cave -> cave
+    <BLANKLINE>
+    <BLANKLINE>
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    root_key = puzzle.state_key()
+    try:
+        puzzle.from_state_key(root_key)
+    except NotImplementedError:
+        workers = 1
+    if workers < 2:
+        return breadth_first_solve(puzzle, stats, prune, fail_fast)
+    stats = _start_stats(stats)
+    pruner = _pruner(puzzle, prune, fail_fast, stats)
+    if pruner is not None and pruner.rejects_root(puzzle):
+        return stats.finish(None)
+    pipes, processes = [], []
+    # links[i][j] carries the keys shard i sends to shard j
+    links = [[multiprocessing.Pipe(duplex=False) if i != j else (None, None)
+              for j in range(workers)] for i in range(workers)]
+    try:
+        for shard in range(workers):
+            here, there = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_shard_worker,
+                args=(there, puzzle, shard, workers, prune, fail_fast,
+                      [links[i][shard][0] for i in range(workers)],
+                      [links[shard][j][1] for j in range(workers)]),
+                daemon=True)
+            process.start()
+            pipes.append(here)
+            processes.append(process)
+            # only the worker holds its ends, so they see EOF if it dies
+            there.close()
+            for i in range(workers):
+                if i != shard:
+                    links[i][shard][0].close()
+                    links[shard][i][1].close()
+        owner = pipes[_shard(root_key, workers)]
+        owner.send(("admit", [(root_key, None)]))
+        new = visited = _receive(owner, processes, stats)
+        while new:
+            for pipe in pipes:
+                pipe.send(("expand", None))
+            replies = [_receive(pipe, processes, stats) for pipe in pipes]
+            solved = [reply[0] for reply in replies if reply[0] is not None]
+            if solved:
+                return stats.finish(_parallel_path(puzzle, solved[0], pipes,
+                                                   processes, stats))
+            generated = dead = new = 0
+            for _, expanded, count, pruned, admitted in replies:
+                stats.nodes_expanded += expanded
+                generated += count
+                dead += sum(pruned.values())
+                new += admitted
+                for name in pruned:
+                    stats.pruned[name] = (stats.pruned.get(name, 0) +
+                                          pruned[name])
+            visited += new
+            stats.nodes_generated += generated
+            stats.duplicates_rejected += generated - new - dead
+            stats.peak_frontier = max(stats.peak_frontier, new)
+            stats.peak_visited = visited
+            if stats.budget is not None:
+                stats.budget.check(None, stats)
+            stats.progress()
+        return stats.finish(None)
+    finally:
+        for pipe in pipes:
+            try:
+                pipe.send(("stop", None))
+            except OSError:  # the worker has already exited
+                pass
+            pipe.close()
+        for process in processes:
+            # workers stopped mid-layer wait on each other, not on pipes
+            process.join(_POLL_SECONDS)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        for row in links:
+            for reader, writer in row:
+                if reader is not None:
+                    reader.close()
+                    writer.close()
+
+
+def _receive(pipe, processes, stats):
+    """
+    Return the next reply on pipe from a worker of
+    parallel_breadth_first_solve, checking the budget of stats and that
+    every worker in processes is still running while waiting.
+
+    @type pipe: multiprocessing.connection.Connection
+    @type processes: list[multiprocessing.Process]
+    @type stats: SearchStats
+    @rtype: Any
+    """
+    while not pipe.poll(_POLL_SECONDS):
+        if not all(process.is_alive() for process in processes):
+            _worker_failed(processes)
+        if stats.budget is not None:
+            stats.budget.check(None, stats)
+    try:
+        return pipe.recv()
+    except EOFError:
+        _worker_failed(processes)
+
+
+def _worker_failed(processes):
+    """
+    Raise RuntimeError naming the first of processes to fail, or the
+    first to exit, since the others stop when one of them does.
+
+    @type processes: list[multiprocessing.Process]
+    @rtype: None
+    """
+    for process in processes:
+        process.join(_POLL_SECONDS)
+    exits = [(process.exitcode in (None, 0), shard, process.exitcode)
+             for shard, process in enumerate(processes)
+             if not process.is_alive()]
+    _, shard, code = min(exits, default=(True, None, None))
+    raise RuntimeError("worker {} of parallel_breadth_first_solve exited "
+                       "with code {}".format(shard, code))
+
+
+def _shard(key, workers):
+    """
+    Return the index of the worker that owns state key, the same in every
+    process.
+
+    @type key: Hashable
+    @type workers: int
+    @rtype: int
+
+    >>> _shard("cost", 4) == _shard("cost", 4)
+    True
+    """
+    return zlib.crc32(repr(key).encode()) % workers
+
+
+def _shard_worker(conn, puzzle, shard, workers, prune, fail_fast, inboxes,
+                  outboxes):
+    """
+    Serve requests for shard number shard of a parallel breadth-first
+    search of puzzle until told to stop, pruning extensions as
+    depth_first_solve does with prune and fail_fast.
+
+    Requests are (command, argument) pairs received on conn:
+    "admit" records the (key, parent key) pairs in argument not already
+    visited, makes them the shard's next layer and replies with how many
+    there were; "expand" sends the (key, parent key) pairs of the
+    extensions of the layer to the shards that own them, on outboxes,
+    admits those received from every shard on inboxes, and replies with
+    (key of a solved state in the layer or None, the number of states
+    expanded, the number of extensions, the number pruned by each
+    predicate, the number admitted); "parent" replies with the parent key
+    of a visited key.
+
+    @type conn: multiprocessing.connection.Connection
+    @type puzzle: Puzzle
+    @type shard: int
+    @type workers: int
+    @type prune: list[(Puzzle) -> bool] | None
+    @type fail_fast: bool
+    @type inboxes: list[multiprocessing.connection.Connection | None]
+        the pipe from each shard, None for shard itself
+    @type outboxes: list[multiprocessing.connection.Connection | None]
+        the pipe to each shard, None for shard itself
+    @rtype: None
+    """
+    stats = SearchStats(timing=False)
+    pruner = _pruner(puzzle, prune, fail_fast, stats)
+    visited, layer = {}, []
+
+    def admit(pairs):
+        """
+        Record the pairs of (key, parent key) not already visited, and
+        return their keys.
+
+        @type pairs: Iterable[(Hashable, Hashable)]
+        @rtype: list[Hashable]
+        """
+        keys = []
+        for key, parent in pairs:
+            if key not in visited:
+                visited[key] = parent
+                keys.append(key)
+        return keys
+
+    command, argument = conn.recv()
+    while command != "stop":
+        if command == "admit":
+            layer = admit(argument)
+            conn.send(len(layer))
+        elif command == "expand":
+            # dicts drop duplicates before they are sent anywhere
+            boxes, solved = [{} for _ in range(workers)], None
+            expanded = generated = 0
+            stats.pruned.clear()
+            for key in layer:
+                current = puzzle.from_state_key(key)
+                if current.is_solved():
+                    solved = key
+                    break
+                expanded += 1
+                for extension in current.iter_extensions(visited):
+                    generated += 1
+                    ex_key = extension.state_key()
+                    if pruner is not None and pruner(extension, ex_key):
+                        continue
+                    owner = _shard(ex_key, workers)
+                    if owner != shard or ex_key not in visited:
+                        boxes[owner].setdefault(ex_key, key)
+            # every shard sends before it receives, so sending from a
+            # thread keeps full pipes from blocking each other
+            sender = threading.Thread(target=_send_boxes,
+                                      args=(outboxes, boxes))
+            sender.start()
+            layer = admit(boxes[shard].items())
+            try:
+                for inbox in inboxes:
+                    if inbox is not None:
+                        layer.extend(admit(inbox.recv()))
+            except EOFError:  # another shard has gone; so has the search
+                return
+            sender.join()
+            conn.send((solved, expanded, generated, stats.pruned,
+                       len(layer)))
+        elif command == "parent":
+            conn.send(visited[argument])
+        command, argument = conn.recv()
+
+
+def _send_boxes(outboxes, boxes):
+    """
+    Send the (key, parent key) pairs of each of boxes on the pipe of the
+    same index in outboxes, skipping those without a pipe, until one of
+    the pipes is closed.
+
+    @type outboxes: list[multiprocessing.connection.Connection | None]
+    @type boxes: list[dict]
+    @rtype: None
+    """
+    for outbox, box in zip(outboxes, boxes):
+        if outbox is not None:
+            try:
+                outbox.send(list(box.items()))
+            except OSError:  # the shard has gone, and _shard_worker stops
+                return
+
+
+def _parallel_path(puzzle, key, pipes, processes, stats):
+    """
+    Return the root of a path of PuzzleNodes from puzzle to the state with
+    key, following parent keys held by the shards behind pipes, run by
+    processes, as _receive does for stats.
+
+    @type puzzle: Puzzle
+    @type key: Hashable
+    @type pipes: list[multiprocessing.connection.Connection]
+    @type processes: list[multiprocessing.Process]
+    @type stats: SearchStats
+    @rtype: PuzzleNode
+    """
+    keys = []
+    while key is not None:
+        keys.append(key)
+        pipe = pipes[_shard(key, len(pipes))]
+        pipe.send(("parent", key))
+        key = _receive(pipe, processes, stats)
+    return _path_from_states([puzzle.from_state_key(key)
+                              for key in reversed(keys)])
+
+
+def _zero_heuristic(puzzle):
+    """
+    Return 0, the heuristic of an uninformed search.
+
+    @type puzzle: Puzzle
+    @rtype: int
+    """
+    return 0
+
+
+def _default_heuristic(puzzle):
+    """
+    Return puzzle.heuristic().
+
+    @type puzzle: Puzzle
+    @rtype: int | float
+    """
+    return puzzle.heuristic()
 
 # Class PuzzleNode helps build trees of PuzzleNodes that have
 # an arbitrary number of children, and a parent.
@@ -183,16 +1673,63 @@ class PuzzleNode:
         >>> pn1.__eq__(pn3)
         False
         """
-        return (type(self) == type(other) and
-                self.puzzle == other.puzzle and
-                all([x in self.children for x in other.children]) and
-                all([x in other.children for x in self.children]))
+        # walk down paths without recursion, so long solutions compare
+        node = self
+        while type(node) == type(other) and node.puzzle == other.puzzle:
+            if len(node.children) == 1 and len(other.children) == 1:
+                node, other = node.children[0], other.children[0]
+            else:
+                return (all([x in node.children for x in other.children]) and
+                        all([x in other.children for x in node.children]))
+        return False
 
     def __str__(self):
         """
         Return a human-readable string representing PuzzleNode self.
 
-        # doctest not feasible.
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> pn = PuzzleNode(WordLadderPuzzle("on", "no", {"on", "no"}))
+        >>> pn.children = [PuzzleNode(WordLadderPuzzle("no", "no", {"no"}))]
+        >>> print(pn)
+        on -> no
+        <BLANKLINE>
+        no -> no
+        <BLANKLINE>
+        <BLANKLINE>
+        """
+        return "".join(self.iter_str())
+
+    def iter_str(self):
         """
-        return "{}\n\n{}".format(self.puzzle,
-                                 "\n".join([str(x) for x in self.children]))
+        Yield the pieces of the human-readable string representing
+        PuzzleNode self, in order, without recursion.
+
+        @type self: PuzzleNode
+        @rtype: Iterator[str]
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                yield node
+                continue
+            yield "{}\n\n".format(node.puzzle)
+            # children are separated by newlines, and come off the stack
+            # in order
+            for i in range(len(node.children) - 1, -1, -1):
+                stack.append(node.children[i])
+                if i > 0:
+                    stack.append("\n")
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:2] == ["batch"]:
+        from batch import main
+        main(sys.argv[2:])
+    elif sys.argv[1:2] == ["serve"]:
+        from service import main
+        main(sys.argv[2:])
+    else:
+        import doctest
+        doctest.testmod()
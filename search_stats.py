@@ -0,0 +1,318 @@
+"""
+Counters, timings and progress callbacks for the searches in puzzle_tools
+"""
+from time import perf_counter
+
+# phases of a search whose time is measured separately
+PHASES = ("extensions", "is_solved", "state_key")
+
+
+class SearchStats:
+    """
+    A record of the work done by one search, which can also call back
+    into the caller as the search runs.
+
+    Pass a fresh SearchStats to a solver in puzzle_tools as its stats
+    argument; the solver resets and fills it in.
+
+    === Attributes ===
+    @type nodes_generated: int
+        number of extensions built
+    @type nodes_expanded: int
+        number of puzzles whose extensions were produced
+    @type duplicates_rejected: int
+        number of extensions dropped because their state was already seen,
+        including those Puzzle.iter_extensions skipped without building
+    @type pruned: dict[str, int]
+        number of extensions dropped by each prune predicate, by name, and
+        by the cache of states already proven dead, as "dead"
+    @type peak_frontier: int
+        largest number of puzzles waiting to be expanded at once
+    @type peak_visited: int
+        largest number of states remembered at once
+    @type times: dict[str, float]
+        seconds spent in each of PHASES, and in "bookkeeping", which is
+        everything else the search did
+    @type elapsed: float
+        seconds from the start of the search until it finished, or until
+        the last progress callback
+    @type solved: bool
+        whether the search found a solution
+    @type budget: Budget | None
+        limits checked at every expansion, set by the solvers in
+        puzzle_tools while they search with a budget
+    """
+
+    def __init__(self, on_expand=None, on_solution=None, on_progress=None,
+                 progress_interval=1000, timing=True):
+        """
+        Create a new SearchStats self.
+
+        on_expand(puzzle, self) is called for every expanded puzzle,
+        on_solution(node, self) with the root of the solution path when a
+        search succeeds, and on_progress(self) every progress_interval
+        expansions.  With timing False, the PHASES are not timed.
+
+        @type self: SearchStats
+        @type on_expand: (Puzzle, SearchStats) -> Any | None
+        @type on_solution: (PuzzleNode, SearchStats) -> Any | None
+        @type on_progress: (SearchStats) -> Any | None
+        @type progress_interval: int
+        @type timing: bool
+        @rtype: None
+        """
+        self.on_expand, self.on_solution = on_expand, on_solution
+        self.on_progress, self.progress_interval = (on_progress,
+                                                    progress_interval)
+        self.timing = timing
+        self.budget = None
+        self.start()
+
+    def start(self):
+        """
+        Reset the counters of SearchStats self and start its clock.
+
+        @type self: SearchStats
+        @rtype: None
+        """
+        self.nodes_generated = self.nodes_expanded = 0
+        self.duplicates_rejected = 0
+        self.pruned = {}
+        self.peak_frontier = self.peak_visited = 0
+        self.times = {phase: 0.0 for phase in PHASES + ("bookkeeping",)}
+        self.elapsed, self.solved = 0.0, False
+        self._started = perf_counter()
+
+    def timer(self, phase, func):
+        """
+        Return func, wrapped so that the time spent in it is added to phase
+        if SearchStats self is timing.
+
+        @type self: SearchStats
+        @type phase: str
+        @type func: (Puzzle, ...) -> Any
+        @rtype: (Puzzle, ...) -> Any
+
+        >>> stats = SearchStats()
+        >>> stats.timer("is_solved", abs)(-3)
+        3
+        >>> stats.times["is_solved"] > 0
+        True
+        """
+        if not self.timing:
+            return func
+        times = self.times
+
+        def timed(puzzle, *args):
+            """
+            Return func(puzzle, *args), timing the call.
+
+            @type puzzle: Puzzle
+            @rtype: Any
+            """
+            start = perf_counter()
+            try:
+                return func(puzzle, *args)
+            finally:
+                times[phase] += perf_counter() - start
+        return timed
+
+    def iter_timer(self, phase, func):
+        """
+        Return func, a function returning an iterator, wrapped so that the
+        time spent producing each item is added to phase if SearchStats
+        self is timing.
+
+        @type self: SearchStats
+        @type phase: str
+        @type func: (Puzzle, ...) -> Iterator
+        @rtype: (Puzzle, ...) -> Iterator
+
+        >>> stats = SearchStats()
+        >>> list(stats.iter_timer("extensions", range)(3))
+        [0, 1, 2]
+        >>> stats.times["extensions"] > 0
+        True
+        """
+        if not self.timing:
+            return func
+        times = self.times
+
+        def timed(puzzle, *args):
+            """
+            Yield the items of func(puzzle, *args), timing each step.
+
+            @type puzzle: Puzzle
+            @rtype: Iterator
+            """
+            start = perf_counter()
+            iterator = iter(func(puzzle, *args))
+            while True:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    times[phase] += perf_counter() - start
+                    return
+                times[phase] += perf_counter() - start
+                yield item
+                start = perf_counter()
+        return timed
+
+    def counting(self, seen):
+        """
+        Return seen, wrapped so that every membership test that succeeds
+        counts as a rejected duplicate, whether or not SearchStats self is
+        timing.
+
+        Searches pass this to Puzzle.iter_extensions, which drops
+        duplicates before the search sees them.
+
+        @type self: SearchStats
+        @type seen: Container
+        @rtype: Container
+
+        >>> stats = SearchStats()
+        >>> seen = stats.counting({"cost"})
+        >>> "cost" in seen, "cast" in seen
+        (True, False)
+        >>> stats.duplicates_rejected
+        1
+        >>> stats = SearchStats(timing=False)
+        >>> "cost" in stats.counting({"cost"}), stats.duplicates_rejected
+        (True, 1)
+        """
+        return _CountingContainer(seen, self)
+
+    def expanded(self, puzzle, frontier_size, visited_size, scored=True):
+        """
+        Record that puzzle is being expanded, with frontier_size puzzles
+        waiting and visited_size states remembered, and check the budget
+        of SearchStats self, if any.  With scored False, puzzle cannot be
+        the best partial state of the budget.
+
+        @type self: SearchStats
+        @type puzzle: Puzzle
+        @type frontier_size: int
+        @type visited_size: int
+        @type scored: bool
+        @rtype: None
+        """
+        self.nodes_expanded += 1
+        if frontier_size > self.peak_frontier:
+            self.peak_frontier = frontier_size
+        if visited_size > self.peak_visited:
+            self.peak_visited = visited_size
+        if self.budget is not None:
+            self.budget.check(puzzle, self, scored)
+        if self.on_expand is not None:
+            self.on_expand(puzzle, self)
+        if (self.on_progress is not None and
+                self.nodes_expanded % self.progress_interval == 0):
+            self.progress()
+
+    def progress(self):
+        """
+        Bring the elapsed time of SearchStats self up to date and call
+        on_progress.
+
+        @type self: SearchStats
+        @rtype: None
+        """
+        self.elapsed = perf_counter() - self._started
+        if self.on_progress is not None:
+            self.on_progress(self)
+
+    def finish(self, solution):
+        """
+        Record the end of the search that found solution, and return it.
+
+        @type self: SearchStats
+        @type solution: PuzzleNode | None
+        @rtype: PuzzleNode | None
+
+        >>> stats = SearchStats(timing=False)
+        >>> print(stats.finish(None))
+        None
+        >>> stats.solved
+        False
+        """
+        self.elapsed = perf_counter() - self._started
+        self.times["bookkeeping"] = max(
+            self.elapsed - sum([self.times[phase] for phase in PHASES]), 0.0)
+        self.solved = solution is not None
+        if solution is not None and self.on_solution is not None:
+            self.on_solution(solution, self)
+        return solution
+
+    def as_dict(self):
+        """
+        Return the counters and timings of SearchStats self as a dict.
+
+        @type self: SearchStats
+        @rtype: dict[str, Any]
+
+        >>> sorted(SearchStats().as_dict())[:3]
+        ['duplicates_rejected', 'elapsed', 'nodes_expanded']
+        """
+        return {"nodes_generated": self.nodes_generated,
+                "nodes_expanded": self.nodes_expanded,
+                "duplicates_rejected": self.duplicates_rejected,
+                "pruned": dict(self.pruned),
+                "peak_frontier": self.peak_frontier,
+                "peak_visited": self.peak_visited,
+                "times": dict(self.times),
+                "elapsed": self.elapsed,
+                "solved": self.solved}
+
+    def __str__(self):
+        """
+        Return a human-readable summary of SearchStats self.
+
+        @type self: SearchStats
+        @rtype: str
+
+        >>> print(SearchStats().__str__().splitlines()[0])
+        expanded 0, generated 0, duplicates 0, pruned 0
+        """
+        return ("expanded {}, generated {}, duplicates {}, pruned {}\n"
+                "peak frontier {}, peak visited {}\n"
+                "{:.3f}s: {}".format(
+                    self.nodes_expanded, self.nodes_generated,
+                    self.duplicates_rejected, sum(self.pruned.values()),
+                    self.peak_frontier,
+                    self.peak_visited, self.elapsed,
+                    ", ".join(["{} {:.3f}s".format(phase, seconds)
+                               for phase, seconds in self.times.items()])))
+
+
+class _CountingContainer:
+    """
+    A container that counts successful membership tests as duplicates
+    rejected by a search.
+    """
+    __slots__ = ("_seen", "_stats")
+
+    def __init__(self, seen, stats):
+        """
+        Create a new _CountingContainer self around seen, counting into
+        stats.
+
+        @type self: _CountingContainer
+        @type seen: Container
+        @type stats: SearchStats
+        @rtype: None
+        """
+        self._seen, self._stats = seen, stats
+
+    def __contains__(self, key):
+        """
+        Return whether key is in the container wrapped by self.
+
+        @type self: _CountingContainer
+        @type key: Hashable
+        @rtype: bool
+        """
+        if key in self._seen:
+            self._stats.duplicates_rejected += 1
+            return True
+        return False
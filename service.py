@@ -0,0 +1,477 @@
+"""
+A local solver service: clients connect over TCP or a Unix socket, send
+puzzle specs as JSON lines, and receive events about them as JSON lines.
+
+Specs are those of batch.py, and should carry an "id".  For each spec the
+service sends events with that id and an "event" of:
+
+    "queued"    once the spec is accepted
+    "started"   once a worker starts searching
+    "progress"  with the search's "stats" so far, at most every
+                progress_seconds
+    "result"    with the fields of batch.solve_spec, last of all
+
+Searches run in a pool of worker processes, at most concurrency at once;
+the rest wait without blocking the event loop.  Identical specs in flight
+at the same time share one search.
+
+Run it as python -m puzzle_tools serve; see main for its arguments.
+"""
+from batch import solve_spec, _init_worker as _init_batch_worker, BUDGETS
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+
+# the queue a worker process sends progress events on, as (token, stats)
+_progress = None
+
+
+def _init_worker(words_path, progress):
+    """
+    Set up a worker process to read its dictionary from words_path and send
+    progress events on the queue progress.
+
+    @type words_path: str
+    @type progress: multiprocessing.Queue
+    @rtype: None
+    """
+    global _progress
+    _init_batch_worker(words_path)
+    _progress = progress
+
+
+def _solve_job(token, spec, states, progress_seconds):
+    """
+    Return the result of solving spec in a worker process, sending its
+    stats on the progress queue, tagged with token, at most every
+    progress_seconds.
+
+    @type token: int
+    @type spec: dict[str, Any]
+    @type states: bool
+    @type progress_seconds: float
+    @rtype: dict[str, Any]
+    """
+    last = [perf_counter()]
+
+    def on_progress(stats):
+        """
+        Send the stats of the search for spec, unless some were sent less
+        than progress_seconds ago.
+
+        @type stats: SearchStats
+        @rtype: None
+        """
+        now = perf_counter()
+        if _progress is not None and now - last[0] >= progress_seconds:
+            last[0] = now
+            _progress.put((token, stats.as_dict()))
+    return solve_spec(spec, states, on_progress)
+
+
+class _Job:
+    """
+    A search in flight, and the listeners waiting on it.
+
+    === Attributes ===
+    @type token: int
+        identifies the job's progress events
+    @type listeners: list[(dict[str, Any]) -> Any]
+        called with each event of the search
+    @type started: bool
+        whether a worker is searching
+    @type future: asyncio.Future
+        the result of the search
+    """
+
+    def __init__(self, token, loop):
+        """
+        Create a new _Job self.
+
+        @type self: _Job
+        @type token: int
+        @type loop: asyncio.AbstractEventLoop
+        @rtype: None
+        """
+        self.token, self.listeners, self.started = token, [], False
+        self.future = loop.create_future()
+
+    def emit(self, event):
+        """
+        Send event to every listener of _Job self.
+
+        @type self: _Job
+        @type event: dict[str, Any]
+        @rtype: None
+        """
+        for listener in list(self.listeners):
+            listener(event)
+
+
+class SolverService:
+    """
+    Solves puzzle specs in a pool of worker processes for clients of an
+    asyncio server.
+
+    === Attributes ===
+    @type workers: int
+        number of worker processes
+    @type concurrency: int
+        most searches running at once
+    @type words: str
+        dictionary file for word ladders
+    @type defaults: dict[str, Any]
+        budget of a spec that does not give its own, by the names in BUDGETS
+    @type progress_seconds: float
+        least seconds between progress events of a search
+    @type states: bool
+        whether results hold the solution path
+    """
+
+    def __init__(self, workers=None, concurrency=None, words="words",
+                 max_nodes=None, max_seconds=None, max_memory=None,
+                 progress_seconds=0.5, states=False):
+        """
+        Create a new SolverService self; start must be awaited before it
+        solves anything.
+
+        @type self: SolverService
+        @type workers: int | None
+            defaults to the number of CPUs
+        @type concurrency: int | None
+            defaults to workers
+        @type words: str
+        @type max_nodes: int | None
+        @type max_seconds: float | None
+        @type max_memory: int | None
+        @type progress_seconds: float
+        @type states: bool
+        @rtype: None
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.concurrency = concurrency or self.workers
+        self.words, self.states = words, states
+        self.defaults = {"max_nodes": max_nodes, "max_seconds": max_seconds,
+                         "max_memory": max_memory}
+        self.progress_seconds = progress_seconds
+        self._jobs, self._tokens = {}, {}
+        self._counter = itertools.count()
+        self._pool = self._queue = self._reader = self._semaphore = None
+
+    async def start(self):
+        """
+        Start the worker processes of SolverService self.
+
+        @type self: SolverService
+        @rtype: None
+        """
+        self._queue = multiprocessing.Queue()
+        self._pool = ProcessPoolExecutor(self.workers,
+                                         initializer=_init_worker,
+                                         initargs=(self.words, self._queue))
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._reader = asyncio.ensure_future(self._read_progress())
+
+    async def close(self):
+        """
+        Stop the worker processes of SolverService self, once the searches
+        in flight finish.
+
+        @type self: SolverService
+        @rtype: None
+        """
+        if self._pool is None:
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._pool.shutdown)
+        self._queue.put(None)
+        await self._reader
+        self._queue.close()
+        self._pool = None
+
+    async def __aenter__(self):
+        """
+        Start SolverService self and return it.
+
+        @type self: SolverService
+        @rtype: SolverService
+        """
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        """
+        Close SolverService self.
+
+        @type self: SolverService
+        @rtype: None
+        """
+        await self.close()
+
+    async def _read_progress(self):
+        """
+        Pass the progress events sent by the workers of SolverService self to
+        the listeners of their jobs, until the queue sends None.
+
+        @type self: SolverService
+        @rtype: None
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await loop.run_in_executor(None, self._queue.get)
+            if item is None:
+                return
+            token, stats = item
+            job = self._tokens.get(token)
+            if job is not None:
+                job.emit({"event": "progress", "stats": stats})
+
+    async def solve(self, spec, listener=None):
+        """
+        Return the result of solving spec, as batch.solve_spec does, after
+        filling in missing budgets from the defaults of SolverService self.
+        listener is called with every event of the search but its result.
+        A search for an identical spec already in flight is shared.
+
+        @type self: SolverService
+        @type spec: dict[str, Any]
+        @type listener: (dict[str, Any]) -> Any | None
+        @rtype: dict[str, Any]
+        """
+        spec = dict(spec)
+        for budget in BUDGETS:
+            if spec.get(budget) is None:
+                spec[budget] = self.defaults[budget]
+        key = json.dumps({name: value for name, value in spec.items()
+                          if name != "id"}, sort_keys=True)
+        job = self._jobs.get(key)
+        if job is None:
+            job = _Job(next(self._counter), asyncio.get_running_loop())
+            self._jobs[key] = self._tokens[job.token] = job
+            asyncio.ensure_future(self._run(key, job, spec))
+        if listener is not None:
+            listener({"event": "queued"})
+            if job.started:
+                listener({"event": "started"})
+            job.listeners.append(listener)
+        try:
+            result = await asyncio.shield(job.future)
+        finally:
+            if listener is not None:
+                job.listeners.remove(listener)
+        return dict(result, id=spec.get("id"))
+
+    async def _run(self, key, job, spec):
+        """
+        Solve spec in a worker of SolverService self once fewer than
+        concurrency searches are running, and set the future of job, the
+        job of key, to its result, or cancel it if this is cancelled.
+
+        @type self: SolverService
+        @type key: str
+        @type job: _Job
+        @type spec: dict[str, Any]
+        @rtype: None
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            async with self._semaphore:
+                job.started = True
+                job.emit({"event": "started"})
+                result = await loop.run_in_executor(
+                    self._pool, _solve_job, job.token, spec, self.states,
+                    self.progress_seconds)
+        except asyncio.CancelledError:
+            # every caller waiting on job is cancelled with it
+            job.future.cancel()
+            raise
+        except Exception as error:
+            result = {"id": spec.get("id"), "type": spec.get("type"),
+                      "solved": False,
+                      "error": "{}: {}".format(type(error).__name__, error)}
+        finally:
+            del self._jobs[key]
+            del self._tokens[job.token]
+        job.future.set_result(result)
+
+    async def handle(self, reader, writer):
+        """
+        Serve one client connection of SolverService self: solve each spec
+        read from reader, as a JSON line, writing its events to writer.
+
+        @type self: SolverService
+        @type reader: asyncio.StreamReader
+        @type writer: asyncio.StreamWriter
+        @rtype: None
+        """
+        def send(event):
+            """
+            Write event to the client as a JSON line, unless it is gone.
+
+            @type event: dict[str, Any]
+            @rtype: None
+            """
+            if not writer.is_closing():
+                writer.write((json.dumps(event) + "\n").encode())
+
+        async def answer(spec):
+            """
+            Solve spec, sending its events to the client.
+
+            @type spec: dict[str, Any]
+            @rtype: None
+            """
+            request = spec.get("id")
+            result = await self.solve(
+                spec, lambda event: send(dict(event, id=request)))
+            send(dict(result, event="result"))
+            if not writer.is_closing():
+                await writer.drain()
+
+        tasks = set()
+        try:
+            async for line in reader:
+                if not line.strip():
+                    continue
+                try:
+                    spec = json.loads(line)
+                    if not isinstance(spec, dict):
+                        raise ValueError("a spec must be a JSON object")
+                except ValueError as error:
+                    send({"id": None, "event": "result", "solved": False,
+                          "error": "{}: {}".format(type(error).__name__,
+                                                   error)})
+                    continue
+                task = asyncio.ensure_future(answer(spec))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=0, path=None):
+        """
+        Return an asyncio server for SolverService self, listening on host
+        and port, or on the Unix socket at path if it is given.
+
+        @type self: SolverService
+        @type host: str
+        @type port: int
+        @type path: str | None
+        @rtype: asyncio.Server
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle, path=path)
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def request(specs, host="127.0.0.1", port=0, path=None):
+    """
+    Send specs to the service listening on host and port, or on the Unix
+    socket at path, and return every event it sends until each spec has
+    its result.
+
+    @type specs: list[dict[str, Any]]
+    @type host: str
+    @type port: int
+    @type path: str | None
+    @rtype: list[dict[str, Any]]
+
+    >>> spec = {"type": "word_ladder", "from_word": "cost",
+    ...         "to_word": "cave", "words": ["cast", "case", "cave"]}
+    >>> async def demo():
+    ...     async with SolverService(workers=1) as service:
+    ...         server = await service.serve()
+    ...         port = server.sockets[0].getsockname()[1]
+    ...         async with server:
+    ...             return await request([dict(spec, id=1), dict(spec, id=2),
+    ...                                   {"id": 3, "type": "chess"}],
+    ...                                  port=port)
+    >>> events = asyncio.run(demo())
+    >>> sorted([(e["id"], e["event"]) for e in events
+    ...         if e["event"] != "progress"])[:5] == [
+    ...     (1, 'queued'), (1, 'result'), (1, 'started'), (2, 'queued'),
+    ...     (2, 'result')]
+    True
+    >>> [(e["id"], e["moves"]) for e in events if e["event"] == "result"
+    ...  and e["solved"]] in ([(1, 3), (2, 3)], [(2, 3), (1, 3)])
+    True
+    >>> [e["error"] for e in events if e["id"] == 3 and e["event"] == "result"]
+    ["ValueError: unknown puzzle type 'chess'"]
+    """
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for spec in specs:
+            writer.write((json.dumps(spec) + "\n").encode())
+        await writer.drain()
+        events, waiting = [], len(specs)
+        while waiting:
+            line = await reader.readline()
+            if not line:
+                break
+            event = json.loads(line)
+            events.append(event)
+            if event["event"] == "result":
+                waiting -= 1
+        return events
+    finally:
+        writer.close()
+
+
+def main(argv=None):
+    """
+    Run a SolverService configured by the command-line arguments argv until
+    interrupted.
+
+    @type argv: list[str] | None
+        defaults to sys.argv[1:]
+    @rtype: None
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m puzzle_tools serve",
+        description="Solve puzzle specs sent as JSON lines over a socket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH",
+                        help="listen on this Unix socket instead")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="worker processes")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="most searches at once, by default --workers")
+    parser.add_argument("--words", default="words",
+                        help="dictionary file for word ladders")
+    parser.add_argument("--max-nodes", type=int, default=None)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    parser.add_argument("--max-memory", type=int, default=None,
+                        help="bytes of memory each worker may use")
+    parser.add_argument("--progress-seconds", type=float, default=0.5)
+    parser.add_argument("--states", action="store_true",
+                        help="include the solution path in each result")
+    args = parser.parse_args(argv)
+
+    async def run():
+        """
+        Serve until cancelled.
+
+        @rtype: None
+        """
+        async with SolverService(args.workers, args.concurrency, args.words,
+                                 args.max_nodes, args.max_seconds,
+                                 args.max_memory, args.progress_seconds,
+                                 args.states) as service:
+            server = await service.serve(args.host, args.port, args.unix)
+            async with server:
+                await server.serve_forever()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
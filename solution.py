@@ -0,0 +1,169 @@
+"""
+Solutions found by the solvers in puzzle_tools, as sequences of puzzles
+that can be written out a step at a time
+"""
+import json
+from puzzle_tools import iter_path
+
+
+class Solution:
+    """
+    A path of puzzles, each an extension of the one before, usually ending
+    in a solved puzzle.
+    """
+
+    def __init__(self, states):
+        """
+        Create a new Solution self passing through the puzzles in states.
+
+        @type self: Solution
+        @type states: Iterable[Puzzle]
+        @rtype: None
+        """
+        self._states = list(states)
+
+    def __iter__(self):
+        """
+        Return an iterator over the puzzles of Solution self, in order.
+
+        @type self: Solution
+        @rtype: Iterator[Puzzle]
+        """
+        return iter(self._states)
+
+    def __len__(self):
+        """
+        Return the number of puzzles in Solution self.
+
+        @type self: Solution
+        @rtype: int
+        """
+        return len(self._states)
+
+    def __getitem__(self, index):
+        """
+        Return the puzzle at position index of Solution self.
+
+        @type self: Solution
+        @type index: int
+        @rtype: Puzzle
+        """
+        return self._states[index]
+
+    def __eq__(self, other):
+        """
+        Return whether Solution self passes through the same puzzles as
+        other.
+
+        @type self: Solution
+        @type other: Solution | Any
+        @rtype: bool
+        """
+        return type(self) == type(other) and self._states == other._states
+
+    def moves(self):
+        """
+        Yield each step of Solution self, as a (puzzle, extension) pair.
+
+        @type self: Solution
+        @rtype: Iterator[(Puzzle, Puzzle)]
+
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> s = Solution([WordLadderPuzzle('ab','bb',{'bb'}),
+        ...               WordLadderPuzzle('bb','bb',{'bb'})])
+        >>> [(str(a), str(b)) for a, b in s.moves()]
+        [('ab -> bb', 'bb -> bb')]
+        """
+        for i in range(1, len(self._states)):
+            yield self._states[i - 1], self._states[i]
+
+    def iter_text(self):
+        """
+        Yield the pieces of the human-readable text of Solution self, the
+        same as that of the PuzzleNode path it was made from.
+
+        @type self: Solution
+        @rtype: Iterator[str]
+        """
+        for state in self._states:
+            yield "{}\n\n".format(state)
+
+    def write_text(self, stream):
+        """
+        Write the human-readable text of Solution self to stream, one
+        puzzle at a time.
+
+        @type self: Solution
+        @type stream: TextIO
+        @rtype: None
+
+        >>> import sys
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> s = Solution([WordLadderPuzzle('ab','bb',{'bb'}),
+        ...               WordLadderPuzzle('bb','bb',{'bb'})])
+        >>> s.write_text(sys.stdout)
+        ab -> bb
+        <BLANKLINE>
+        bb -> bb
+        <BLANKLINE>
+        """
+        for piece in self.iter_text():
+            stream.write(piece)
+
+    def iter_jsonl(self):
+        """
+        Yield one line of JSON for each puzzle of Solution self, holding
+        its position in the path and its human-readable text.
+
+        @type self: Solution
+        @rtype: Iterator[str]
+
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> s = Solution([WordLadderPuzzle('ab','bb',{'bb'})])
+        >>> print(next(s.iter_jsonl()), end="")
+        {"step": 0, "state": "ab -> bb"}
+        """
+        for i, state in enumerate(self._states):
+            yield json.dumps({"step": i, "state": str(state)}) + "\n"
+
+    def write_jsonl(self, stream):
+        """
+        Write Solution self to stream as JSON lines, one puzzle at a time.
+
+        @type self: Solution
+        @type stream: TextIO
+        @rtype: None
+        """
+        for line in self.iter_jsonl():
+            stream.write(line)
+
+    def __str__(self):
+        """
+        Return the human-readable text of Solution self.
+
+        @type self: Solution
+        @rtype: str
+        """
+        return "".join(self.iter_text())
+
+
+def from_node(root):
+    """
+    Return the Solution following root, a path of PuzzleNodes as returned
+    by the solvers in puzzle_tools, or None if root is None.
+
+    @type root: PuzzleNode | None
+    @rtype: Solution | None
+
+    >>> from puzzle_tools import breadth_first_solve
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> x = WordLadderPuzzle('cost','cave',{'cast','case','cave'})
+    >>> root = breadth_first_solve(x)
+    >>> str(from_node(root)) == str(root)
+    True
+    >>> print(from_node(None))
+    None
+    """
+    if root is None:
+        return None
+    return Solution(iter_path(root))
@@ -0,0 +1,356 @@
+"""
+A cache of solutions in front of the solvers of puzzle_tools, kept in
+memory and optionally in an SQLite file, so that repeated puzzles are
+answered without searching.
+"""
+from puzzle_tools import _path_from_states
+from budget import BudgetExhausted
+from collections import OrderedDict
+from time import time
+import ast
+import sqlite3
+
+
+class SolutionCache:
+    """
+    Solutions found by the solvers of puzzle_tools, by the state of the
+    puzzle solved, the state it works towards and the kind of solver.
+
+    Every state on a cached solution path is remembered too, so a puzzle
+    that is a step of a cached solution, such as a word on a cached word
+    ladder to the same word, is answered by the rest of that path.  All
+    puzzles of one type in a cache must follow the same rules: a cache of
+    word ladders holds ladders over a single dictionary, unless each
+    dictionary is given its own namespace.
+
+    The most recently used states are kept in memory, and, if a path is
+    given, all solutions are kept in an SQLite file there, dropping the
+    least recently used once they take more than max_bytes.  Paths are
+    written to the file as the repr of their state keys and read back with
+    ast.literal_eval, so a file from elsewhere cannot run code; solutions
+    whose state keys are not such literals stay in memory only.
+
+    === Attributes ===
+    @type capacity: int
+        most states kept in memory
+    @type max_bytes: int
+        most bytes of solution paths kept in the file
+    @type namespace: str
+        distinguishes puzzles whose state does not capture all their rules
+    @type hits: int
+        lookups answered from memory
+    @type disk_hits: int
+        lookups answered from the file
+    @type misses: int
+        lookups not answered
+    """
+
+    def __init__(self, capacity=4096, path=None, max_bytes=64 << 20,
+                 namespace=""):
+        """
+        Create a new SolutionCache self, kept in the SQLite file at path, if
+        it is not None.
+
+        @type self: SolutionCache
+        @type capacity: int
+        @type path: str | None
+        @type max_bytes: int
+        @type namespace: str
+        @rtype: None
+        """
+        self.capacity, self.max_bytes = capacity, max_bytes
+        self.namespace = namespace
+        self.hits = self.disk_hits = self.misses = 0
+        # key -> (state keys of a solution path, position of key's state)
+        self._memory = OrderedDict()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            self._db.executescript(
+                "CREATE TABLE IF NOT EXISTS paths (id INTEGER PRIMARY KEY, "
+                "states TEXT, size INTEGER, used REAL);"
+                "CREATE INDEX IF NOT EXISTS paths_used ON paths (used);"
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, "
+                "path INTEGER, position INTEGER);"
+                "CREATE INDEX IF NOT EXISTS entries_path ON entries (path);")
+            self._bytes = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM paths").fetchone()[0]
+
+    def close(self):
+        """
+        Close the file of SolutionCache self, if any.
+
+        @type self: SolutionCache
+        @rtype: None
+        """
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        """
+        Return SolutionCache self.
+
+        @type self: SolutionCache
+        @rtype: SolutionCache
+        """
+        return self
+
+    def __exit__(self, *exc_info):
+        """
+        Close SolutionCache self.
+
+        @type self: SolutionCache
+        @rtype: None
+        """
+        self.close()
+
+    def key(self, puzzle, kind, state_key=None):
+        """
+        Return the key of SolutionCache self for solutions of puzzle, or of
+        the puzzle like it in the state state_key, by the solver kind.
+
+        @type self: SolutionCache
+        @type puzzle: Puzzle
+        @type kind: str
+        @type state_key: Hashable | None
+        @rtype: tuple
+
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> x = WordLadderPuzzle("cost", "cave", {"cast", "case", "cave"})
+        >>> SolutionCache().key(x, "breadth_first_solve")
+        ('WordLadderPuzzle', '', 'breadth_first_solve', 'cost', 'cave')
+        """
+        try:
+            goal = puzzle.goal_state().state_key()
+        except NotImplementedError:
+            goal = None
+        if state_key is None:
+            state_key = puzzle.state_key()
+        return (type(puzzle).__name__, self.namespace, kind, state_key, goal)
+
+    def lookup(self, puzzle, kind):
+        """
+        Return whether SolutionCache self holds the outcome of solving puzzle
+        by the solver kind, and that outcome: the root of a solution path,
+        or None if the solver found none.
+
+        @type self: SolutionCache
+        @type puzzle: Puzzle
+        @type kind: str
+        @rtype: (bool, PuzzleNode | None)
+        """
+        key = self.key(puzzle, kind)
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+        elif self._db is not None:
+            row = self._db.execute(
+                "SELECT paths.id, states, position FROM entries JOIN paths "
+                "ON entries.path = paths.id WHERE key = ?",
+                (repr(key),)).fetchone()
+            states = None if row is None else _load(row[1])
+            if states is not None:
+                with self._db:
+                    self._db.execute("UPDATE paths SET used = ? WHERE id = ?",
+                                     (time(), row[0]))
+                entry = (states, row[2])
+                self._remember(key, entry)
+                self.disk_hits += 1
+        if entry is None:
+            self.misses += 1
+            return False, None
+        states, position = entry
+        if not states:
+            return True, None
+        return True, _path_from_states(
+            [puzzle] + [puzzle.from_state_key(state)
+                        for state in states[position + 1:]])
+
+    def store(self, puzzle, kind, solution):
+        """
+        Remember in SolutionCache self that the solver kind found solution,
+        the root of a solution path or None, for puzzle.
+
+        @type self: SolutionCache
+        @type puzzle: Puzzle
+        @type kind: str
+        @type solution: PuzzleNode | None
+        @rtype: None
+        """
+        states = []
+        node = solution
+        while node is not None:
+            states.append(node.puzzle.state_key())
+            node = node.children[0] if node.children else None
+        states = tuple(states)
+        keys = ([self.key(puzzle, kind, state) for state in states]
+                if states else [self.key(puzzle, kind)])
+        for position, key in enumerate(keys):
+            self._remember(key, (states, position))
+        text = repr(states)
+        if self._db is None or _load(text) != states:
+            return
+        size = len(text.encode())
+        keys = [repr(key) for key in keys]
+        with self._db:
+            # paths whose entries are about to be replaced by this one
+            replaced = set()
+            for key in keys:
+                row = self._db.execute("SELECT path FROM entries "
+                                       "WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    replaced.add(row[0])
+            path = self._db.execute(
+                "INSERT INTO paths (states, size, used) VALUES (?, ?, ?)",
+                (text, size, time())).lastrowid
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                [(key, path, position) for position, key in enumerate(keys)])
+            self._bytes += size
+            for old in replaced:
+                self._drop_if_unused(old)
+            self._evict()
+
+    def _drop_if_unused(self, path):
+        """
+        Delete the path with id path from the file of SolutionCache self if
+        no entry refers to it any more.
+
+        @type self: SolutionCache
+        @type path: int
+        @rtype: None
+        """
+        if self._db.execute("SELECT 1 FROM entries WHERE path = ? LIMIT 1",
+                            (path,)).fetchone() is not None:
+            return
+        row = self._db.execute("SELECT size FROM paths WHERE id = ?",
+                               (path,)).fetchone()
+        if row is not None:
+            self._db.execute("DELETE FROM paths WHERE id = ?", (path,))
+            self._bytes -= row[0]
+
+    def _remember(self, key, entry):
+        """
+        Keep entry for key in the memory of SolutionCache self, forgetting
+        the least recently used entry if it is full.
+
+        @type self: SolutionCache
+        @type key: tuple
+        @type entry: (tuple, int)
+        @rtype: None
+        """
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        """
+        Delete the least recently used paths from the file of SolutionCache
+        self until they fit in max_bytes.
+
+        @type self: SolutionCache
+        @rtype: None
+        """
+        while self._bytes > self.max_bytes:
+            row = self._db.execute("SELECT id, size FROM paths "
+                                   "ORDER BY used LIMIT 1").fetchone()
+            if row is None:
+                return
+            self._db.execute("DELETE FROM entries WHERE path = ?", (row[0],))
+            self._db.execute("DELETE FROM paths WHERE id = ?", (row[0],))
+            self._bytes -= row[1]
+
+    def solve(self, puzzle, solver, **kwargs):
+        """
+        Return the outcome of solver(puzzle, **kwargs) from SolutionCache
+        self, searching and remembering it only if it is not there.  A
+        search stopped by its budget is not remembered.
+
+        Outcomes are kept apart by the keyword arguments that can change
+        them, such as fail_fast; stats and budget are ignored.  If one of
+        kwargs is not a plain value, such as a list of prune predicates,
+        the search is run without the cache.
+
+        @type self: SolutionCache
+        @type puzzle: Puzzle
+        @type solver: (Puzzle, ...) -> PuzzleNode | BudgetExhausted | None
+        @rtype: PuzzleNode | BudgetExhausted | None
+
+        >>> from puzzle_tools import breadth_first_solve
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> words = {"cast", "case", "cave"}
+        >>> cache = SolutionCache()
+        >>> x = WordLadderPuzzle("cost", "cave", words)
+        >>> print(cache.solve(x, breadth_first_solve).children[0].puzzle)
+        cast -> cave
+        >>> y = WordLadderPuzzle("case", "cave", words)
+        >>> print(cache.solve(y, breadth_first_solve).children[0].puzzle)
+        cave -> cave
+        >>> cache.hits, cache.misses
+        (1, 1)
+        >>> print(cache.solve(x, breadth_first_solve, fail_fast=False,
+        ...                   prune=[lambda puzzle: True]))
+        None
+        >>> print(cache.solve(x, breadth_first_solve).children[0].puzzle)
+        cast -> cave
+        """
+        kind = _kind(solver, kwargs)
+        if kind is None:
+            return solver(puzzle, **kwargs)
+        found, solution = self.lookup(puzzle, kind)
+        if found:
+            return solution
+        solution = solver(puzzle, **kwargs)
+        if not isinstance(solution, BudgetExhausted):
+            self.store(puzzle, kind, solution)
+        return solution
+
+
+def _load(text):
+    """
+    Return the tuple of state keys written as text by SolutionCache.store,
+    or None if text is not such a literal.
+
+    @type text: str | bytes
+    @rtype: tuple | None
+
+    >>> _load("('cost', b'ab', (1, 2))")
+    ('cost', b'ab', (1, 2))
+    >>> print(_load("__import__('os').system('true')"))
+    None
+    """
+    try:
+        states = ast.literal_eval(text)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return None
+    return states if isinstance(states, tuple) else None
+
+
+def _kind(solver, kwargs):
+    """
+    Return the kind of solver run with kwargs, naming solver and those of
+    kwargs that can change its outcome, or None if one of them is not a
+    plain value that can be named.
+
+    @type solver: (Puzzle, ...) -> PuzzleNode | BudgetExhausted | None
+    @type kwargs: dict[str, Any]
+    @rtype: str | None
+
+    >>> from puzzle_tools import breadth_first_solve
+    >>> _kind(breadth_first_solve, {"fail_fast": False, "stats": None})
+    'breadth_first_solve,fail_fast=False'
+    >>> print(_kind(breadth_first_solve, {"prune": [bool]}))
+    None
+    """
+    kind = [solver.__name__]
+    for name in sorted(kwargs):
+        value = kwargs[name]
+        if name in ("stats", "budget") or value is None:
+            continue
+        if not isinstance(value, (bool, int, float, str)):
+            return None
+        kind.append("{}={!r}".format(name, value))
+    return ",".join(kind)
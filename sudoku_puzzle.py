@@ -18,7 +18,8 @@ class SudokuPuzzle(Puzzle):
         """
         assert n > 0
         assert round(n ** (1 / 2)) * round(n ** (1 / 2)) == n
-        assert all([d in (symbol_set | {"*"}) for d in symbols])
+        allowed = symbol_set | {"*"}
+        assert all([d in allowed for d in symbols])
         assert len(symbol_set) == n
         assert len(symbols) == n ** 2
         self._n, self._symbols, self._symbol_set = n, symbols, symbol_set
@@ -56,6 +57,51 @@ class SudokuPuzzle(Puzzle):
                 self._n == other._n and self._symbols == other._symbols and
                 self._symbol_set == other._symbol_set)
 
+    def state_key(self):
+        """
+        Return a compact, hashable key for the grid of SudokuPuzzle self.
+
+        @type self: SudokuPuzzle
+        @rtype: tuple[str]
+
+        >>> grid = ["A", "B", "C", "D"]
+        >>> grid += ["D", "C", "B", "A"]
+        >>> grid += ["*", "D", "*", "*"]
+        >>> grid += ["*", "*", "*", "*"]
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+        >>> len(s.state_key())
+        16
+        """
+        return tuple(self._symbols)
+
+    def from_state_key(self, key):
+        """
+        Return a SudokuPuzzle of the same size and symbols as SudokuPuzzle
+        self, with the grid key.
+
+        @type self: SudokuPuzzle
+        @type key: tuple[str]
+        @rtype: SudokuPuzzle
+
+        >>> grid = ["A", "B", "C", "D"]
+        >>> grid += ["D", "C", "B", "A"]
+        >>> grid += ["*", "D", "*", "*"]
+        >>> grid += ["*", "*", "*", "*"]
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+        >>> s.from_state_key(s.state_key()) == s
+        True
+        """
+        return SudokuPuzzle(self._n, list(key), self._symbol_set)
+
+    def __hash__(self):
+        """
+        Return a hash of SudokuPuzzle self.
+
+        @type self: SudokuPuzzle
+        @rtype: int
+        """
+        return hash(self.state_key())
+
     def __str__(self):
         """
         Return a human-readable string representation of SudokuPuzzle self.
@@ -140,6 +186,31 @@ class SudokuPuzzle(Puzzle):
                       self._subsquare_set(i) ==
                       self._symbol_set) for i in range(n ** 2)]))
 
+    def is_acyclic(self):
+        """
+        Return True, since every extension fills an empty cell.
+
+        @type self: SudokuPuzzle
+        @rtype: bool
+        """
+        return True
+
+    def heuristic(self):
+        """
+        Return the number of empty positions in SudokuPuzzle self.
+
+        @type self: SudokuPuzzle
+        @rtype: int
+
+        >>> grid = ["A", "B", "C", "D"]
+        >>> grid += ["D", "C", "B", "A"]
+        >>> grid += ["*", "D", "*", "*"]
+        >>> grid += ["*", "*", "*", "*"]
+        >>> SudokuPuzzle(4, grid, {"A", "B", "C", "D"}).heuristic()
+        7
+        """
+        return self._symbols.count("*")
+
     def extensions(self):
         """
         Return list of extensions of SudokuPuzzle self.
@@ -162,25 +233,103 @@ class SudokuPuzzle(Puzzle):
         >>> all([s in L1 for s in L2])
         True
         """
+        return list(self.iter_extensions())
+
+    def iter_extensions(self, seen=None):
+        """
+        Yield the extensions of SudokuPuzzle self, skipping those whose
+        state_key is in seen.
+
+        @type self: SudokuPuzzle
+        @type seen: Container | None
+        @rtype: Iterator[SudokuPuzzle]
+
+        >>> grid = ["A", "B", "C", "D"]
+        >>> grid += ["C", "D", "A", "B"]
+        >>> grid += ["B", "A", "D", "C"]
+        >>> grid += ["D", "C", "B", "*"]
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+        >>> len(list(s.iter_extensions()))
+        1
+        >>> len(list(s.iter_extensions({tuple(grid[:-1] + ["A"])})))
+        0
+        """
         # convenient names
         symbols, symbol_set, n = self._symbols, self._symbol_set, self._n
         if "*" not in symbols:
-            # return an empty list
-            return [_ for _ in []]
-        else:
-            # position of first empty position
-            i = symbols.index("*")
-            # allowed symbols at position i
-            # A | B == A.union(B)
-            allowed_symbols = (self._symbol_set -
-                               (self._row_set(i) |
-                                self._column_set(i) |
-                                self._subsquare_set(i)))
-            # list of SudokuPuzzles with each legal digit at position i
-            return (
-                [SudokuPuzzle(n,
-                 symbols[:i] + [d] + symbols[i + 1:], symbol_set)
-                 for d in allowed_symbols])
+            return
+        # position of first empty position
+        i = symbols.index("*")
+        # allowed symbols at position i
+        # A | B == A.union(B)
+        allowed_symbols = (self._symbol_set -
+                           (self._row_set(i) |
+                            self._column_set(i) |
+                            self._subsquare_set(i)))
+        # SudokuPuzzles with each legal digit at position i
+        for d in allowed_symbols:
+            new_symbols = symbols[:i] + [d] + symbols[i + 1:]
+            if seen is None or tuple(new_symbols) not in seen:
+                yield SudokuPuzzle(n, new_symbols, symbol_set)
+
+    def moves(self):
+        """
+        Return the moves of SudokuPuzzle self, as (position, symbol) pairs
+        filling its first empty position.
+
+        @type self: SudokuPuzzle
+        @rtype: list[(int, str)]
+
+        >>> grid = ["A", "B", "C", "D"]
+        >>> grid += ["C", "D", "A", "B"]
+        >>> grid += ["B", "A", "D", "C"]
+        >>> grid += ["D", "C", "B", "*"]
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+        >>> s.moves()
+        [(15, 'A')]
+        >>> s.apply((15, 'A'))
+        >>> s.is_solved()
+        True
+        >>> s.undo((15, 'A'))
+        >>> s.moves()
+        [(15, 'A')]
+        """
+        symbols = self._symbols
+        if "*" not in symbols:
+            return []
+        i = symbols.index("*")
+        return [(i, d) for d in (self._symbol_set -
+                                 (self._row_set(i) | self._column_set(i) |
+                                  self._subsquare_set(i)))]
+
+    def apply(self, move):
+        """
+        Fill the position of move with its symbol, in SudokuPuzzle self.
+
+        @type self: SudokuPuzzle
+        @type move: (int, str)
+        @rtype: None
+        """
+        self._symbols[move[0]] = move[1]
+
+    def undo(self, move):
+        """
+        Empty the position filled by move in SudokuPuzzle self.
+
+        @type self: SudokuPuzzle
+        @type move: (int, str)
+        @rtype: None
+        """
+        self._symbols[move[0]] = "*"
+
+    def copy(self):
+        """
+        Return a SudokuPuzzle with a copy of the grid of SudokuPuzzle self.
+
+        @type self: SudokuPuzzle
+        @rtype: SudokuPuzzle
+        """
+        return SudokuPuzzle(self._n, self._symbols[:], self._symbol_set)
 
     # override fail_fast
     # Notice that it is not possible to complete a sudoku puzzle if there
@@ -206,21 +355,33 @@ class SudokuPuzzle(Puzzle):
         >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
         >>> s.fail_fast()
         False
+        >>> grid = ["A", "B", "C", "*"]
+        >>> grid += ["*", "*", "*", "D"]
+        >>> grid += ["*", "*", "*", "*"]
+        >>> grid += ["*", "*", "*", "*"]
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+        >>> s.fail_fast()
+        True
 
         """
-        lst = []
-        for x in range(len(self._symbols)):
-            Y = self._row_set(x)
-            Z = self._column_set(x)  # assigning columns
-            T = self._subsquare_set(x)
-
-            if self._symbols[x] == '*':
-                seta = self._symbol_set.copy()
-                y = seta - Y  # removing row set from the copy of the symbol set
-                z = y - Z  # removing column set from y
-                t = z - T  # removing subsquare set from z
-                lst.append((len(t) == 0))
-        return all(lst)
+        # convenient names
+        n, symbols = self._n, self._symbols
+        ss = round(n ** (1 / 2))
+        # symbols used in each row, column and subsquare, found in one pass
+        rows = [set(symbols[r * n:(r + 1) * n]) for r in range(n)]
+        columns = [set(symbols[c::n]) for c in range(n)]
+        subsquares = [set() for _ in range(n)]
+        for m in range(n ** 2):
+            row, col = m // n, m % n
+            subsquares[(row // ss) * ss + col // ss].add(symbols[m])
+        # one open position with no symbols available is enough
+        for m in range(n ** 2):
+            if symbols[m] == '*':
+                row, col = m // n, m % n
+                if not (self._symbol_set - rows[row] - columns[col] -
+                        subsquares[(row // ss) * ss + col // ss]):
+                    return True
+        return False
 
     def _row_set(self, m):
         #
@@ -0,0 +1,249 @@
+"""
+Breadth-first search that extends a whole layer of states at once with
+NumPy, for puzzles whose every move swaps the blank with a neighbouring
+position, like MNPuzzle; see Puzzle.swap_neighbours.
+
+A layer is a 2-D array of uint8, one row per state as encoded by
+Puzzle.state_bytes.  For each direction the blank can move in, the
+extensions of the whole layer are made by one gather and two scatters.
+Each state is then packed into a single integer key, or viewed as one
+opaque value if its codes do not fit in 64 bits, and the keys are sorted
+to drop repeats and those of earlier layers.  Reversible puzzles only need
+to be checked against the previous two layers.  Every layer keeps, for each
+of its states, the index of its parent and the position of its blank, so
+the path to a solution is read back without searching.
+
+NumPy is optional: without it, or for puzzles that do not opt in, the
+search is that of breadth_first_solve.
+"""
+from puzzle_tools import (_start_stats, _pruner, _path_from_states,
+                          _budgeted, helper_sol)
+from collections import deque
+
+try:
+    import numpy
+except ImportError:  # searches fall back to breadth_first_solve
+    numpy = None
+
+
+@_budgeted
+def vectorised_breadth_first_solve(puzzle, stats=None, prune=None,
+                                   fail_fast=True, budget=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing a
+    solution, as breadth_first_solve does, extending a layer of the search
+    at a time with NumPy.  Return None if this is not possible.
+
+    puzzle must implement swap_neighbours, state_bytes, from_state_bytes
+    and goal_state; if swap_neighbours returns None, or NumPy is not
+    installed, this is breadth_first_solve.  stats, prune, fail_fast and
+    budget are as for breadth_first_solve, except that stats and budget are
+    brought up to date once a layer, and a puzzle is built for a state only
+    to run prune or fail_fast on it, unless fail_fast holds for every
+    puzzle reachable from puzzle (see Puzzle.is_fail_fast_invariant).
+
+    @type puzzle: Puzzle
+    @type stats: SearchStats | None
+    @type prune: list[(Puzzle) -> bool] | None
+    @type fail_fast: bool
+    @type budget: Budget | None
+    @rtype: PuzzleNode | BudgetExhausted | None
+
+    >>> from mn_puzzle import MNPuzzle
+    >>> goal = (("1", "2", "3"), ("4", "5", "*"))
+    >>> x = MNPuzzle((("*", "2", "3"), ("1", "4", "5")), goal)
+    >>> print(vectorised_breadth_first_solve(x))
+    * 2 3
+    1 4 5
+    <BLANKLINE>
+    1 2 3
+    * 4 5
+    <BLANKLINE>
+    1 2 3
+    4 * 5
+    <BLANKLINE>
+    1 2 3
+    4 5 *
+    <BLANKLINE>
+    <BLANKLINE>
+    >>> print(vectorised_breadth_first_solve(
+    ...     MNPuzzle((("2", "1", "3"), ("4", "5", "*")), goal)))
+    None
+    """
+    grid = puzzle.swap_neighbours()
+    if numpy is None or grid is None:
+        return helper_sol(puzzle, deque(), stats, prune, fail_fast, None)
+    stats = _start_stats(stats)
+    pruner = _pruner(puzzle, prune, fail_fast, stats)
+    if puzzle.is_solved():
+        return stats.finish(_path_from_states([puzzle]))
+    if pruner is not None and pruner.rejects_root(puzzle):
+        return stats.finish(None)
+    blank_code, neighbours = grid
+    root = numpy.frombuffer(puzzle.state_bytes(), dtype=numpy.uint8)
+    # every state holds the same codes as root, so they fit in as many bits
+    bits = max(int(root.max()).bit_length(), 1)
+    goal = _keys(numpy.frombuffer(puzzle.goal_state().state_bytes(),
+                                  dtype=numpy.uint8)[None, :], bits)
+    table = _table(neighbours)
+    states = root[None, :].copy()
+    blanks = numpy.flatnonzero(root == blank_code)[:1]
+    # the parents and blanks of each layer, and the sorted keys of each
+    # layer, or of the last two only for reversible puzzles
+    layers = [(numpy.full(1, -1, dtype=numpy.intp), blanks)]
+    seen = [_keys(states, bits)]
+    stored, reversible = 1, puzzle.is_reversible()
+    while len(states):
+        expand = numpy.arange(len(states))
+        if pruner is not None and len(layers) > 1:
+            # pruned states stay in their layer, so they are never
+            # generated again, only never extended
+            expand = expand[[not pruner.check(puzzle.from_state_bytes(
+                state.tobytes())) for state in states]]
+        if len(expand):
+            stats.nodes_expanded += len(expand) - 1
+            stats.expanded(puzzle.from_state_bytes(
+                states[expand[0]].tobytes()), len(states), stored)
+            if stats.budget is not None:
+                stats.budget.check(None, stats)
+        children, parents, moved = _extend(states, blanks, expand, table,
+                                           blank_code)
+        stats.nodes_generated += len(children)
+        keys, first = numpy.unique(_keys(children, bits), return_index=True)
+        fresh = numpy.ones(len(keys), dtype=bool)
+        for earlier in seen:
+            fresh &= ~_contains(earlier, keys)
+        keys, first = keys[fresh], first[fresh]
+        stats.duplicates_rejected += len(children) - len(first)
+        states, blanks = children[first], moved[first]
+        layers.append((parents[first], blanks))
+        seen.append(keys)
+        if reversible and len(seen) > 2:
+            # only the last two layers can hold extensions of the next one
+            del seen[0]
+        stored += len(first)
+        if _contains(keys, goal)[0]:
+            index = int(numpy.searchsorted(keys, goal[0]))
+            return stats.finish(_path_from_states(
+                _trace_back(puzzle, layers, index)))
+    return stats.finish(None)
+
+
+def _table(neighbours):
+    """
+    Return neighbours as an array with a row for each position, padded
+    with -1 where a position has fewer neighbours than another.
+
+    @type neighbours: tuple[tuple[int]]
+    @rtype: numpy.ndarray
+
+    >>> _table(((1,), (0, 2), (1,))).tolist()
+    [[1, -1], [0, 2], [1, -1]]
+    """
+    width = max([len(row) for row in neighbours] + [0])
+    table = numpy.full((len(neighbours), width), -1, dtype=numpy.intp)
+    for i, row in enumerate(neighbours):
+        table[i, :len(row)] = row
+    return table
+
+
+def _extend(states, blanks, expand, table, blank_code):
+    """
+    Return the extensions of the rows of states at the indices in expand,
+    whose blanks are at the positions in blanks, together with the index
+    in states of the parent of each and the position of its blank.
+
+    @type states: numpy.ndarray
+    @type blanks: numpy.ndarray
+    @type expand: numpy.ndarray
+    @type table: numpy.ndarray
+    @type blank_code: int
+    @rtype: (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+
+    >>> states = numpy.array([[1, 0, 2]], dtype=numpy.uint8)
+    >>> children, parents, moved = _extend(
+    ...     states, numpy.array([1]), numpy.array([0]),
+    ...     _table(((1,), (0, 2), (1,))), 0)
+    >>> children.tolist(), parents.tolist(), moved.tolist()
+    ([[0, 1, 2], [1, 2, 0]], [0, 0], [0, 2])
+    """
+    children, parents, moved = [], [], []
+    for direction in range(table.shape[1]):
+        targets = table[blanks[expand], direction]
+        valid = targets >= 0
+        rows, targets = expand[valid], targets[valid]
+        child = states[rows]
+        index = numpy.arange(len(rows))
+        child[index, blanks[rows]] = child[index, targets]
+        child[index, targets] = blank_code
+        children.append(child)
+        parents.append(rows)
+        moved.append(targets)
+    if not children:
+        return (states[:0], expand[:0], expand[:0])
+    return (numpy.concatenate(children), numpy.concatenate(parents),
+            numpy.concatenate(moved))
+
+
+def _keys(states, bits):
+    """
+    Return a key for each row of states, equal only for equal rows: the
+    codes packed bits apiece into a uint64 where they fit, and otherwise
+    the row's bytes as a single value.
+
+    @type states: numpy.ndarray
+    @type bits: int
+    @rtype: numpy.ndarray
+
+    >>> _keys(numpy.array([[1, 2], [2, 1]], dtype=numpy.uint8), 2).tolist()
+    [9, 6]
+    """
+    width = states.shape[1]
+    if bits * width > 64:
+        return numpy.ascontiguousarray(states).view(
+            numpy.dtype((numpy.void, width))).ravel()
+    keys = numpy.zeros(len(states), dtype=numpy.uint64)
+    for j in range(width):
+        keys |= states[:, j].astype(numpy.uint64) << numpy.uint64(bits * j)
+    return keys
+
+
+def _contains(ordered, keys):
+    """
+    Return whether each of keys is in the sorted array ordered.
+
+    @type ordered: numpy.ndarray
+    @type keys: numpy.ndarray
+    @rtype: numpy.ndarray
+
+    >>> _contains(numpy.array([1, 3, 5]), numpy.array([0, 3, 6])).tolist()
+    [False, True, False]
+    """
+    if not len(ordered):
+        return numpy.zeros(len(keys), dtype=bool)
+    positions = numpy.searchsorted(ordered, keys)
+    positions[positions == len(ordered)] = 0
+    return ordered[positions] == keys
+
+
+def _trace_back(puzzle, layers, index):
+    """
+    Return the puzzles on the path from puzzle to the state at index in the
+    last of layers, by following parents back to puzzle and then moving
+    its blank along the way.
+
+    @type puzzle: Puzzle
+    @type layers: list[(numpy.ndarray, numpy.ndarray)]
+    @type index: int
+    @rtype: list[Puzzle]
+    """
+    positions = []
+    for parents, blanks in reversed(layers):
+        positions.append(int(blanks[index]))
+        index = int(parents[index])
+    positions.reverse()
+    cells, states = bytearray(puzzle.state_bytes()), [puzzle]
+    for blank, target in zip(positions, positions[1:]):
+        cells[blank], cells[target] = cells[target], cells[blank]
+        states.append(puzzle.from_state_bytes(bytes(cells)))
+    return states
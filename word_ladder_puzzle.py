@@ -44,6 +44,67 @@ class WordLadderPuzzle(Puzzle):
                 (self._to_word == other._to_word) and
                 (self._word_set == other._word_set))
 
+    def state_key(self):
+        """
+        Return a compact, hashable key for the state of WordLadderPuzzle self.
+
+        @type self: WordLadderPuzzle
+        @rtype: str
+
+        >>> WordLadderPuzzle('cost','cave',{'cast','case','cave'}).state_key()
+        'cost'
+        """
+        return self._from_word
+
+    def from_state_key(self, key):
+        """
+        Return a WordLadderPuzzle stepping from key to the same word, using
+        the same words, as WordLadderPuzzle self.
+
+        @type self: WordLadderPuzzle
+        @type key: str
+        @rtype: WordLadderPuzzle
+
+        >>> x = WordLadderPuzzle('cost','cave',{'cast','case','cave'})
+        >>> print(x.from_state_key('case'))
+        case -> cave
+        """
+        return WordLadderPuzzle(key, self._to_word, self._word_set)
+
+    def state_bytes(self):
+        """
+        Return the current word of WordLadderPuzzle self as ASCII bytes.
+
+        @type self: WordLadderPuzzle
+        @rtype: bytes
+
+        >>> x = WordLadderPuzzle('cost','cave',{'cast','case','cave'})
+        >>> x.from_state_bytes(x.state_bytes()) == x
+        True
+        """
+        return self._from_word.encode("ascii")
+
+    def from_state_bytes(self, data):
+        """
+        Return a WordLadderPuzzle stepping from the word encoded by data to
+        the same word, using the same words, as WordLadderPuzzle self.
+
+        @type self: WordLadderPuzzle
+        @type data: bytes
+        @rtype: WordLadderPuzzle
+        """
+        return WordLadderPuzzle(data.decode("ascii"), self._to_word,
+                                self._word_set)
+
+    def __hash__(self):
+        """
+        Return a hash of WordLadderPuzzle self.
+
+        @type self: WordLadderPuzzle
+        @rtype: int
+        """
+        return hash(self._from_word)
+
     def __str__(self):
         """
         Return a human-readable string representation of WordLadderPuzzle self.
@@ -77,24 +138,144 @@ class WordLadderPuzzle(Puzzle):
         cast -> cave
 
         """
-        wset = self._word_set
-        final = []
-        for x in self._chars:
-            for index in range(len(self._from_word)):
-                from_word = self._from_word
-                from_word = from_word[:index]+x+from_word[index+1:]
-                final.append(from_word)
-        final_list = []
-        for x in final:
-            if x in wset:
-                final_list.append(WordLadderPuzzle(x, self._to_word, wset))
+        return list(self.iter_extensions())
+
+    def iter_extensions(self, seen=None):
+        """
+        Yield the extensions of WordLadderPuzzle self, skipping those whose
+        from_word is in seen.
+
+        @type self: WordLadderPuzzle
+        @type seen: Container | None
+        @rtype: Iterator[WordLadderPuzzle]
 
-        return final_list
+        >>> x = WordLadderPuzzle('cost','cave',{'cast','case','cave','most'})
+        >>> for i in x.iter_extensions({'most'}): print(i)
+        cast -> cave
+        """
+        wset, from_word, to_word = (self._word_set, self._from_word,
+                                    self._to_word)
+        for x in self._chars:
+            for index in range(len(from_word)):
+                if from_word[index] != x:
+                    word = from_word[:index] + x + from_word[index + 1:]
+                    if word in wset and (seen is None or word not in seen):
+                        yield WordLadderPuzzle(word, to_word, wset)
 
         # override is_solved
         # this WordLadderPuzzle is solved when _from_word is the same as
         # _to_word
 
+    def moves(self):
+        """
+        Return the moves of WordLadderPuzzle self to words in its word set,
+        in the order of iter_extensions, as (index, old, new): the letter
+        old at index of _from_word becomes new.
+
+        @type self: WordLadderPuzzle
+        @rtype: list[(int, str, str)]
+
+        >>> x = WordLadderPuzzle('cost','cave',{'cast','case','cave','most'})
+        >>> x.moves()
+        [(1, 'o', 'a'), (0, 'c', 'm')]
+        >>> x.apply((1, 'o', 'a'))
+        >>> print(x)
+        cast -> cave
+        >>> x.undo((1, 'o', 'a'))
+        >>> print(x)
+        cost -> cave
+        """
+        wset, from_word = self._word_set, self._from_word
+        result = []
+        for x in self._chars:
+            for index in range(len(from_word)):
+                old = from_word[index]
+                if (old != x and from_word[:index] + x + from_word[index + 1:]
+                        in wset):
+                    result.append((index, old, x))
+        return result
+
+    def apply(self, move):
+        """
+        Change the letter of _from_word of WordLadderPuzzle self given by
+        move.
+
+        @type self: WordLadderPuzzle
+        @type move: (int, str, str)
+        @rtype: None
+        """
+        index, _, new = move
+        word = self._from_word
+        self._from_word = word[:index] + new + word[index + 1:]
+
+    def undo(self, move):
+        """
+        Change back the letter of _from_word of WordLadderPuzzle self
+        changed by move.
+
+        @type self: WordLadderPuzzle
+        @type move: (int, str, str)
+        @rtype: None
+        """
+        index, old, _ = move
+        word = self._from_word
+        self._from_word = word[:index] + old + word[index + 1:]
+
+    def copy(self):
+        """
+        Return a WordLadderPuzzle at the same word as WordLadderPuzzle self.
+
+        @type self: WordLadderPuzzle
+        @rtype: WordLadderPuzzle
+        """
+        return WordLadderPuzzle(self._from_word, self._to_word,
+                                self._word_set)
+
+    def is_reversible(self):
+        """
+        Return True iff _to_word is in the word set, so that every step of
+        a ladder towards it can be taken in the opposite direction.
+
+        @type self: WordLadderPuzzle
+        @rtype: bool
+
+        >>> x = WordLadderPuzzle('cost','cave',{'cast','case','cave'})
+        >>> x.is_reversible()
+        True
+        >>> WordLadderPuzzle('cost','cave',{'cast','case'}).is_reversible()
+        False
+        """
+        return self._to_word in self._word_set
+
+    def goal_state(self):
+        """
+        Return the solved WordLadderPuzzle that WordLadderPuzzle self is
+        working towards.
+
+        @type self: WordLadderPuzzle
+        @rtype: WordLadderPuzzle
+
+        >>> x = WordLadderPuzzle('cost','cave',{'cast','case','cave'})
+        >>> print(x.goal_state())
+        cave -> cave
+        """
+        return WordLadderPuzzle(self._to_word, self._to_word, self._word_set)
+
+    def heuristic(self):
+        """
+        Return the number of positions at which _from_word differs
+        from _to_word in WordLadderPuzzle self.
+
+        @type self: WordLadderPuzzle
+        @rtype: int
+
+        >>> WordLadderPuzzle('cost','cave',{'cast','case','cave'}).heuristic()
+        3
+        """
+        from_word, to_word = self._from_word, self._to_word
+        return (sum([a != b for a, b in zip(from_word, to_word)]) +
+                abs(len(from_word) - len(to_word)))
+
     def is_solved(self):
         """
         Return whether WordLadderPuzzle self is solved.